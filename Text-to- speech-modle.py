@@ -1,17 +1,3132 @@
 import gtts
 import os
+import signal
+import asyncio
+import base64
+import urllib.parse
+import urllib.request
+import requests
+import numpy as np
 import pygame
 import pyttsx3
 import speech_recognition as sr
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from threading import Thread
+from threading import Thread, Event, Lock, Condition, active_count
+import queue
 import json
+import sys
+import wave
 import tempfile
 import shutil
 import time
 import random
+import subprocess
+import struct
+import re
+import hashlib
+import io
+import socket
+import sqlite3
+import bisect
+import heapq
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+import multiprocessing
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor, wait as future_wait,
+                                FIRST_COMPLETED, CancelledError)
+from concurrent.futures.process import BrokenProcessPool
+
+# Transcription QA settings
+QA_CHUNK_SECONDS = 15
+QA_WER_THRESHOLD = 0.35
+
+_qa_recognizer = None
+
+
+def _init_qa_worker():
+    """Build this worker process's own recognizer, running as batch work"""
+    global _qa_recognizer
+    _qa_recognizer = sr.Recognizer()
+    _batch_worker_init()
+
+
+def qa_recognizer_available():
+    """The offline recognizer (recognize_sphinx) needs the optional pocketsphinx package"""
+    import importlib.util
+    return importlib.util.find_spec("pocketsphinx") is not None
+
+
+def sniff_audio_format(path):
+    """'wav' or 'mp3' from a file's header (clip names always end in .wav), or None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+    except OSError:
+        return None
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def normalize_words(text):
+    """Lowercase text and split it into words without punctuation"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """Word error rate of hypothesis against reference (edit distance / reference words)"""
+    ref_words = normalize_words(reference)
+    hyp_words = normalize_words(hypothesis)
+    if not ref_words:
+        return 0.0 if not hyp_words else 1.0
+
+    # Single-row Levenshtein distance over words
+    previous = list(range(len(hyp_words) + 1))
+    for i, ref_word in enumerate(ref_words, 1):
+        current = [i] + [0] * len(hyp_words)
+        for j, hyp_word in enumerate(hyp_words, 1):
+            cost = 0 if ref_word == hyp_word else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        previous = current
+    return previous[-1] / len(ref_words)
+
+
+def transcribe_clip_for_qa(audio_file, reference_text, chunk_seconds=QA_CHUNK_SECONDS):
+    """Transcribe a clip chunk by chunk with the offline recognizer and score its WER"""
+    start_time = time.time()
+    recognizer = _qa_recognizer or sr.Recognizer()
+    result = {
+        "file": audio_file,
+        "transcript": "",
+        "wer": None,
+        "duration": 0.0,
+        "chunks": 0,
+        "error": None,
+        "skipped": None,
+        "elapsed": 0.0
+    }
+    if sniff_audio_format(audio_file) != "wav":
+        # The offline recognizer only reads WAV/AIFF/FLAC; gTTS clips are MP3
+        result["skipped"] = "not a WAV clip"
+        return result
+    try:
+        with sr.AudioFile(audio_file) as source:
+            result["duration"] = source.DURATION
+            pieces = []
+            remaining = source.DURATION
+            # Long clips are split into fixed-size chunks so the decoder stays responsive
+            while remaining > 0:
+                audio = recognizer.record(source, duration=chunk_seconds)
+                remaining -= chunk_seconds
+                result["chunks"] += 1
+                try:
+                    pieces.append(recognizer.recognize_sphinx(audio))
+                except sr.UnknownValueError:
+                    pass
+        result["transcript"] = " ".join(pieces)
+        result["wer"] = word_error_rate(reference_text, result["transcript"])
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed"] = time.time() - start_time
+    return result
+
+
+# Fixed phrases that are pre-rendered in the background
+VOICE_TYPES = ["male", "female"]
+VOICE_TONES = ["standard", "peach", "soothing", "crystal", "deep", "soft"]
+
+TEST_TEXTS = {
+    "standard": "Hello, this is the standard voice tone. Clear and natural sounding.",
+    "peach": "Welcome to the peach soft tone. Warm and gentle like a summer breeze.",
+    "soothing": "This is the soothing voice tone. Perfect for relaxation and calm moments.",
+    "crystal": "Crystal clear voice tone. Sharp pronunciation for perfect understanding.",
+    "deep": "This is the deep voice tone. Rich and powerful for professional use.",
+    "soft": "Soft whisper tone. Gentle and intimate for personal content."
+}
+
+# Tone table: offsets from the base speech rate (words per minute) and master volume
+BASE_SPEECH_RATE = 175
+
+TONE_SETTINGS = {
+    "standard": {"rate": 0, "volume": 0.0},
+    "peach": {"rate": -25, "volume": 0.0},
+    "soothing": {"rate": -40, "volume": -0.1},
+    "crystal": {"rate": 15, "volume": 0.1},
+    "deep": {"rate": -15, "volume": 0.05},
+    "soft": {"rate": -30, "volume": -0.15},
+    "warm": {"rate": -20, "volume": 0.0}
+}
+
+
+def tone_voice_properties(voice_tone, volume, rate_setting="normal"):
+    """Speech rate and clamped volume for a tone, speed setting and master volume"""
+    tone = TONE_SETTINGS.get(voice_tone, TONE_SETTINGS["standard"])
+    rate = BASE_SPEECH_RATE + tone["rate"]
+    if rate_setting == "slow":
+        rate = max(80, rate - 40)
+    elif rate_setting == "fast":
+        rate = rate + 40
+    return rate, max(0.1, min(1.0, volume + tone["volume"]))
+
+
+# System voice names to look for, best match first
+VOICE_PREFERENCES = {
+    "male": {
+        "standard": ['david', 'mark', 'microsoft david desktop'],
+        "deep": ['david', 'mark'],
+        "warm": ['david'],
+        "crystal": ['mark']
+    },
+    "female": {
+        "standard": ['zira', 'eva', 'hazel'],
+        "peach": ['hazel', 'eva', 'zira'],
+        "soothing": ['hazel', 'eva'],
+        "crystal": ['zira', 'hazel'],
+        "soft": ['hazel', 'eva']
+    }
+}
+
+
+def find_voice_id(voices, voice_type, voice_tone="standard"):
+    """Pick the pyttsx3 voice id for a voice type and tone from the installed voices"""
+    preferred_voices = VOICE_PREFERENCES.get(voice_type, {}).get(voice_tone, [])
+
+    # First try preferred voices for this tone
+    for preferred in preferred_voices:
+        for voice in voices:
+            if preferred in voice.name.lower():
+                print(f"Found preferred {voice_type} voice for {voice_tone} tone: {voice.name}")
+                return voice.id
+
+    # Fallback to any voice of the requested gender
+    for voice in voices:
+        if voice_type == "male" and any(indicator in voice.name.lower() for indicator in ['male', 'david', 'mark']):
+            print(f"Found fallback male voice: {voice.name}")
+            return voice.id
+        elif voice_type == "female" and any(indicator in voice.name.lower() for indicator in ['female', 'zira', 'hazel', 'eva']):
+            print(f"Found fallback female voice: {voice.name}")
+            return voice.id
+
+    # Ultimate fallback
+    if len(voices) > 0:
+        print(f"Using ultimate fallback voice: {voices[0].name}")
+        return voices[0].id
+
+    return None
+
+
+QUICK_TEXTS = [
+    ("Hello World", "Hello, welcome to the ultimate text to speech converter!"),
+    ("Test Voice", "This is a test of the current voice settings and tone quality."),
+    ("Long Text", "This is a longer text to test how the text to speech converter handles extended content with proper pacing and natural sounding speech."),
+    ("Clear", "")
+]
+
+
+class ClipWarmupCache:
+    """Pre-rendered clips for fixed phrases, keyed by render settings, voice, tone and text"""
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.signature = None
+        self.clips = {}
+        self.lock = Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def clip_key(self, signature, voice_type, voice_tone, text):
+        """Stable key for one rendered phrase"""
+        if signature and signature[0] == "online":
+            # gTTS ignores voice and tone, so one render serves every combination
+            voice_type = voice_tone = "*"
+        raw = json.dumps([signature, voice_type, voice_tone, text])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def clip_path(self, key):
+        return os.path.join(self.cache_dir, f"warm_{key}.wav")
+
+    def get(self, signature, voice_type, voice_tone, text):
+        """Return the pre-rendered clip path, or None if it is not ready"""
+        with self.lock:
+            if signature != self.signature:
+                return None
+            path = self.clips.get(self.clip_key(signature, voice_type, voice_tone, text))
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def copy_to(self, signature, voice_type, voice_tone, text, output_file):
+        """Copy a pre-rendered clip under the lock so an invalidate can't delete it mid-copy"""
+        with self.lock:
+            if signature != self.signature:
+                return False
+            path = self.clips.get(self.clip_key(signature, voice_type, voice_tone, text))
+            if not path or not os.path.exists(path):
+                return False
+            shutil.copy2(path, output_file)
+            return True
+
+    def put(self, signature, voice_type, voice_tone, text, rendered_file):
+        """Move a finished render into the cache if its settings are still current"""
+        key = self.clip_key(signature, voice_type, voice_tone, text)
+        with self.lock:
+            if signature != self.signature:
+                return False
+            path = self.clip_path(key)
+            os.replace(rendered_file, path)
+            self.clips[key] = path
+            return True
+
+    def invalidate(self, signature):
+        """Drop every clip rendered with other settings"""
+        with self.lock:
+            if signature == self.signature:
+                return False
+            self.signature = signature
+            stale = list(self.clips.values())
+            self.clips.clear()
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return True
+
+
+# Hedged request settings
+HEDGE_DEFAULT_DEADLINE = 2.5
+HEDGE_MIN_DEADLINE = 0.5
+HEDGE_MAX_DEADLINE = 10.0
+# Wait this many smoothed relative errors past the engine's estimate before hedging
+HEDGE_ERROR_MARGIN = 2.0
+HEDGE_MIN_RUNS = 3
+
+
+# Duration model settings: features are [1, characters / 100, spoken seconds / 10]
+DURATION_MODEL_FILE = 'tts_duration_model.json'
+DURATION_PRIOR = [0.3, 0.3, 0.2]
+DURATION_FORGETTING = 0.97
+DURATION_MAX_COVARIANCE = 100.0
+DURATION_ERROR_ALPHA = 0.2
+DURATION_SAVE_INTERVAL = 30.0
+# Seconds of predicted work forgiven per second a job has waited
+SJF_AGING_PER_SECOND = 0.2
+
+
+def duration_features(text, voice_tone="standard", rate_setting="normal"):
+    """Cost model inputs: fixed overhead, text length and how long the speech will last"""
+    words_per_minute, _ = tone_voice_properties(voice_tone, 1.0, rate_setting)
+    spoken_seconds = len(text.split()) * 60 / words_per_minute
+    return np.array([1.0, len(text) / 100, spoken_seconds / 10])
+
+
+class DurationModel:
+    """Per-engine synthesis statistics: a linear estimate of render time, recalibrated by
+    recursive least squares after every run, plus the failure rate the router and the
+    hedge deadline work from
+    """
+    
+    def __init__(self, model_file=DURATION_MODEL_FILE, forgetting=DURATION_FORGETTING):
+        self.model_file = model_file
+        self.forgetting = forgetting
+        self.lock = Lock()
+        self.engines = {}
+        self.dirty = False
+        self.last_save = 0.0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.model_file, 'r') as f:
+                for engine, state in json.load(f).items():
+                    self.engines[engine] = {"theta": np.array(state["theta"]), "P": np.array(state["P"]),
+                                            "runs": state["runs"], "error": state["error"],
+                                            "attempts": state.get("attempts", state["runs"]),
+                                            "failure_rate": state.get("failure_rate", 0.0)}
+        except:
+            pass
+
+    def save(self, force=False):
+        """Write the model if it changed, at most once per DURATION_SAVE_INTERVAL unless forced"""
+        if not self.model_file:
+            return
+        try:
+            with self.lock:
+                if not self.dirty or (not force and time.monotonic() - self.last_save < DURATION_SAVE_INTERVAL):
+                    return
+                snapshot = json.dumps({engine: {"theta": state["theta"].tolist(), "P": state["P"].tolist(),
+                                                "runs": state["runs"], "error": state["error"],
+                                                "attempts": state["attempts"],
+                                                "failure_rate": state["failure_rate"]}
+                                       for engine, state in self.engines.items()}, indent=4)
+                self.dirty = False
+                self.last_save = time.monotonic()
+            with open(self.model_file, 'w') as f:
+                f.write(snapshot)
+        except Exception as e:
+            print(f"Error saving duration model: {e}")
+
+    def _state(self, engine):
+        if engine not in self.engines:
+            self.engines[engine] = {"theta": np.array(DURATION_PRIOR), "P": np.eye(len(DURATION_PRIOR)),
+                                    "runs": 0, "error": 0.0, "attempts": 0, "failure_rate": 0.0}
+        return self.engines[engine]
+
+    def predict(self, engine, text, voice_tone="standard", rate_setting="normal"):
+        """Estimated seconds to synthesize text with an engine"""
+        x = duration_features(text, voice_tone, rate_setting)
+        with self.lock:
+            theta = self._state(engine)["theta"]
+        return max(0.05, float(x @ theta))
+
+    def observe(self, engine, text, voice_tone, rate_setting, seconds, success=True):
+        """Fold one run into the engine's statistics; return what the model had predicted
+
+        seconds=None records only the outcome, for runs whose wall time isn't render time.
+        """
+        x = duration_features(text, voice_tone, rate_setting)
+        with self.lock:
+            state = self._state(engine)
+            self.dirty = True
+            state["attempts"] += 1
+            state["failure_rate"] += DURATION_ERROR_ALPHA * ((0.0 if success else 1.0) - state["failure_rate"])
+            predicted = max(0.05, float(x @ state["theta"]))
+            if not success or seconds is None:
+                # A failure says nothing about how long a good render takes
+                return predicted
+            relative_error = abs(predicted - seconds) / max(seconds, 0.05)
+            state["error"] = relative_error if not state["runs"] else 0.8 * state["error"] + 0.2 * relative_error
+            Px = state["P"] @ x
+            gain = Px / (self.forgetting + x @ Px)
+            state["theta"] = state["theta"] + gain * (seconds - x @ state["theta"])
+            state["P"] = (state["P"] - np.outer(gain, Px)) / self.forgetting
+            # Similar-length texts don't excite every feature, so keep the covariance from winding up
+            if np.trace(state["P"]) > DURATION_MAX_COVARIANCE:
+                state["P"] *= DURATION_MAX_COVARIANCE / np.trace(state["P"])
+            state["runs"] += 1
+        return predicted
+
+    def reliability(self, engine):
+        """(attempts, successful runs, smoothed failure rate) for an engine"""
+        with self.lock:
+            state = self.engines.get(engine)
+            return (state["attempts"], state["runs"], state["failure_rate"]) if state else (0, 0, 0.0)
+
+    def hedge_deadline(self, engine, text, voice_tone="standard", rate_setting="normal"):
+        """How long to wait for an engine on this text before starting a backup"""
+        with self.lock:
+            state = self.engines.get(engine)
+            runs, error = (state["runs"], state["error"]) if state else (0, 0.0)
+        if runs < HEDGE_MIN_RUNS:
+            return HEDGE_DEFAULT_DEADLINE
+        deadline = self.predict(engine, text, voice_tone, rate_setting) * (1 + HEDGE_ERROR_MARGIN * error)
+        return max(HEDGE_MIN_DEADLINE, min(HEDGE_MAX_DEADLINE, deadline))
+
+    def accuracy(self, engine):
+        """(runs, smoothed relative error) for an engine"""
+        with self.lock:
+            state = self.engines.get(engine)
+            return (state["runs"], state["error"]) if state else (0, None)
+
+
+class ShortestJobQueue:
+    """Shortest-predicted-job-first queue with aging, so long jobs still run eventually
+
+    A job's priority is its estimate minus aging * seconds waited. Everyone ages at
+    the same rate, so that order equals estimate + aging * enqueue time and a heap works.
+    """
+    
+    def __init__(self, aging_per_second=SJF_AGING_PER_SECOND, clock=time.monotonic):
+        self.aging_per_second = aging_per_second
+        self.clock = clock
+        self.heap = []
+        self.counter = 0
+        self.lock = Lock()
+
+    def push(self, item, estimate):
+        with self.lock:
+            now = self.clock()
+            heapq.heappush(self.heap, (estimate + self.aging_per_second * now, self.counter, now, estimate, item))
+            self.counter += 1
+
+    def pop(self):
+        """(item, estimate, seconds waited) for the next job, or None when empty"""
+        with self.lock:
+            if not self.heap:
+                return None
+            _, _, enqueued, estimate, item = heapq.heappop(self.heap)
+            return item, estimate, self.clock() - enqueued
+
+    def remaining_estimate(self):
+        with self.lock:
+            return sum(entry[3] for entry in self.heap)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.heap)
+
+
+def benchmark_scheduler(jobs=200, seed=7):
+    """Calibrate the cost model on a simulated engine, then compare FIFO with aged shortest-job-first"""
+    rng = random.Random(seed)
+    words = "the quick brown fox jumps over a lazy dog while reading long paragraphs aloud".split()
+    
+    def simulated_seconds(text, voice_tone, rate_setting):
+        # Fixed start-up plus time proportional to the speech produced, with 10% noise
+        return (0.4 + 0.9 * duration_features(text, voice_tone, rate_setting)[2]) * rng.uniform(0.9, 1.1)
+    
+    def random_job():
+        text = " ".join(rng.choice(words) for _ in range(rng.choice((3, 10, 40, 150))))
+        return text, rng.choice(list(TONE_SETTINGS)), rng.choice(("slow", "normal", "fast"))
+    
+    model = DurationModel(model_file=None)
+    errors = []
+    for i in range(jobs):
+        text, voice_tone, rate_setting = random_job()
+        actual = simulated_seconds(text, voice_tone, rate_setting)
+        predicted = model.observe("simulated", text, voice_tone, rate_setting, actual)
+        errors.append(abs(predicted - actual) / actual)
+    print("Duration model on a simulated engine (mean relative error):")
+    for start in (0, 10, 50, jobs - 50):
+        window = errors[start:start + 10 if start < 50 else start + 50]
+        print(f"  runs {start + 1:>3}-{start + len(window):<3}: {sum(window) / len(window):6.1%}")
+    
+    # Jobs keep arriving at ~95% load, the case where plain SJF can starve long jobs
+    jobs_list = [random_job() for _ in range(400)]
+    durations = [simulated_seconds(*job) for job in jobs_list]
+    mean_gap = sum(durations) / len(durations) / 0.95
+    arrivals = []
+    clock = 0.0
+    for job, seconds in zip(jobs_list, durations):
+        arrivals.append((clock, job, seconds))
+        clock += rng.expovariate(1.0 / mean_gap)
+    print(f"Scheduling {len(arrivals)} jobs arriving at ~95% load:")
+    for label, aging in (("FIFO", None), ("SJF, no aging", 0.0), ("SJF + aging", SJF_AGING_PER_SECOND)):
+        # Replay the queue on a simulated clock, so aging sees simulated waiting times
+        now = [0.0]
+        scheduler = ShortestJobQueue(aging or 0.0, clock=lambda: now[0])
+        responses = []
+        next_arrival = 0
+        while next_arrival < len(arrivals) or len(scheduler):
+            while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= now[0]:
+                arrived, job, seconds = arrivals[next_arrival]
+                # FIFO is SJF with every estimate equal
+                scheduler.push((arrived, seconds), 0.0 if aging is None else model.predict("simulated", *job))
+                next_arrival += 1
+            if not len(scheduler):
+                now[0] = arrivals[next_arrival][0]
+                continue
+            (arrived, seconds), _, _ = scheduler.pop()
+            now[0] += seconds
+            responses.append(now[0] - arrived)
+        responses.sort()
+        print(f"  {label:>13}: mean response {sum(responses) / len(responses):6.1f}s, "
+              f"p99 {responses[int(len(responses) * 0.99)]:6.1f}s, worst {responses[-1]:6.1f}s")
+
+
+# Cancellable synthesis jobs
+CANCEL_POLL_SECONDS = 0.02
+
+
+class SynthesisCancelled(Exception):
+    """Raised inside a synthesis job once the user has cancelled it"""
+
+
+class SynthesisJob:
+    """Cancellation token passed down to the engines for one generate/test request"""
+
+    def __init__(self, label):
+        self.label = label
+        self.cancel_event = Event()
+        self.cancel_requested_at = None
+
+    def cancel(self):
+        if not self.cancel_event.is_set():
+            self.cancel_requested_at = time.perf_counter()
+            self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Raise SynthesisCancelled at a chunk boundary if the job was cancelled"""
+        if self.cancel_event.is_set():
+            raise SynthesisCancelled(f"{self.label} cancelled")
+
+
+# Online engine settings
+GTTS_PARALLEL_SEGMENTS = 4
+GTTS_AUDIO_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+# Online request pacing (0 requests/min leaves pacing off until the server pushes back)
+GTTS_RATE_PER_MINUTE = 0
+GTTS_BURST = 5
+GTTS_MAX_RETRIES = 3
+GTTS_RETRY_AFTER_DEFAULT = 5.0
+GTTS_RETRY_AFTER_MAX = 120.0
+
+
+def parse_retry_after(value, default=GTTS_RETRY_AFTER_DEFAULT):
+    """Seconds to back off from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return max(0.0, min(GTTS_RETRY_AFTER_MAX, seconds))
+
+
+class TokenBucket:
+    """Paces requests to a sustained rate with limited bursts, and pauses everyone on Retry-After"""
+    
+    def __init__(self, rate_per_minute=GTTS_RATE_PER_MINUTE, burst=GTTS_BURST):
+        self.lock = Lock()
+        self.configure(rate_per_minute, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.recent = deque()
+        self.grants = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttles = 0
+
+    def configure(self, rate_per_minute, burst):
+        """Set the sustained rate (0 turns pacing off) and the burst size"""
+        with self.lock:
+            self.rate = max(0, rate_per_minute) / 60.0
+            self.burst = max(1, int(burst))
+
+    def _take(self, now, cost=1):
+        """Take cost tokens, or return how long until they are available (lock held)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if not self.rate:
+            return 0.0
+        cost = min(cost, self.burst)
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def acquire(self, job=None, cost=1):
+        """Block until cost requests may be sent; return the seconds spent waiting"""
+        start_time = time.monotonic()
+        while True:
+            with self.lock:
+                wait = self._take(time.monotonic(), cost)
+                if not wait:
+                    waited = time.monotonic() - start_time
+                    self.grants += cost
+                    self.recent.extend([time.monotonic()] * cost)
+                    if waited > 0.001:
+                        self.waits += 1
+                        self.total_wait += waited
+                        self.max_wait = max(self.max_wait, waited)
+                    return waited
+            if job:
+                job.check()
+                wait = min(wait, CANCEL_POLL_SECONDS * 5)
+            time.sleep(wait)
+
+    def throttled(self, retry_after):
+        """The server pushed back: hold every request until Retry-After has passed"""
+        with self.lock:
+            self.throttles += 1
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def stats(self, window=60.0):
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > window:
+                self.recent.popleft()
+            return {
+                "requests_last_minute": len(self.recent) * 60.0 / window,
+                "configured_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "requests": self.grants,
+                "throttle_waits": self.waits,
+                "mean_wait": self.total_wait / self.waits if self.waits else 0.0,
+                "max_wait": self.max_wait,
+                "retry_after_pauses": self.throttles
+            }
+
+
+def estimate_gtts_segments(text):
+    """How many requests gTTS will send for text, for paths that cannot see its prepared requests"""
+    max_chars = getattr(gtts.gTTS, "GOOGLE_TTS_MAX_CHARS", 100)
+    return max(1, -(-len(text.strip()) // max_chars))
+
+
+def fetch_gtts_segment(tts, prepared_request, endpoint=None, limiter=None, job=None):
+    """Send one prepared gTTS request and decode the MP3 chunks in its response"""
+    if endpoint:
+        prepared_request.url = endpoint
+    try:
+        for attempt in range(GTTS_MAX_RETRIES + 1):
+            if limiter:
+                limiter.acquire(job)
+            with requests.Session() as session:
+                response = session.send(prepared_request, verify=False,
+                                        proxies=urllib.request.getproxies(),
+                                        timeout=getattr(tts, "timeout", None))
+            if response.status_code not in (429, 503) or attempt == GTTS_MAX_RETRIES:
+                break
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            print(f"gTTS throttled ({response.status_code}), retrying after {retry_after:.1f}s")
+            if limiter:
+                limiter.throttled(retry_after)
+            else:
+                time.sleep(retry_after)
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        raise gtts.gTTSError(tts=tts, response=response)
+    except requests.exceptions.RequestException:
+        raise gtts.gTTSError(tts=tts)
+    
+    # Same response parsing as gTTS.stream()
+    chunks = []
+    for line in response.iter_lines(chunk_size=1024):
+        decoded_line = line.decode("utf-8")
+        if "jQ1olc" in decoded_line:
+            audio_search = GTTS_AUDIO_PATTERN.search(decoded_line)
+            if not audio_search:
+                raise gtts.gTTSError(tts=tts, response=response)
+            chunks.append(base64.b64decode(audio_search.group(1).encode("ascii")))
+    return chunks
+
+
+def iter_gtts_segments(tts, max_workers=GTTS_PARALLEL_SEGMENTS, endpoint=None, job=None, limiter=None):
+    """Fetch gTTS text segments concurrently and yield each segment's MP3 bytes in original order"""
+    prepared_requests = tts._prepare_requests()
+    workers = max(1, min(max_workers, len(prepared_requests)))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(fetch_gtts_segment, tts, pr, endpoint, limiter, job) for pr in prepared_requests]
+        # Yield in submission order, so output matches the sequential path
+        for future in futures:
+            while job and not future.done():
+                job.check()
+                future_wait([future], timeout=CANCEL_POLL_SECONDS)
+            yield b"".join(future.result())
+    finally:
+        # Don't wait for abandoned downloads, their results are simply dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def save_gtts_parallel(tts, output_file, max_workers=GTTS_PARALLEL_SEGMENTS, endpoint=None, job=None,
+                       limiter=None):
+    """Fetch gTTS text segments concurrently and write the MP3 frames in original order"""
+    segments = 0
+    with open(output_file, 'wb') as f:
+        for audio in iter_gtts_segments(tts, max_workers, endpoint, job, limiter):
+            f.write(audio)
+            segments += 1
+    return segments
+
+
+def decode_mp3_pcm(audio):
+    """Decode one self-contained MP3 segment to PCM in the mixer's format, or b"" if it won't decode"""
+    try:
+        return pygame.mixer.Sound(file=io.BytesIO(audio)).get_raw()
+    except pygame.error as e:
+        print(f"Could not decode streamed MP3 segment: {e}")
+        return b""
+
+
+def stand_in_gtts_payload(body):
+    """Build a gTTS-shaped response whose fake "MP3" payload is unique per segment"""
+    rpc = json.loads(urllib.parse.unquote(body.split("=", 1)[1].rstrip("&")))
+    segment_text = json.loads(rpc[0][0][1])[0]
+    audio = base64.b64encode(hashlib.sha256(segment_text.encode("utf-8")).digest() * 64)
+    return (')]}\'\n\n[["wrb.fr","jQ1olc","[\\"' + audio.decode("ascii") +
+            '\\"]",null,null,null,"generic"]]\n')
+
+
+def benchmark_gtts_parallel(segment_delay=0.2):
+    """Compare sequential and parallel gTTS fetches against a local stand-in endpoint"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            time.sleep(segment_delay)
+            payload = stand_in_gtts_payload(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(payload.encode("utf-8"))
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/batchexecute"
+    Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        base_text = ("This sentence is long enough to become its own gTTS segment, "
+                     "so that the request count grows with the text. ")
+        print(f"gTTS segment fetch benchmark ({segment_delay * 1000:.0f} ms per request)")
+        for repeats in (1, 4, 16):
+            tts = gtts.gTTS(text=base_text * repeats, lang='en')
+            
+            # Reference: the library's own sequential save, pointed at the stand-in
+            prepare = tts._prepare_requests
+            def prepare_local():
+                prepared = prepare()
+                for pr in prepared:
+                    pr.url = endpoint
+                return prepared
+            tts._prepare_requests = prepare_local
+            
+            sequential_file = os.path.join(work_dir, f"sequential_{repeats}.mp3")
+            start_time = time.perf_counter()
+            tts.save(sequential_file)
+            sequential = time.perf_counter() - start_time
+            
+            parallel_file = os.path.join(work_dir, f"parallel_{repeats}.mp3")
+            start_time = time.perf_counter()
+            segments = save_gtts_parallel(tts, parallel_file)
+            parallel = time.perf_counter() - start_time
+            
+            with open(sequential_file, 'rb') as a, open(parallel_file, 'rb') as b:
+                identical = a.read() == b.read()
+            print(f"  {segments:>3} segments: sequential {sequential * 1000:7.0f} ms, "
+                  f"parallel {parallel * 1000:7.0f} ms ({sequential / parallel:4.1f}x), "
+                  f"byte-identical: {identical}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_rate_limit(server_rate_per_minute=300, server_burst=5, jobs=10, job_threads=4):
+    """Fire a burst of online jobs at a stand-in that answers 429 above its rate, with and without pacing"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    server_bucket = TokenBucket(server_rate_per_minute, server_burst)
+    counts = {"ok": 0, "throttled": 0}
+    counts_lock = Lock()
+    
+    class ThrottlingHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            with server_bucket.lock:
+                allowed = server_bucket._take(time.monotonic()) == 0
+            with counts_lock:
+                counts["ok" if allowed else "throttled"] += 1
+            if not allowed:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+            time.sleep(0.05)
+            payload = stand_in_gtts_payload(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(payload.encode("utf-8"))
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingHandler)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/batchexecute"
+    Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    text = ("This sentence is long enough to become its own gTTS segment, "
+            "so that every job sends several requests. ") * 4
+    
+    def run_job(index, limiter):
+        tts = gtts.gTTS(text=text, lang='en')
+        try:
+            save_gtts_parallel(tts, os.path.join(work_dir, f"job_{index}.mp3"), endpoint=endpoint,
+                               limiter=limiter)
+            return True
+        except Exception:
+            return False
+    
+    try:
+        print(f"Online pacing benchmark: {jobs} jobs against a server allowing "
+              f"{server_rate_per_minute}/min (burst {server_burst})")
+        for label, limiter in (("unpaced", None),
+                               ("token bucket", TokenBucket(server_rate_per_minute, server_burst))):
+            time.sleep(server_burst * 60.0 / server_rate_per_minute)  # Let the server bucket refill
+            counts.update(ok=0, throttled=0)
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=job_threads) as pool:
+                results = list(pool.map(lambda i: run_job(i, limiter), range(jobs)))
+            elapsed = time.perf_counter() - start_time
+            print(f"  {label:>12}: {sum(results)}/{jobs} jobs in {elapsed:5.1f}s "
+                  f"({sum(results) * 60 / elapsed:5.1f} jobs/min), {counts['ok']} requests served, "
+                  f"{counts['throttled']} answered 429")
+            if limiter:
+                stats = limiter.stats()
+                print(f"                {stats['throttle_waits']} paced waits, mean {stats['mean_wait']:.2f}s, "
+                      f"max {stats['max_wait']:.2f}s, {stats['retry_after_pauses']} Retry-After pauses")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_online_first_audio(segment_delay=0.3, jitter=0.2):
+    """Time to the first playable gTTS segment: full download versus the segment stream"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            time.sleep(segment_delay + random.uniform(0, jitter))
+            payload = stand_in_gtts_payload(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(payload.encode("utf-8"))
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/batchexecute"
+    Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        base_text = ("This sentence is long enough to become its own gTTS segment, "
+                     "so that the request count grows with the text. ")
+        print(f"gTTS first-audio benchmark ({segment_delay * 1000:.0f}-"
+              f"{(segment_delay + jitter) * 1000:.0f} ms per request, 4 parallel fetches)")
+        for repeats in (1, 8, 32):
+            tts = gtts.gTTS(text=base_text * repeats, lang='en')
+            
+            start_time = time.perf_counter()
+            save_gtts_parallel(tts, os.path.join(work_dir, "saved.mp3"), endpoint=endpoint)
+            saved = time.perf_counter() - start_time
+            
+            start_time = time.perf_counter()
+            first = None
+            segments = 0
+            with open(os.path.join(work_dir, "streamed.mp3"), 'wb') as f:
+                for audio in iter_gtts_segments(tts, endpoint=endpoint):
+                    f.write(audio)
+                    segments += 1
+                    if first is None:
+                        first = time.perf_counter() - start_time
+            streamed = time.perf_counter() - start_time
+            print(f"  {segments:>3} segments: download-then-play {saved * 1000:6.0f} ms, "
+                  f"streamed first audio {first * 1000:5.0f} ms (file done at {streamed * 1000:6.0f} ms)")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class UIDispatcher:
+    """Thread-safe queue of UI updates that a poll on the Tk main loop drains once per frame
+
+    Worker threads only put onto a SimpleQueue. root.after is called on the Tk thread
+    alone, by the poll re-arming itself, so a worker never waits on the main loop.
+    """
+    
+    def __init__(self, root, frame_ms=16):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.queue = queue.SimpleQueue()
+        self.frame_latencies = deque(maxlen=2000)
+        self.posted = 0
+        self.applied = 0
+        self.after_id = None
+        self.due = time.perf_counter()
+        self.start()
+
+    def start(self):
+        """Start polling (Tk thread only)"""
+        if self.after_id is None:
+            self.due = time.perf_counter() + self.frame_ms / 1000.0
+            self.after_id = self.root.after(self.frame_ms, self._poll)
+
+    def stop(self):
+        """Stop polling (Tk thread only)"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def post(self, key, func, *args, **kwargs):
+        """Queue a state update; repeated updates with the same key collapse into the latest"""
+        self.queue.put((key, func, args, kwargs))
+
+    def call(self, func, *args, **kwargs):
+        """Queue a one-off UI call (dialogs etc.) that must not be coalesced"""
+        self.queue.put((None, func, args, kwargs))
+
+    def _run(self, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"UI update error: {e}")
+
+    def _poll(self):
+        """Apply everything queued since the last frame, then re-arm (Tk thread only)"""
+        started = time.perf_counter()
+        latest = {}
+        calls = []
+        while True:
+            try:
+                key, func, args, kwargs = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.posted += 1
+            if key is None:
+                calls.append((func, args, kwargs))
+            else:
+                latest.pop(key, None)
+                latest[key] = (func, args, kwargs)
+        
+        for func, args, kwargs in latest.values():
+            self._run(func, args, kwargs)
+        # One-off calls get their own event callbacks: a modal dialog then spins a nested
+        # loop in which later polls still run, instead of stalling this one
+        for func, args, kwargs in calls:
+            self.root.after(0, self._run, func, args, kwargs)
+        self.applied += len(latest) + len(calls)
+        
+        finished = time.perf_counter()
+        if latest or calls:
+            self.frame_latencies.append(max(0.0, started - self.due) + (finished - started))
+        self.due = finished + self.frame_ms / 1000.0
+        self.after_id = self.root.after(self.frame_ms, self._poll)
+
+    def stats(self):
+        """Frame latency percentiles (ms) and how many updates were coalesced away"""
+        latencies = sorted(self.frame_latencies)
+        if not latencies:
+            return {"frames": 0}
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        return {
+            "frames": len(latencies),
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99),
+            "max_ms": latencies[-1] * 1000,
+            "posted": self.posted,
+            "applied": self.applied
+        }
+
+
+def benchmark_ui_dispatcher(workers=4, jobs_per_worker=50, updates_per_job=20, seconds=None):
+    """Measure UI-thread frame latency while worker threads stream status updates"""
+    root = tk.Tk()
+    status_var = tk.StringVar(value="idle")
+    tk.Label(root, textvariable=status_var).pack()
+    progress_var = tk.StringVar(value="")
+    tk.Label(root, textvariable=progress_var).pack()
+    ui = UIDispatcher(root)
+    done = []
+    
+    def batch_worker(worker_id):
+        for job in range(jobs_per_worker):
+            for step in range(updates_per_job):
+                ui.post("status", status_var.set, f"worker {worker_id} job {job} step {step}")
+                # Simulated synthesis work between updates
+                sum(i * i for i in range(2000))
+            ui.post(f"progress_{worker_id}", progress_var.set, f"worker {worker_id}: {job + 1}/{jobs_per_worker}")
+        done.append(worker_id)
+    
+    def check_done():
+        if len(done) == workers:
+            root.quit()
+        else:
+            root.after(50, check_done)
+    
+    start_time = time.perf_counter()
+    for worker_id in range(workers):
+        Thread(target=batch_worker, args=(worker_id,), daemon=True).start()
+    root.after(50, check_done)
+    root.mainloop()
+    elapsed = time.perf_counter() - start_time
+    stats = ui.stats()
+    root.destroy()
+    
+    print(f"UI dispatcher benchmark: {workers} workers x {jobs_per_worker} jobs in {elapsed:.2f}s")
+    print(f"  frame latency p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+          f"p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms over {stats['frames']} frames")
+    print(f"  {stats['posted']} updates posted, {stats['applied']} applied "
+          f"({stats['posted'] / max(1, stats['applied']):.1f}x coalesced)")
+
+
+# History search settings
+HISTORY_DISPLAY_LIMIT = 200
+HISTORY_SEARCH_DEBOUNCE_MS = 150
+
+
+class HistorySearchIndex:
+    """Inverted index (token -> entry ids) over history source texts, updated incrementally"""
+    
+    def __init__(self):
+        self.postings = {}
+        self.entry_tokens = {}
+        self.vocabulary = []
+        self.lock = Lock()
+
+    def add(self, entry_id, text):
+        tokens = set(normalize_words(text))
+        with self.lock:
+            self.entry_tokens[entry_id] = tokens
+            for token in tokens:
+                ids = self.postings.get(token)
+                if ids is None:
+                    ids = self.postings[token] = set()
+                    bisect.insort(self.vocabulary, token)
+                ids.add(entry_id)
+
+    def remove(self, entry_id):
+        with self.lock:
+            for token in self.entry_tokens.pop(entry_id, ()):
+                ids = self.postings.get(token)
+                if ids is None:
+                    continue
+                ids.discard(entry_id)
+                if not ids:
+                    del self.postings[token]
+                    del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def clear(self):
+        with self.lock:
+            self.postings.clear()
+            self.entry_tokens.clear()
+            self.vocabulary.clear()
+
+    def _prefix_tokens(self, prefix):
+        """Vocabulary tokens starting with prefix, found by binary search"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        return self.vocabulary[start:end]
+
+    def search(self, query):
+        """Ids of entries containing every query word; the last word may be partial"""
+        words = normalize_words(query)
+        if not words:
+            return None
+        exact, prefix = words[:-1], words[-1]
+        if query[-1:].isspace() or query[-1:] in ".,!?":
+            exact, prefix = words, None
+        
+        with self.lock:
+            expansions = self._prefix_tokens(prefix) if prefix else []
+            if not exact:
+                return set().union(*(self.postings[token] for token in expansions))
+            
+            # Intersect from the rarest posting list up
+            postings = sorted((self.postings.get(token, set()) for token in set(exact)), key=len)
+            result = set(postings[0])
+            for ids in postings[1:]:
+                if not result:
+                    return result
+                result &= ids
+            if prefix and result:
+                # Check the few remaining candidates rather than merging every expansion
+                expansions = set(expansions)
+                result = {entry_id for entry_id in result
+                          if not self.entry_tokens[entry_id].isdisjoint(expansions)}
+            return result
+
+
+def benchmark_history_search(entries=100000):
+    """Measure index build, incremental updates and lookups at scale"""
+    rng = random.Random(0)
+    vocabulary = [f"{rng.choice(['pro', 'tech', 'nova', 'zen', 'ultra'])}{rng.randint(0, 20000)}"
+                  for _ in range(30000)]
+    vocabulary += ["hello", "welcome", "announcement", "platform", "train", "delayed", "minutes"]
+    index = HistorySearchIndex()
+    
+    start_time = time.perf_counter()
+    for entry_id in range(entries):
+        index.add(entry_id, " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 40))))
+    build = time.perf_counter() - start_time
+    print(f"History search benchmark: indexed {entries} entries in {build:.2f}s "
+          f"({len(index.vocabulary)} distinct tokens)")
+    
+    start_time = time.perf_counter()
+    for entry_id in range(1000):
+        index.remove(entry_id)
+        index.add(entry_id, "train delayed by twenty minutes on platform nine")
+    print(f"  incremental delete+add: {(time.perf_counter() - start_time) * 1000 / 1000:.3f} ms per entry")
+    
+    for query in ("train", "train delayed", "platform nine", "pro1", "ann", "nova123 zen", "missingword"):
+        runs = 50
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            result = index.search(query)
+        elapsed = (time.perf_counter() - start_time) * 1000 / runs
+        print(f"  {query!r:>16}: {elapsed:7.3f} ms, {len(result)} matches")
+
+
+# Engine registry: name -> engine class
+ENGINE_REGISTRY = {}
+
+
+def register_engine(engine_class):
+    """Class decorator that makes an engine available to the app and the router"""
+    ENGINE_REGISTRY[engine_class.name] = engine_class
+    return engine_class
+
+
+class TTSEngine(ABC):
+    """Common synthesis interface with capability metadata"""
+    name = ""
+    label = ""
+    description = ""
+    voices = tuple(VOICE_TYPES)
+    tones = tuple(VOICE_TONES)
+    formats = ("wav",)
+    supports_streaming = False
+    requires_network = False
+    routable = True
+
+    def __init__(self, app):
+        self.app = app
+
+    @classmethod
+    def available(cls):
+        """Whether the engine can run on this machine"""
+        return True
+
+    def supports(self, voice_type, voice_tone):
+        return voice_type in self.voices and voice_tone in self.tones
+
+    def capabilities(self):
+        return {
+            "voices": list(self.voices),
+            "tones": list(self.tones),
+            "formats": list(self.formats),
+            "streaming": self.supports_streaming,
+            "network": self.requires_network
+        }
+
+    @abstractmethod
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        """Render text to output_file; return True on success, raise SynthesisCancelled if job is cancelled"""
+
+    def synthesize_stream(self, text, voice_type, voice_tone, job=None, volume=None, rate_setting=None):
+        """Yield (sample_rate, channels, pcm_bytes) blocks
+
+        Streaming engines yield audio as it is synthesized; this default renders the
+        whole clip first, so it adds no latency win but works for every engine.
+        volume and rate_setting are captured on the Tk thread by the caller; None
+        means the current render settings.
+        """
+        render_file = os.path.join(tempfile.gettempdir(), f"tts_stream_{time.time_ns()}.{self.formats[0]}")
+        try:
+            if not self.synthesize(text, voice_type, voice_tone, render_file, job):
+                return
+            sample_rate, channels = probe_clip_format(render_file)
+            for block in iter_clip_blocks(render_file):
+                if job:
+                    job.check()
+                yield sample_rate, channels, float_to_pcm(block.ravel(), 2)
+        finally:
+            self.app.remove_partial_file(render_file)
+
+    def synthesize_playing(self, text, voice_type, voice_tone, output_file, job=None, volume=None, rate_setting=None):
+        """Render to output_file while playing the audio as it arrives; streaming engines only"""
+        return self.app.play_pcm_stream(self.synthesize_stream(text, voice_type, voice_tone, job, volume, rate_setting),
+                                        output_file, play=True, job=job, volume=volume)
+
+
+@register_engine
+class OnlineEngine(TTSEngine):
+    name = "online"
+    label = "🌐 Online (gTTS)"
+    description = "High quality cloud-based voices"
+    formats = ("mp3",)
+    requires_network = True
+    supports_streaming = True
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        # gTTS has a single voice, voice type and tone are ignored
+        return self.app.generate_with_online_tts(text, output_file, job)
+
+    def synthesize_playing(self, text, voice_type, voice_tone, output_file, job=None, volume=None, rate_setting=None):
+        # Plays the decoded segments but keeps the MP3 bytes as the saved file
+        return self.app.generate_with_online_tts(text, output_file, job, play=True, volume=volume)
+
+    def synthesize_stream(self, text, voice_type, voice_tone, job=None, volume=None, rate_setting=None):
+        return self.app.stream_online_tts(text, job)
+
+
+@register_engine
+class OfflineEngine(TTSEngine):
+    name = "offline"
+    label = "💻 Offline (System)"
+    description = "Fast system voices with tone control"
+    supports_streaming = True
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        return self.app.generate_with_offline_tts(text, voice_type, output_file, voice_tone, job)
+
+    def synthesize_stream(self, text, voice_type, voice_tone, job=None, volume=None, rate_setting=None):
+        return self.app.stream_offline_tts(text, voice_type, voice_tone, job, volume, rate_setting)
+
+
+@register_engine
+class HedgedEngine(TTSEngine):
+    name = "hedged"
+    label = "🛡️ Hedged (Online + Offline)"
+    description = "Online first, offline backup when it is slow"
+    formats = ("mp3", "wav")
+    requires_network = True
+    routable = False
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        return self.app.generate_hedged(text, voice_type, output_file, voice_tone, job,
+                                        self.app.render_settings["rate"])
+
+
+class EngineRouter:
+    """Picks an engine per request from the duration model's estimates and failure rates"""
+    
+    def __init__(self, duration_model, explore_runs=3, explore_every=20):
+        self.duration_model = duration_model
+        self.explore_runs = explore_runs
+        self.explore_every = explore_every
+        self.choices = 0
+
+    def expected_cost(self, engine, text, voice_tone, rate_setting):
+        """Predicted seconds for a request, inflated by the engine's failure rate"""
+        attempts, runs, failure_rate = self.duration_model.reliability(engine)
+        if attempts < self.explore_runs:
+            return 0.0  # Not enough data yet: try it so its stats warm up
+        if not runs:
+            return float("inf")  # Never succeeded
+        predicted = self.duration_model.predict(engine, text, voice_tone, rate_setting)
+        return predicted / max(0.05, 1.0 - failure_rate)
+
+    def choose(self, engines, text, voice_type, voice_tone, rate_setting="normal"):
+        """Cheapest routable engine that supports the requested voice and tone"""
+        candidates = [engine for engine in engines.values()
+                      if engine.routable and engine.supports(voice_type, voice_tone)]
+        if not candidates:
+            return None
+        ranked = sorted(candidates, key=lambda engine: self.expected_cost(engine.name, text, voice_tone,
+                                                                          rate_setting))
+        
+        # Now and then send a request to the runner-up so its stats do not go stale
+        self.choices += 1
+        if len(ranked) > 1 and self.choices % self.explore_every == 0:
+            return ranked[1]
+        return ranked[0]
+
+
+# Streaming playback settings
+STREAM_BLOCK_MS = 120
+
+
+def read_wav_stream_header(read):
+    """Parse a RIFF/WAVE header from a byte stream; return (sample_rate, channels, sample_width)"""
+    def read_exact(count):
+        data = b""
+        while len(data) < count:
+            chunk = read(count - len(data))
+            if not chunk:
+                raise EOFError("Stream ended inside the WAV header")
+            data += chunk
+        return data
+    
+    riff = read_exact(12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("Stream is not a WAV stream")
+    fmt = None
+    while True:
+        chunk_id, chunk_size = struct.unpack("<4sI", read_exact(8))
+        if chunk_id == b"data":
+            # Streamed headers carry a placeholder size, the data runs to end of stream
+            break
+        body = read_exact(chunk_size + (chunk_size & 1))
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            fmt = (sample_rate, channels, bits // 8)
+    if fmt is None:
+        raise ValueError("WAV stream has no fmt chunk")
+    return fmt
+
+
+def convert_pcm_for_mixer(pcm, sample_rate, channels):
+    """Convert 16-bit PCM to the mixer's rate and channel count with NumPy"""
+    mixer_rate, _, mixer_channels = pygame.mixer.get_init()
+    samples = np.frombuffer(pcm, dtype='<i2').reshape(-1, channels)
+    if sample_rate != mixer_rate and len(samples):
+        if mixer_rate % sample_rate == 0:
+            samples = np.repeat(samples, mixer_rate // sample_rate, axis=0)
+        else:
+            positions = np.arange(int(len(samples) * mixer_rate / sample_rate)) * sample_rate / mixer_rate
+            samples = np.stack([np.interp(positions, np.arange(len(samples)), samples[:, c])
+                                for c in range(channels)], axis=1).astype('<i2')
+    if channels != mixer_channels:
+        samples = np.repeat(samples.mean(axis=1, keepdims=True).astype('<i2'), mixer_channels, axis=1)
+    return np.ascontiguousarray(samples, dtype='<i2')
+
+
+class StreamingPlayer:
+    """Plays 16-bit PCM blocks on a pygame channel as soon as they arrive"""
+    
+    def __init__(self, sample_rate, channels, volume=1.0, block_ms=STREAM_BLOCK_MS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.volume = volume
+        self.block_bytes = int(sample_rate * block_ms / 1000) * channels * 2
+        self.buffer = bytearray()
+        self.channel = pygame.mixer.find_channel(True)
+        self.stopped = False
+        self.first_audio_time = None
+
+    def feed(self, pcm):
+        """Buffer PCM and hand complete blocks to the mixer"""
+        view = memoryview(pcm).cast("B")
+        if not self.buffer:
+            # Whole blocks skip the staging buffer; the mixer conversion makes the only copy
+            while len(view) >= self.block_bytes and not self.stopped:
+                self._queue(view[:self.block_bytes])
+                view = view[self.block_bytes:]
+        self.buffer.extend(view)
+        view.release()
+        while len(self.buffer) >= self.block_bytes and not self.stopped:
+            block = bytes(self.buffer[:self.block_bytes])
+            del self.buffer[:self.block_bytes]
+            self._queue(block)
+
+    def flush(self):
+        """Queue any buffered tail"""
+        usable = len(self.buffer) - len(self.buffer) % (self.channels * 2)
+        if usable and not self.stopped:
+            self._queue(bytes(self.buffer[:usable]))
+        self.buffer.clear()
+
+    def _queue(self, block):
+        sound = pygame.mixer.Sound(buffer=convert_pcm_for_mixer(block, self.sample_rate, self.channels))
+        sound.set_volume(self.volume)
+        # A channel holds one playing and one queued sound; wait for a free slot
+        while self.channel.get_busy() and self.channel.get_queue() is not None and not self.stopped:
+            time.sleep(0.005)
+        if self.stopped:
+            return
+        if self.channel.get_busy():
+            self.channel.queue(sound)
+        else:
+            self.channel.play(sound)
+            if self.first_audio_time is None:
+                self.first_audio_time = time.perf_counter()
+
+    def wait(self):
+        while self.channel.get_busy() and not self.stopped:
+            time.sleep(0.05)
+
+    def stop(self):
+        self.stopped = True
+        self.channel.stop()
+
+
+def espeak_command(voice_type, voice_tone, volume, rate_setting):
+    """espeak-ng command line for a voice type and tone from the shared tone table"""
+    executable = shutil.which("espeak-ng") or shutil.which("espeak")
+    rate, amplitude = tone_voice_properties(voice_tone, volume, rate_setting)
+    variant = "m3" if voice_type == "male" else "f3"
+    return [executable, "--stdout", "--stdin", "-v", f"en-us+{variant}",
+            "-s", str(rate), "-a", str(int(amplitude * 100))]
+
+
+def stream_espeak_pcm(text, voice_type, voice_tone, volume=1.0, rate_setting="normal", block_size=4096, job=None):
+    """Run espeak-ng and yield (sample_rate, channels, pcm_bytes) as audio comes off stdout
+
+    A cancelled job raises SynthesisCancelled at the next block and kills espeak-ng.
+    """
+    process = subprocess.Popen(espeak_command(voice_type, voice_tone, volume, rate_setting),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    
+    def feed_text():
+        try:
+            process.stdin.write(text.encode("utf-8"))
+            process.stdin.close()
+        except OSError:
+            pass
+    Thread(target=feed_text, daemon=True).start()
+    
+    try:
+        read = lambda count: os.read(process.stdout.fileno(), count)
+        sample_rate, channels, sample_width = read_wav_stream_header(read)
+        if sample_width != 2:
+            raise ValueError(f"Unexpected espeak-ng sample width: {sample_width}")
+        while True:
+            pcm = read(block_size)
+            if not pcm:
+                break
+            if job:
+                job.check()
+            yield sample_rate, channels, pcm
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+
+# Shared-memory ring buffer settings
+RING_HEADER = struct.Struct("<QQIII")  # write position, read position, state, sample rate, channels
+RING_HEADER_SIZE = 64
+RING_CAPACITY = 256 * 1024
+RING_OPEN, RING_CLOSED, RING_FAILED, RING_CANCELLED = 0, 1, 2, 3
+
+
+class SharedPCMRingBuffer:
+    """Single-producer/single-consumer PCM ring in shared memory
+
+    A pyttsx3 worker process writes PCM frames into the segment as the driver
+    synthesizes them and the playback side reads memoryviews of it. The mixer
+    still copies each block when it builds a Sound from it. Positions are monotonic byte counters kept in the header; the producer
+    blocks while the ring is full.
+    """
+    
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+
+    @classmethod
+    def create(cls, capacity=RING_CAPACITY):
+        shm = shared_memory.SharedMemory(create=True, size=RING_HEADER_SIZE + capacity)
+        RING_HEADER.pack_into(shm.buf, 0, 0, 0, RING_OPEN, 0, 0)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, capacity):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13; pool workers share the app's resource tracker, so the
+            # segment is still only unlinked by its owner
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, capacity, owner=False)
+
+    def __reduce__(self):
+        # Worker processes get the segment name and attach to it
+        return (SharedPCMRingBuffer.attach, (self.shm.name, self.capacity))
+
+    def _header(self):
+        return RING_HEADER.unpack_from(self.shm.buf, 0)
+
+    def _set(self, index, value):
+        offsets = (0, 8, 16, 20, 24)
+        fmt = "<Q" if index < 2 else "<I"
+        struct.pack_into(fmt, self.shm.buf, offsets[index], value)
+
+    @property
+    def state(self):
+        return self._header()[2]
+
+    def set_format(self, sample_rate, channels):
+        self._set(4, channels)
+        self._set(3, sample_rate)
+
+    def write(self, data):
+        """Copy PCM into the ring, blocking while it is full (producer side)"""
+        view = memoryview(data).cast("B")
+        write_pos = self._header()[0]
+        while len(view):
+            _, read_pos, state, _, _ = self._header()
+            if state == RING_CANCELLED:
+                raise InterruptedError("Ring buffer reader went away")
+            free = self.capacity - (write_pos - read_pos)
+            if free == 0:
+                time.sleep(0.001)
+                continue
+            offset = write_pos % self.capacity
+            count = min(free, len(view), self.capacity - offset)
+            start = RING_HEADER_SIZE + offset
+            self.shm.buf[start:start + count] = view[:count]
+            write_pos += count
+            self._set(0, write_pos)
+            view = view[count:]
+
+    def close(self, state=RING_CLOSED):
+        """Mark the end of the stream (producer) or cancel it (consumer)"""
+        if self.state == RING_OPEN:
+            self._set(2, state)
+
+    def read_view(self, max_bytes, align=1, alive=None, job=None):
+        """Zero-copy view of the next readable whole frames, or None at end of stream
+
+        Waits as long as the producer is alive (alive() is true); a render can take a
+        while before its first frames, so there is no fixed timeout. Raises
+        SynthesisCancelled while waiting if job is cancelled.
+        """
+        while True:
+            if job:
+                job.check()
+            write_pos, read_pos, state, _, _ = self._header()
+            available = write_pos - read_pos
+            offset = read_pos % self.capacity
+            count = min(available, max_bytes, self.capacity - offset)
+            count -= count % align
+            if count:
+                start = RING_HEADER_SIZE + offset
+                return self.shm.buf[start:start + count]
+            if available and offset + available > self.capacity and self.capacity - offset < align:
+                raise ValueError("Ring capacity must be a multiple of the frame size")
+            if state != RING_OPEN and available < align:
+                if state == RING_FAILED:
+                    raise RuntimeError("Synthesis worker failed")
+                return None
+            if alive is not None and not alive() and self._header()[0] == write_pos:
+                raise RuntimeError("Synthesis worker exited without closing the stream")
+            time.sleep(0.001)
+
+    def consume(self, count):
+        self._set(1, self._header()[1] + count)
+
+    def iter_blocks(self, block_bytes=8192, alive=None, job=None):
+        """Yield (sample_rate, channels, memoryview) blocks until the producer closes or job is cancelled"""
+        try:
+            while True:
+                if job:
+                    job.check()
+                _, _, state, sample_rate, channels = self._header()
+                if sample_rate or state != RING_OPEN:
+                    break
+                if alive is not None and not alive() and not self._header()[3]:
+                    raise RuntimeError("Synthesis worker exited before producing audio")
+                time.sleep(0.001)
+            frame_bytes = 2 * max(channels, 1)
+            while True:
+                view = self.read_view(max(frame_bytes, block_bytes - block_bytes % frame_bytes),
+                                      frame_bytes, alive, job)
+                if view is None:
+                    return
+                try:
+                    yield sample_rate, channels, view
+                finally:
+                    count = len(view)
+                    view.release()
+                    self.consume(count)
+        finally:
+            self.close(RING_CANCELLED)
+
+    def release(self):
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _warm_worker():
+    """No-op job that makes the pool start its worker processes ahead of time"""
+    return os.getpid()
+
+
+def _pyttsx3_engine(voice_type, voice_tone, volume, rate_setting):
+    """A pyttsx3 engine set up for a voice type and tone, or None if no voice matches"""
+    engine = pyttsx3.init()
+    voice_id = find_voice_id(engine.getProperty('voices'), voice_type, voice_tone)
+    if not voice_id:
+        return None
+    rate, tone_volume = tone_voice_properties(voice_tone, volume, rate_setting)
+    engine.setProperty('voice', voice_id)
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', tone_volume)
+    return engine
+
+
+def _pyttsx3_render_worker(text, voice_type, voice_tone, volume, rate_setting, output_file, engine=None):
+    """Worker-process side: render one clip with pyttsx3 so a cancel can kill the process"""
+    engine = engine or _pyttsx3_engine(voice_type, voice_tone, volume, rate_setting)
+    if engine is None:
+        return False
+    engine.save_to_file(text, output_file)
+    engine.runAndWait()
+
+    # Some drivers finish writing the file shortly after runAndWait returns
+    deadline = time.time() + 1.0
+    while time.time() < deadline and not (os.path.exists(output_file) and os.path.getsize(output_file) > 1000):
+        time.sleep(0.05)
+    return os.path.exists(output_file) and os.path.getsize(output_file) > 1000
+
+
+def _tap_espeak_synth(engine, ring):
+    """Copy each PCM buffer pyttsx3's espeak driver synthesizes into the ring; False for other drivers
+
+    The espeak driver only writes its file once the utterance is finished, so the
+    audio is taken from the synth callback instead, chained in front of the driver's own.
+    """
+    driver = getattr(getattr(engine, "proxy", None), "_driver", None)
+    if not hasattr(driver, "_onSynth"):
+        return False
+    try:
+        import ctypes
+        from pyttsx3.drivers import _espeak
+    except (ImportError, OSError, RuntimeError):
+        return False
+    
+    def on_synth(wav, numsamples, events):
+        if numsamples > 0 and driver._speaking:
+            try:
+                ring.write(ctypes.string_at(wav, numsamples * ctypes.sizeof(ctypes.c_short)))
+            except InterruptedError:
+                return 1  # The reader went away: a non-zero return aborts synthesis
+        return driver._onSynth(wav, numsamples, events)
+    
+    _espeak.SetSynthCallback(on_synth)
+    # The driver writes 22.05 kHz mono 16-bit, the rate espeak synthesizes at
+    ring.set_format(22050, 1)
+    return True
+
+
+def _pyttsx3_ring_worker(ring, text, voice_type, voice_tone, volume, rate_setting, render_file, block_size=8192):
+    """Worker-process side: render with pyttsx3 and stream the PCM into the shared ring as it is synthesized
+
+    With the espeak driver the PCM comes from its synth callback. Other drivers
+    (SAPI5, NSSS) write the file progressively, so it is tailed into the ring instead.
+    """
+    try:
+        engine = _pyttsx3_engine(voice_type, voice_tone, volume, rate_setting)
+        if engine is None:
+            raise RuntimeError(f"no {voice_type} voice available")
+        if _tap_espeak_synth(engine, ring):
+            engine.save_to_file(text, render_file)
+            engine.runAndWait()
+            ring.close()
+        else:
+            _tail_render_into_ring(ring, engine, text, voice_type, voice_tone, volume, rate_setting, render_file,
+                                   block_size)
+    except InterruptedError:
+        pass
+    except Exception as e:
+        print(f"Synthesis worker error: {e}")
+        ring.close(RING_FAILED)
+    finally:
+        ring.release()
+        try:
+            os.remove(render_file)
+        except OSError:
+            pass
+
+
+def _tail_render_into_ring(ring, engine, text, voice_type, voice_tone, volume, rate_setting, render_file,
+                           block_size=8192):
+    """Render to render_file on a thread and copy the file into the ring as the driver writes it"""
+    done = Event()
+    outcome = []
+    
+    def render():
+        try:
+            outcome.append(_pyttsx3_render_worker(text, voice_type, voice_tone, volume, rate_setting, render_file,
+                                                  engine))
+        except Exception as e:
+            outcome.append(e)
+        finally:
+            done.set()
+    
+    Thread(target=render, daemon=True).start()
+    while not os.path.exists(render_file) and not done.is_set():
+        time.sleep(0.01)
+    with open(render_file, 'rb') as f:
+        def read(count, partial=False):
+            # Poll the file while the driver is still writing it
+            data = bytearray()
+            while len(data) < count:
+                finished = done.is_set()
+                chunk = f.read(count - len(data))
+                if chunk:
+                    data.extend(chunk)
+                    if partial:
+                        break
+                elif finished:
+                    break
+                else:
+                    time.sleep(0.01)
+            return bytes(data)
+        
+        sample_rate, channels, sample_width = read_wav_stream_header(read)
+        ring.set_format(sample_rate, channels)
+        pending = b""
+        while True:
+            pending += read(block_size, partial=True)
+            usable = len(pending) - len(pending) % (sample_width * channels)
+            if not usable:
+                if done.is_set() and not read(1, partial=True):
+                    break
+                continue
+            pcm, pending = pending[:usable], pending[usable:]
+            ring.write(pcm if sample_width == 2 else float_to_pcm(pcm_to_float(pcm, sample_width), 2))
+    if outcome and outcome[0] is not True:
+        raise RuntimeError(f"pyttsx3 render failed: {outcome[0]}")
+    ring.close()
+
+
+def _tracked_worker_init(pid_queue, initializer):
+    """Worker-process initializer: report the PID so the owner can kill it mid-job"""
+    pid_queue.put(os.getpid())
+    if initializer:
+        initializer()
+
+
+class KillableProcessPool:
+    """Lazily started spawn pool whose workers can be killed mid-job
+
+    Worker PIDs are reported by the workers themselves rather than read from the
+    executor's internals. Killing a worker breaks a ProcessPoolExecutor, so each
+    kind of killable work gets its own pool. Jobs sharing a pool go down together;
+    generation counts the kills so their owners can tell a kill meant for another
+    job from their own worker dying, and closed marks a pool that won't restart.
+    """
+    
+    def __init__(self, name, max_workers, initializer=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.lock = Lock()
+        self.pool = None
+        self.pid_queue = None
+        self.pids = set()
+        self.generation = 0
+        self.closed = False
+
+    def get(self):
+        """The running pool, started on first use; None where processes are unavailable"""
+        with self.lock:
+            if self.pool is None:
+                self.closed = False
+                try:
+                    context = multiprocessing.get_context("spawn")
+                    self.pid_queue = context.SimpleQueue()
+                    self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                    initializer=_tracked_worker_init,
+                                                    initargs=(self.pid_queue, self.initializer))
+                    # Start the workers without waiting: early jobs simply queue behind start-up
+                    self.pool.submit(_warm_worker)
+                except Exception as e:
+                    print(f"{self.name} worker pool unavailable, running in-process: {e}")
+                    self.pool = False
+            return self.pool or None
+
+    def kill(self, restart=True):
+        """Kill every worker mid-job, drop queued work and optionally start a fresh pool"""
+        with self.lock:
+            pool, pid_queue = self.pool, self.pid_queue
+            if not pool:
+                return
+            self.pool = None
+            self.generation += 1
+            self.closed = not restart
+            while not pid_queue.empty():
+                self.pids.add(pid_queue.get())
+            pids, self.pids = self.pids, set()
+        for pid in pids:
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass  # Already gone
+        pool.shutdown(wait=False, cancel_futures=True)
+        print(f"{self.name} workers killed" + (", restarting pool" if restart else ""))
+        if restart:
+            self.get()
+
+    def shutdown(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+            self.closed = True
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Adaptive concurrency settings
+GOVERNOR_INTERVAL = 1.0
+# CPU busy fraction above which batch work backs off, and the tighter target while audio plays
+GOVERNOR_TARGET_CPU = 0.85
+GOVERNOR_INTERACTIVE_CPU = 0.6
+# Fraction of RAM that must stay available
+GOVERNOR_MIN_MEMORY = 0.10
+# Back off when render time per predicted second exceeds this multiple of the best seen
+GOVERNOR_LATENCY_TOLERANCE = 2.0
+GOVERNOR_DECREASE = 0.5
+BATCH_NICENESS = 10
+
+
+def _batch_worker_init():
+    """Worker-process initializer: batch renders run below the priority of playback"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(BATCH_NICENESS)
+        except OSError:
+            pass
+        return
+    # Windows has no nice(); psutil maps to SetPriorityClass there
+    try:
+        import psutil
+    except ImportError:
+        return
+    try:
+        psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+    except (AttributeError, psutil.Error):
+        pass
+
+
+def read_cpu_times():
+    """(busy, total) CPU time since boot, from /proc/stat, psutil or GetSystemTimes; None where unavailable
+
+    Only differences between two readings are used, so the units don't matter.
+    """
+    try:
+        with open('/proc/stat') as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + values[4]
+        return sum(values) - idle, sum(values)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        times = psutil.cpu_times()
+        total = sum(times)
+        return total - times.idle - getattr(times, "iowait", 0.0), total
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        idle, kernel, user = ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong()
+        if ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+            # Kernel time includes the idle time
+            total = kernel.value + user.value
+            return total - idle.value, total
+    return None
+
+
+def memory_available_fraction():
+    """Share of physical memory still available, or None where unavailable"""
+    try:
+        with open('/proc/meminfo') as f:
+            info = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        return info["MemAvailable"] / info["MemTotal"]
+    except (OSError, ValueError, KeyError, IndexError):
+        try:
+            import psutil
+            memory = psutil.virtual_memory()
+            return memory.available / memory.total
+        except ImportError:
+            return None
+
+
+class ConcurrencyGovernor:
+    """AIMD limit on concurrent batch renders, driven by CPU load, memory headroom and render latency
+
+    Once per interval the limit grows by one while work is waiting and the machine has
+    room, and is halved when CPU, memory or latency say it is overloaded. While
+    interactive() reports playback, the CPU target drops so the mixer never starves.
+    """
+    
+    def __init__(self, min_limit=1, max_limit=None, interactive=None, interval=GOVERNOR_INTERVAL,
+                 cpu_sampler=read_cpu_times, memory_sampler=memory_available_fraction):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit or os.cpu_count() or 1)
+        self.interactive = interactive or (lambda: False)
+        self.interval = interval
+        self.cpu_sampler = cpu_sampler
+        self.memory_sampler = memory_sampler
+        self.limit = float(max(min_limit, self.max_limit // 2))
+        self.in_flight = 0
+        self.waiting = 0
+        self.condition = Condition()
+        self.latency_ratios = deque(maxlen=50)
+        self.cpu_sample = cpu_sampler()
+        self.last_adjust = time.monotonic()
+        self.decreases = {}
+        self.last_reading = {}
+
+    def try_acquire(self):
+        """Take a slot if the current limit allows it"""
+        with self.condition:
+            self._maybe_adjust()
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self, job=None, timeout=None):
+        """Block until a slot is free; return False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    self._maybe_adjust()
+                    if job:
+                        job.check()
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.condition.wait(min(self.interval, remaining if remaining is not None else self.interval))
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, seconds=None, estimate=None):
+        """Free a slot, reporting how long the render took against its predicted duration"""
+        with self.condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            if seconds is not None and estimate:
+                self.latency_ratios.append(seconds / estimate)
+            self._maybe_adjust()
+            self.condition.notify_all()
+
+    def _maybe_adjust(self):
+        if time.monotonic() - self.last_adjust >= self.interval:
+            self.adjust()
+
+    def _latency_inflated(self):
+        if len(self.latency_ratios) < 5:
+            return False
+        recent = sorted(list(self.latency_ratios)[-5:])[2]
+        return recent > min(self.latency_ratios) * GOVERNOR_LATENCY_TOLERANCE
+
+    def adjust(self):
+        """One AIMD step (condition held); return why the limit was cut, or None"""
+        self.last_adjust = time.monotonic()
+        sample = self.cpu_sampler()
+        cpu = None
+        if sample and self.cpu_sample and sample[1] > self.cpu_sample[1]:
+            cpu = (sample[0] - self.cpu_sample[0]) / (sample[1] - self.cpu_sample[1])
+        self.cpu_sample = sample
+        memory = self.memory_sampler()
+        interactive = self.interactive()
+        target = GOVERNOR_INTERACTIVE_CPU if interactive else GOVERNOR_TARGET_CPU
+        
+        reason = None
+        if memory is not None and memory < GOVERNOR_MIN_MEMORY:
+            reason = "memory"
+        elif cpu is not None and cpu > target:
+            reason = "playback" if interactive else "cpu"
+        elif self._latency_inflated():
+            reason = "latency"
+            # Start a fresh baseline, the old one came from a different load
+            self.latency_ratios.clear()
+        
+        if reason:
+            self.limit = max(self.min_limit, self.limit * GOVERNOR_DECREASE)
+            self.decreases[reason] = self.decreases.get(reason, 0) + 1
+        elif self.waiting or self.in_flight >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + 1)
+        self.last_reading = {"cpu": cpu, "memory": memory, "interactive": interactive}
+        self.condition.notify_all()
+        return reason
+
+    def stats(self):
+        with self.condition:
+            return dict(self.last_reading, limit=int(self.limit), in_flight=self.in_flight,
+                        decreases=dict(self.decreases))
+
+
+def _cpu_burn(seconds):
+    """Worker-process side: use this much CPU time, standing in for a CPU-bound render"""
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+    return seconds
+
+
+def benchmark_governor(jobs=40, job_seconds=0.5):
+    """Batch CPU work with a fixed worker count versus the governor, with playback in the middle"""
+    cores = os.cpu_count() or 1
+    
+    def playback_jitter(stop, lags):
+        # Stand-in for the mixer refilling its buffer every 10 ms
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            time.sleep(0.01)
+            lags.append(time.perf_counter() - start_time - 0.01)
+    
+    print(f"Governor benchmark: {jobs} CPU-bound jobs of {job_seconds * 1000:.0f} ms on {cores} cores, "
+          f"playback during the middle third")
+    for label in ("fixed", "governed"):
+        max_workers = cores * 2
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_batch_worker_init if label == "governed" else None)
+        pool.submit(_warm_worker).result()
+        playing = Event()
+        governor = ConcurrencyGovernor(max_limit=max_workers, interactive=playing.is_set, interval=0.25)
+        limits = []
+        lags = []
+        stop = Event()
+        start_time = time.perf_counter()
+        futures = {}
+        submitted = 0
+        try:
+            while submitted < jobs or futures:
+                progress = submitted / jobs
+                if 1 / 3 <= progress < 2 / 3 and not playing.is_set():
+                    playing.set()
+                    Thread(target=playback_jitter, args=(stop, lags), daemon=True).start()
+                elif progress >= 2 / 3 and playing.is_set():
+                    playing.clear()
+                    stop.set()
+                while submitted < jobs and (governor.try_acquire() if label == "governed"
+                                            else len(futures) < max_workers):
+                    futures[pool.submit(_cpu_burn, job_seconds)] = time.perf_counter()
+                    submitted += 1
+                finished, _ = future_wait(list(futures), timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    seconds = time.perf_counter() - futures.pop(future)
+                    if label == "governed":
+                        governor.release(seconds, job_seconds)
+                limits.append(len(futures))
+        finally:
+            stop.set()
+            pool.shutdown()
+        elapsed = time.perf_counter() - start_time
+        lags.sort()
+        jitter = (f"p50 {lags[len(lags) // 2] * 1000:.1f} ms, p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} ms"
+                  if lags else "n/a")
+        print(f"  {label:>8}: {elapsed:5.1f}s ({jobs / elapsed * 60:5.1f} jobs/min), in flight mean "
+              f"{sum(limits) / len(limits):.1f} max {max(limits)}, playback timer lag {jitter}")
+        if label == "governed":
+            print(f"            decreases: {governor.stats()['decreases']}")
+
+
+# Voice comparison matrix settings
+COMPARISON_RATES = ["slow", "normal", "fast"]
+COMPARISON_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+def comparison_combinations():
+    """Every (voice type, tone, speed); tones without a preferred system voice use the fallback voice"""
+    return [(voice_type, voice_tone, rate_setting)
+            for voice_type in VOICE_TYPES
+            for voice_tone in TONE_SETTINGS
+            for rate_setting in COMPARISON_RATES]
+
+
+def _render_comparison_clip(text, voice_type, voice_tone, rate_setting, volume, output_file):
+    """Worker-process side: render one comparison cell; return (render seconds, file size)"""
+    start_time = time.perf_counter()
+    if not _pyttsx3_render_worker(text, voice_type, voice_tone, volume, rate_setting, output_file):
+        raise RuntimeError("no audio produced")
+    return time.perf_counter() - start_time, os.path.getsize(output_file)
+
+
+@register_engine
+class EspeakEngine(TTSEngine):
+    name = "espeak"
+    label = "⚡ eSpeak NG (Streaming)"
+    description = "Direct espeak-ng, playback starts on the first audio"
+    supports_streaming = True
+
+    @classmethod
+    def available(cls):
+        return bool(shutil.which("espeak-ng") or shutil.which("espeak"))
+
+    def synthesize_stream(self, text, voice_type, voice_tone, job=None, volume=None, rate_setting=None):
+        # espeak-ng already streams over a pipe and closing the generator kills it
+        settings = self.app.render_settings
+        return stream_espeak_pcm(text, voice_type, voice_tone,
+                                 settings["volume"] if volume is None else volume,
+                                 rate_setting or settings["rate"], job=job)
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        return self.app.play_pcm_stream(self.synthesize_stream(text, voice_type, voice_tone, job),
+                                        output_file, play=False, job=job)
+
+
+def benchmark_espeak_first_audio(runs=3):
+    """Compare time-to-first-audio of direct espeak-ng streaming with the pyttsx3 file path"""
+    if not EspeakEngine.available():
+        print("espeak-ng benchmark skipped: espeak-ng is not installed")
+        return
+    text = " ".join([TEST_TEXTS["standard"]] * 6)
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        print(f"Time-to-first-audio benchmark ({len(text)} characters, {runs} runs)")
+        streamed = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            for _ in stream_espeak_pcm(text, "male", "standard"):
+                streamed.append(time.perf_counter() - start_time)
+                break
+        print(f"  espeak-ng stream: first PCM after {min(streamed) * 1000:7.1f} ms "
+              f"(mean {sum(streamed) / len(streamed) * 1000:.1f} ms)")
+        
+        engine = pyttsx3.init()
+        rate, volume = tone_voice_properties("standard", 1.0)
+        engine.setProperty('rate', rate)
+        engine.setProperty('volume', volume)
+        file_based = []
+        for run in range(runs):
+            output_file = os.path.join(work_dir, f"pyttsx3_{run}.wav")
+            start_time = time.perf_counter()
+            engine.save_to_file(text, output_file)
+            engine.runAndWait()
+            time.sleep(1.0)  # Same settle delay as generate_with_offline_tts
+            file_based.append(time.perf_counter() - start_time)
+        print(f"  pyttsx3 save_to_file: audio ready after {min(file_based) * 1000:7.1f} ms "
+              f"(mean {sum(file_based) / len(file_based) * 1000:.1f} ms)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Post-processing settings
+POSTPROCESS_BLOCK_FRAMES = 65536
+POSTPROCESS_PADDING_MS = 60
+
+
+def pcm_to_float(raw, sample_width):
+    """Convert raw little-endian PCM bytes to float32 samples in [-1, 1]"""
+    if sample_width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    if sample_width == 4:
+        return np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+
+def float_to_pcm(samples, sample_width):
+    """Convert float samples in [-1, 1] back to raw little-endian PCM bytes"""
+    samples = np.clip(samples, -1.0, 1.0)
+    if sample_width == 1:
+        return (samples * 127.0 + 128.0).astype(np.uint8).tobytes()
+    if sample_width == 2:
+        return (samples * 32767.0).astype('<i2').tobytes()
+    if sample_width == 4:
+        return (samples.astype(np.float64) * 2147483647.0).astype('<i4').tobytes()
+    raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+
+def analyze_wav_levels(path, silence_dbfs=-45.0, block_frames=POSTPROCESS_BLOCK_FRAMES):
+    """Scan a WAV in blocks for the first/last audible frame, per-block energy and peak"""
+    threshold = 10 ** (silence_dbfs / 20.0)
+    first_frame = None
+    last_frame = None
+    block_sums = []
+    peak = 0.0
+    with wave.open(path, 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        position = 0
+        while True:
+            raw = wav.readframes(block_frames)
+            if not raw:
+                break
+            frames = pcm_to_float(raw, sample_width).reshape(-1, channels)
+            frame_peaks = np.abs(frames).max(axis=1)
+            audible = np.flatnonzero(frame_peaks > threshold)
+            if audible.size:
+                if first_frame is None:
+                    first_frame = position + int(audible[0])
+                last_frame = position + int(audible[-1]) + 1
+                peak = max(peak, float(frame_peaks[audible].max()))
+            block_sums.append(float(np.dot(frames.ravel(), frames.ravel())))
+            position += len(frames)
+        params = wav.getparams()
+    return {
+        "params": params,
+        "total_frames": position,
+        "first_frame": first_frame,
+        "last_frame": last_frame,
+        "block_sums": block_sums,
+        "block_frames": block_frames,
+        "peak": peak
+    }
+
+
+def region_sum_squares(path, levels, start, end):
+    """Energy of frames [start, end): whole blocks from the scan, the two partial edge blocks re-read"""
+    block_frames = levels["block_frames"]
+    sample_width = levels["params"].sampwidth
+    first_block, last_block = start // block_frames, (end - 1) // block_frames
+    total = 0.0
+    with wave.open(path, 'rb') as wav:
+        for block in range(first_block, last_block + 1):
+            block_start = block * block_frames
+            lo, hi = max(start, block_start), min(end, block_start + block_frames)
+            if lo == block_start and hi == block_start + block_frames:
+                total += levels["block_sums"][block]
+                continue
+            wav.setpos(lo)
+            samples = pcm_to_float(wav.readframes(hi - lo), sample_width)
+            total += float(np.dot(samples, samples))
+    return total
+
+
+def postprocess_wav(input_path, output_path=None, target_dbfs=-20.0, silence_dbfs=-45.0,
+                    padding_ms=POSTPROCESS_PADDING_MS, block_frames=POSTPROCESS_BLOCK_FRAMES):
+    """Trim leading/trailing silence and normalize RMS loudness of a WAV in streaming blocks"""
+    output_path = output_path or input_path
+    levels = analyze_wav_levels(input_path, silence_dbfs, block_frames)
+    params = levels["params"]
+    if levels["first_frame"] is None:
+        return {"trimmed_frames": 0, "gain_db": 0.0, "frames": levels["total_frames"], "silent": True}
+    
+    # Keep a little padding around the audible region so word onsets are not clipped
+    padding = int(params.framerate * padding_ms / 1000)
+    start = max(0, levels["first_frame"] - padding)
+    end = min(levels["total_frames"], levels["last_frame"] + padding)
+    
+    rms = np.sqrt(region_sum_squares(input_path, levels, start, end) / max(1, (end - start) * params.nchannels))
+    gain = 10 ** (target_dbfs / 20.0) / max(rms, 1e-9)
+    if levels["peak"] > 0:
+        gain = min(gain, 0.99 / levels["peak"])
+    
+    temp_path = output_path + ".tmp"
+    with wave.open(input_path, 'rb') as source, wave.open(temp_path, 'wb') as target:
+        target.setnchannels(params.nchannels)
+        target.setsampwidth(params.sampwidth)
+        target.setframerate(params.framerate)
+        source.setpos(start)
+        remaining = end - start
+        while remaining > 0:
+            raw = source.readframes(min(block_frames, remaining))
+            if not raw:
+                break
+            samples = pcm_to_float(raw, params.sampwidth)
+            target.writeframes(float_to_pcm(samples * gain, params.sampwidth))
+            remaining -= len(samples) // params.nchannels
+    os.replace(temp_path, output_path)
+    
+    return {
+        "trimmed_frames": levels["total_frames"] - (end - start),
+        "gain_db": float(20 * np.log10(gain)),
+        "frames": end - start,
+        "silent": False
+    }
+
+
+def benchmark_postprocessing(seconds=600, sample_rate=22050):
+    """Benchmark silence trimming and loudness normalization throughput"""
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    source_path = os.path.join(work_dir, "source.wav")
+    try:
+        # Synthetic speech-like signal: bursts of tone with silent gaps and padding
+        rng = np.random.default_rng(0)
+        with wave.open(source_path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(b"\0\0" * sample_rate * 2)
+            for second in range(seconds):
+                t = np.arange(sample_rate) / sample_rate
+                burst = 0.2 * np.sin(2 * np.pi * (120 + second % 80) * t) * (t < 0.7)
+                burst += 0.01 * rng.standard_normal(sample_rate)
+                wav.writeframes(float_to_pcm(burst, 2))
+            wav.writeframes(b"\0\0" * sample_rate * 2)
+        size_mb = os.path.getsize(source_path) / 1e6
+        
+        print(f"Post-processing benchmark: {seconds}s of 16-bit mono audio ({size_mb:.1f} MB)")
+        for block_frames in (4096, 16384, POSTPROCESS_BLOCK_FRAMES, 262144):
+            output_path = os.path.join(work_dir, f"out_{block_frames}.wav")
+            start_time = time.perf_counter()
+            stats = postprocess_wav(source_path, output_path, block_frames=block_frames)
+            elapsed = time.perf_counter() - start_time
+            print(f"  block {block_frames:>7} frames: {elapsed * 1000:8.1f} ms, "
+                  f"{size_mb / elapsed:7.1f} MB/s, {seconds / elapsed:8.0f}x realtime, "
+                  f"trimmed {stats['trimmed_frames'] / sample_rate:.2f}s, gain {stats['gain_db']:+.1f} dB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Speculative synthesis settings
+SPECULATIVE_DEBOUNCE_MS = 700
+SPECULATIVE_MAX_CLIPS = 200
+SENTENCE_PATTERN = re.compile(r'[^.!?]+(?:[.!?]+["\')\]]*|$)')
+
+
+def split_sentences(text):
+    """Split text into (sentence, complete) pairs; only the tail can be incomplete"""
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0).strip()
+        if sentence:
+            sentences.append((sentence, sentence.rstrip('"\')]')[-1:] in ".!?"))
+    return sentences
+
+
+def concatenate_wavs(parts, output_file, block_frames=POSTPROCESS_BLOCK_FRAMES):
+    """Join WAV files with identical formats into one file, block by block"""
+    params = None
+    with wave.open(output_file, 'wb') as target:
+        for part in parts:
+            with wave.open(part, 'rb') as source:
+                part_params = (source.getnchannels(), source.getsampwidth(), source.getframerate())
+                if params is None:
+                    params = part_params
+                    target.setnchannels(params[0])
+                    target.setsampwidth(params[1])
+                    target.setframerate(params[2])
+                elif part_params != params:
+                    raise ValueError(f"Cannot join {part}: format {part_params} differs from {params}")
+                while True:
+                    raw = source.readframes(block_frames)
+                    if not raw:
+                        break
+                    target.writeframes(raw)
+
+
+def _proc_cpu_seconds(pid):
+    # utime + stime of the process and of its reaped children, from /proc/<pid>/stat
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return sum(int(v) for v in fields[11:15]) / os.sysconf('SC_CLK_TCK')
+
+
+def _proc_children(pid):
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            children += [int(child) for child in f.read().split()]
+    return children
+
+
+def process_tree_cpu_seconds():
+    """CPU seconds used by this process and everything under it: worker processes, espeak-ng, finished children"""
+    try:
+        total = 0.0
+        pending = [os.getpid()]
+        while pending:
+            pid = pending.pop()
+            try:
+                total += _proc_cpu_seconds(pid)
+                pending += _proc_children(pid)
+            except (OSError, ValueError):
+                if pid == os.getpid():
+                    raise
+        return total
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+            process = psutil.Process()
+            total = sum(process.cpu_times()[:4])
+            for child in process.children(recursive=True):
+                try:
+                    total += sum(child.cpu_times()[:2])
+                except psutil.Error:
+                    pass
+            return total
+        except ImportError:
+            times = os.times()
+            return times.user + times.system + times.children_user + times.children_system
+
+
+class SpeculativeCache:
+    """Sentence clips rendered while the user types, with hit-rate and waste accounting"""
+    
+    def __init__(self, cache_dir, max_clips=SPECULATIVE_MAX_CLIPS):
+        self.cache_dir = cache_dir
+        self.max_clips = max_clips
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rendered_cpu = 0.0
+        self.wasted_cpu = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, signature, voice_type, voice_tone, sentence):
+        raw = json.dumps([signature, voice_type, voice_tone, sentence])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"sentence_{key}.wav")
+
+    def contains(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def lookup(self, key):
+        """Clip path for a sentence needed right now; counts toward the hit rate"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and os.path.exists(entry["path"]):
+                entry["used"] = True
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry["path"]
+            self.misses += 1
+            return None
+
+    def put(self, key, rendered_file, cpu_seconds, used=False):
+        with self.lock:
+            path = self.path_for(key)
+            os.replace(rendered_file, path)
+            self.entries[key] = {"path": path, "cpu": cpu_seconds, "used": used}
+            self.entries.move_to_end(key)
+            self.rendered_cpu += cpu_seconds
+            while len(self.entries) > self.max_clips:
+                _, evicted = self.entries.popitem(last=False)
+                self._discard(evicted)
+            return path
+
+    def invalidate(self):
+        """Drop every clip, e.g. after engine, rate or volume changes"""
+        with self.lock:
+            for entry in self.entries.values():
+                self._discard(entry)
+            self.entries.clear()
+
+    def _discard(self, entry):
+        if not entry["used"]:
+            self.wasted_cpu += entry["cpu"]
+        try:
+            os.remove(entry["path"])
+        except OSError:
+            pass
+
+    def report(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            pending = sum(e["cpu"] for e in self.entries.values() if not e["used"])
+            return {
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rendered_cpu": self.rendered_cpu,
+                "wasted_cpu": self.wasted_cpu,
+                "unused_cpu": pending
+            }
+
+
+# Compilation export settings
+EXPORT_BLOCK_FRAMES = 16384
+EXPORT_GAP_MS = 500
+EXPORT_SAMPLE_RATES = [0, 16000, 22050, 24000, 44100, 48000]
+
+
+def probe_clip_format(path):
+    """Sample rate and channel count of a clip (WAV header, or the mixer format for MP3)"""
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getframerate(), wav.getnchannels()
+    except (wave.Error, EOFError):
+        mixer_format = pygame.mixer.get_init()
+        if not mixer_format:
+            raise ValueError(f"Cannot decode {os.path.basename(path)} without the audio mixer")
+        return mixer_format[0], mixer_format[2]
+
+
+def iter_clip_blocks(path, block_frames=EXPORT_BLOCK_FRAMES):
+    """Yield float32 (frames, channels) blocks from a WAV, or a decoded MP3 clip"""
+    try:
+        wav = wave.open(path, 'rb')
+    except (wave.Error, EOFError):
+        wav = None
+    if wav is not None:
+        with wav:
+            channels, sample_width = wav.getnchannels(), wav.getsampwidth()
+            while True:
+                raw = wav.readframes(block_frames)
+                if not raw:
+                    return
+                yield pcm_to_float(raw, sample_width).reshape(-1, channels)
+    
+    # gTTS clips are MP3; the mixer decodes one clip at a time in its own format
+    mixer_format = pygame.mixer.get_init()
+    if not mixer_format:
+        raise ValueError(f"Cannot decode {os.path.basename(path)} without the audio mixer")
+    _, size, channels = mixer_format
+    samples = pcm_to_float(pygame.mixer.Sound(path).get_raw(), abs(size) // 8).reshape(-1, channels)
+    for start in range(0, len(samples), block_frames):
+        yield samples[start:start + block_frames]
+
+
+def match_channels(block, channels):
+    """Down-mix to mono or duplicate mono across channels"""
+    if block.shape[1] == channels:
+        return block
+    if channels == 1:
+        return block.mean(axis=1, keepdims=True)
+    if block.shape[1] == 1:
+        return np.repeat(block, channels, axis=1)
+    mono = block.mean(axis=1, keepdims=True)
+    return np.repeat(mono, channels, axis=1)
+
+
+class LinearResampler:
+    """Streaming linear-interpolation resampler that carries its phase across blocks"""
+
+    def __init__(self, source_rate, target_rate):
+        self.step = source_rate / target_rate
+        self.position = 0.0
+        self.previous = None
+
+    def process(self, block):
+        if self.step == 1.0 or not len(block):
+            return block
+        if self.previous is not None:
+            block = np.concatenate([self.previous, block])
+        last = len(block) - 1
+        count = max(0, int(np.ceil((last - self.position) / self.step)))
+        positions = self.position + np.arange(count) * self.step
+        frames = np.arange(len(block))
+        resampled = np.empty((count, block.shape[1]), dtype=np.float32)
+        for channel in range(block.shape[1]):
+            resampled[:, channel] = np.interp(positions, frames, block[:, channel])
+        # The last input frame becomes frame 0 of the next block
+        self.position = (positions[-1] + self.step if count else self.position) - last
+        self.previous = block[-1:]
+        return resampled
+
+
+def export_compilation(paths, output_file, gap_ms=EXPORT_GAP_MS, sample_rate=0, channels=0,
+                       block_frames=EXPORT_BLOCK_FRAMES):
+    """Join clips into one 16-bit WAV with silence gaps, converting rate and channels block by block
+
+    sample_rate/channels of 0 follow the first readable clip. Memory use is bounded by
+    block_frames, not by the number or length of the clips.
+    """
+    stats = {"clips": 0, "skipped": [], "frames": 0, "max_block_frames": 0}
+    with wave.open(output_file, 'wb') as target:
+        for path in paths:
+            try:
+                source_rate, source_channels = probe_clip_format(path)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {path} in export: {e}")
+                stats["skipped"].append(path)
+                continue
+            if not stats["clips"]:
+                sample_rate = sample_rate or source_rate
+                channels = channels or source_channels
+                target.setnchannels(channels)
+                target.setsampwidth(2)
+                target.setframerate(sample_rate)
+            elif gap_ms > 0:
+                gap_frames = int(sample_rate * gap_ms / 1000)
+                silence = bytes(2 * channels * min(gap_frames, block_frames))
+                for start in range(0, gap_frames, block_frames):
+                    target.writeframes(silence[:2 * channels * min(block_frames, gap_frames - start)])
+                stats["frames"] += gap_frames
+            
+            resampler = LinearResampler(source_rate, sample_rate)
+            try:
+                for block in iter_clip_blocks(path, block_frames):
+                    block = resampler.process(match_channels(block, channels))
+                    stats["max_block_frames"] = max(stats["max_block_frames"], len(block))
+                    stats["frames"] += len(block)
+                    target.writeframes(float_to_pcm(block, 2))
+            except (wave.Error, EOFError, ValueError, pygame.error) as e:
+                # Whatever was read before the error stays in the mix
+                print(f"Clip {path} ended early in export: {e}")
+            stats["clips"] += 1
+        if not stats["clips"]:
+            # Leave a valid empty WAV rather than a file without a header
+            target.setnchannels(channels or 1)
+            target.setsampwidth(2)
+            target.setframerate(sample_rate or 22050)
+    stats.update(sample_rate=sample_rate, channels=channels)
+    return stats
+
+
+def benchmark_export(clips=300, seconds=4):
+    """Export many mixed-format clips and check that peak memory stays flat"""
+    import tracemalloc
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    formats = [(22050, 1), (44100, 2), (16000, 1), (24000, 2)]
+    try:
+        paths = []
+        for i, (rate, channels) in enumerate(formats):
+            path = os.path.join(work_dir, f"clip_{rate}_{channels}.wav")
+            t = np.arange(rate * seconds) / rate
+            tone = 0.3 * np.sin(2 * np.pi * (180 + 40 * i) * t)
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(channels)
+                wav.setsampwidth(2)
+                wav.setframerate(rate)
+                wav.writeframes(float_to_pcm(np.repeat(tone[:, None], channels, axis=1), 2))
+            paths.append(path)
+        
+        print(f"Export benchmark: mixed 16/22/24/44.1 kHz mono/stereo clips of {seconds}s")
+        for count in (clips // 10, clips):
+            output_path = os.path.join(work_dir, f"mix_{count}.wav")
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            stats = export_compilation([paths[i % len(paths)] for i in range(count)], output_path,
+                                       sample_rate=44100, channels=2)
+            elapsed = time.perf_counter() - start_time
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            audio_seconds = stats["frames"] / stats["sample_rate"]
+            print(f"  {count:>4} clips: {audio_seconds:7.0f}s of audio in {elapsed:6.2f}s "
+                  f"({audio_seconds / elapsed:5.0f}x realtime), output {os.path.getsize(output_path) / 1e6:6.1f} MB, "
+                  f"peak traced memory {peak / 1e6:5.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# Waveform thumbnail settings
+WAVEFORM_BUCKETS = 120
+WAVEFORM_SILENT_LEVEL = 0.01
+# Thumbnail placeholders for clips that can't be drawn
+WAVEFORM_MISSING = "missing"
+WAVEFORM_NOT_WAV = "not-wav"
+WAV_SAMPLE_TYPES = {(1, 1): np.uint8, (1, 2): np.dtype('<i2'), (1, 4): np.dtype('<i4'), (3, 4): np.dtype('<f4')}
+
+
+def read_wav_data_chunk(path):
+    """Locate the PCM data of a WAV without decoding it
+
+    Returns (offset, frames, channels, sample_dtype, sample_rate, truncated); truncated
+    means the header promises more data than the file holds.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError("Not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV file has no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+    if fmt is None:
+        raise ValueError("WAV data chunk comes before its format")
+    format_tag, channels, sample_rate, _, block_align, bits = fmt
+    dtype = WAV_SAMPLE_TYPES.get((format_tag, bits // 8))
+    if dtype is None or not channels:
+        raise ValueError(f"Unsupported WAV sample format {format_tag}/{bits}-bit")
+    available = file_size - offset
+    frames = min(size, available) // block_align
+    return offset, frames, channels, dtype, sample_rate, size > available
+
+
+def compute_waveform_peaks(path, buckets=WAVEFORM_BUCKETS):
+    """Min/max peaks per bucket from a memory-mapped WAV, scaled to int8"""
+    offset, frames, channels, dtype, sample_rate, truncated = read_wav_data_chunk(path)
+    peaks = np.zeros((buckets, 2), dtype=np.int8)
+    level = 0.0
+    if frames:
+        samples = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+        edges = np.linspace(0, frames, buckets + 1).astype(np.int64)[:-1]
+        low = np.minimum.reduceat(samples, edges, axis=0).min(axis=1).astype(np.float32)
+        high = np.maximum.reduceat(samples, edges, axis=0).max(axis=1).astype(np.float32)
+        del samples
+        if dtype == np.uint8:
+            low, high = (low - 128.0) / 128.0, (high - 128.0) / 128.0
+        elif dtype.kind == 'i':
+            full_scale = float(2 ** (8 * dtype.itemsize - 1))
+            low, high = low / full_scale, high / full_scale
+        low, high = np.clip(low, -1.0, 1.0), np.clip(high, -1.0, 1.0)
+        peaks[:, 0] = np.round(low * 127)
+        peaks[:, 1] = np.round(high * 127)
+        level = float(max(-low.min(), high.max()))
+    return {"peaks": peaks, "duration": frames / sample_rate if sample_rate else 0.0,
+            "level": level, "truncated": truncated}
+
+
+def load_waveform_peaks(path, buckets=WAVEFORM_BUCKETS):
+    """Peaks for a WAV clip, from its sidecar .peaks file or computed once and saved there"""
+    sidecar = path + ".peaks"
+    try:
+        if os.path.getmtime(sidecar) >= os.path.getmtime(path):
+            with np.load(sidecar) as cached:
+                if cached["peaks"].shape == (buckets, 2):
+                    return {"peaks": cached["peaks"], "duration": float(cached["duration"]),
+                            "level": float(cached["level"]), "truncated": bool(cached["truncated"])}
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    thumbnail = compute_waveform_peaks(path, buckets)
+    try:
+        with open(sidecar, 'wb') as f:
+            np.savez(f, **thumbnail)
+    except OSError as e:
+        print(f"Could not write peaks file for {os.path.basename(path)}: {e}")
+    return thumbnail
+
+
+# Profiling settings
+PROFILE_ENV_VAR = "TTS_PROFILE"
+PROFILE_DIR = "tts_profiles"
+PROFILE_KEEP_SLOWEST = 10
+
+
+class ProfileCapture:
+    """Per-run cProfile and tracemalloc capture that keeps only the slowest runs on disk"""
+    
+    def __init__(self, directory=PROFILE_DIR, keep=PROFILE_KEEP_SLOWEST):
+        self.directory = directory
+        self.keep = keep
+        self.lock = Lock()
+        self.active = 0
+        self.started_tracing = False
+
+    def run(self, label, func, *args, **kwargs):
+        """Call func under the profilers, save the capture and return func's result"""
+        import cProfile
+        import tracemalloc
+        with self.lock:
+            if not self.active and not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self.started_tracing = True
+            self.active += 1
+        
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one cProfile can be active at a time; overlapping runs get allocations only
+            profiler = None
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if profiler:
+                profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            with self.lock:
+                self.active -= 1
+                if not self.active and self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+            try:
+                self.save(label, elapsed, peak, profiler, snapshot)
+            except Exception as e:
+                print(f"Could not save profile: {e}")
+
+    def save(self, label, elapsed, peak, profiler, snapshot):
+        """Write <ms>ms_<label>_<time>.prof/.snapshot, then drop all but the slowest runs"""
+        os.makedirs(self.directory, exist_ok=True)
+        stem = f"{int(elapsed * 1000):08d}ms_{label}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        if profiler:
+            profiler.dump_stats(os.path.join(self.directory, stem + ".prof"))
+        snapshot.dump(os.path.join(self.directory, stem + ".snapshot"))
+        
+        kept = self.rotate()
+        status = "kept" if stem in kept else f"discarded, faster than the {self.keep} slowest"
+        print(f"📈 Profiled {label}: {elapsed:.2f}s, peak traced memory {peak / 1e6:.1f} MB ({status})")
+
+    def rotate(self):
+        # File names start with the zero-padded run time, so name order is speed order
+        runs = sorted({os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                       if name.endswith((".prof", ".snapshot"))}, reverse=True)
+        for stem in runs[self.keep:]:
+            for extension in (".prof", ".snapshot"):
+                try:
+                    os.remove(os.path.join(self.directory, stem + extension))
+                except FileNotFoundError:
+                    pass
+        return set(runs[:self.keep])
+
+
+# Pronunciation lexicon settings
+LEXICON_FILE = "tts_lexicon.json"
+LEXICON_CHECK_SECONDS = 1.0
+LEXICON_TOKEN_PATTERN = re.compile(r'\w+|\s+|[^\w\s]')
+
+
+def lexicon_tokens(text):
+    """Split text into word, whitespace and punctuation tokens; words are never split further"""
+    return LEXICON_TOKEN_PATTERN.findall(text)
+
+
+def lexicon_key(token):
+    # All whitespace runs are equivalent, so "New  York" matches "New York"
+    return " " if token.isspace() else token.lower()
+
+
+def lexicon_term_key(token):
+    # All-caps words in a term are acronyms and keep their case, so "US" doesn't match "us"
+    return token if token.isupper() else lexicon_key(token)
+
+
+class PronunciationTrie:
+    """Token-level trie of lexicon terms, applied leftmost-longest in one pass over the text
+
+    Matching is done on whole tokens, so "SQL" never matches inside "MySQL", and the
+    work per token is a dict lookup whatever the size of the lexicon. All-caps words
+    in a term only match all-caps text; other words match in any case.
+    """
+    
+    def __init__(self, entries):
+        # Each node is [spoken form or None, children dict or None]
+        self.root = {}
+        self.size = 0
+        for term, spoken in entries.items():
+            keys = [lexicon_term_key(token) for token in lexicon_tokens(term.strip())]
+            if not keys or not isinstance(spoken, str):
+                continue
+            children = self.root
+            for i, key in enumerate(keys):
+                node = children.get(key)
+                if node is None:
+                    node = children[key] = [None, None]
+                if i < len(keys) - 1:
+                    if node[1] is None:
+                        node[1] = {}
+                    children = node[1]
+            node[0] = spoken
+            self.size += 1
+
+    def apply(self, text):
+        """Return (text with substitutions, number of substitutions)"""
+        tokens = lexicon_tokens(text)
+        keys = [lexicon_key(token) for token in tokens]
+        parts = []
+        count = 0
+        i = 0
+        while i < len(tokens):
+            node = self._child(self.root, tokens[i], keys[i])
+            match = None
+            j = i
+            while node is not None:
+                if node[0] is not None:
+                    match = (j, node[0])
+                j += 1
+                if node[1] is None or j == len(tokens):
+                    break
+                node = self._child(node[1], tokens[j], keys[j])
+            if match:
+                parts.append(match[1])
+                count += 1
+                i = match[0] + 1
+            else:
+                parts.append(tokens[i])
+                i += 1
+        return "".join(parts), count
+
+    @staticmethod
+    def _child(children, token, key):
+        # An all-caps token prefers an acronym entry, then falls back to the case-folded one
+        if token.isupper() and token in children:
+            return children[token]
+        return children.get(key)
+
+
+class PronunciationLexicon:
+    """File-backed lexicon ({"term": "spoken form"} JSON) that recompiles when the file changes"""
+    
+    def __init__(self, path=LEXICON_FILE, on_reload=None):
+        self.path = path
+        self.on_reload = on_reload
+        self.trie = PronunciationTrie({})
+        self.version = None
+        self.last_check = 0.0
+        self.lock = Lock()
+
+    def reload_if_changed(self):
+        """Recompile if the file's modification time changed; cheap to call before every render"""
+        now = time.time()
+        if now - self.last_check < LEXICON_CHECK_SECONDS:
+            return
+        with self.lock:
+            if now - self.last_check < LEXICON_CHECK_SECONDS:
+                return
+            self.last_check = now
+            try:
+                version = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                version = None
+            if version == self.version:
+                return
+            try:
+                entries = {}
+                if version is not None:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        entries = json.load(f)
+                start_time = time.perf_counter()
+                self.trie = PronunciationTrie(entries)
+                self.version = version
+                print(f"📖 Pronunciation lexicon loaded: {self.trie.size} entries "
+                      f"in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+            except (OSError, ValueError, AttributeError) as e:
+                # Keep the previous lexicon while the file is being edited
+                print(f"Pronunciation lexicon not reloaded: {e}")
+                return
+        if self.on_reload:
+            self.on_reload()
+
+    def apply(self, text):
+        self.reload_if_changed()
+        spoken, count = self.trie.apply(text)
+        if count:
+            print(f"📖 Applied {count} pronunciation substitutions")
+        return spoken
+
+
+def benchmark_lexicon(words=10000):
+    """Compile lexicons of growing size and time substitution over the same text"""
+    rng = random.Random(0)
+    make_word = lambda: "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+    text = " ".join(make_word() for _ in range(words)) + " Our SQL servers run nginx over Wi-Fi, in C++."
+    known = {"SQL": "sequel", "nginx": "engine x", "Wi-Fi": "why fye", "C++": "see plus plus"}
+    
+    print(f"Lexicon benchmark: {len(text)} characters of text")
+    for size in (100, 10000, 100000):
+        entries = {f"{make_word()}{i}": make_word() for i in range(size)}
+        entries.update(known)
+        start_time = time.perf_counter()
+        trie = PronunciationTrie(entries)
+        compile_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        spoken, count = trie.apply(text)
+        apply_time = time.perf_counter() - start_time
+        print(f"  {size:>7} entries: compile {compile_time * 1000:7.0f} ms, apply {apply_time * 1000:6.1f} ms, "
+              f"{count} substitutions -> ...{spoken[-60:]}")
+
+
+# Playback mixer settings: 48 kHz stereo is at or above every source format (16-24 kHz
+# voices, 44.1/48 kHz stereo imports), so clips are only ever upsampled or up-mixed,
+# and a 1024-frame buffer keeps output latency around 21 ms
+MIXER_FREQUENCY = 48000
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 1024
+LEGACY_MIXER = (44100, 2, 4096)
+CLIP_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def init_mixer(frequency=MIXER_FREQUENCY, channels=MIXER_CHANNELS, buffer=MIXER_BUFFER):
+    """(Re)start the pygame mixer; channel 0 is reserved for clip playback"""
+    pygame.mixer.quit()
+    pygame.mixer.init(frequency=frequency, size=-16, channels=channels, buffer=buffer)
+    pygame.mixer.set_reserved(1)
+
+
+def load_clip_pcm(path):
+    """Decode a WAV and convert it to the mixer's rate and channels in one vectorised pass"""
+    mixer_rate, _, mixer_channels = pygame.mixer.get_init()
+    with wave.open(path, 'rb') as wav:
+        rate, channels, sample_width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+    if (rate, channels, sample_width) == (mixer_rate, mixer_channels, 2):
+        return raw
+    samples = match_channels(pcm_to_float(raw, sample_width).reshape(-1, channels), mixer_channels)
+    return float_to_pcm(LinearResampler(rate, mixer_rate).process(samples), 2)
+
+
+class ClipSoundCache:
+    """Mixer-ready Sounds for WAV clips, converted once per file version and kept in an LRU"""
+    
+    def __init__(self, max_bytes=CLIP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.sounds = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, path):
+        """Sound for a clip, or None if it isn't a WAV (gTTS MP3 stays on the streaming music player)"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, pygame.mixer.get_init())
+        with self.lock:
+            cached = self.sounds.get(key)
+            if cached:
+                self.sounds.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+        try:
+            pcm = load_clip_pcm(path)
+        except (wave.Error, EOFError, ValueError):
+            # Not a WAV, or a sample width the converter doesn't handle (e.g. 24-bit): use music instead
+            return None
+        sound = pygame.mixer.Sound(buffer=pcm)
+        with self.lock:
+            self.misses += 1
+            self.sounds[key] = (sound, len(pcm))
+            self.size += len(pcm)
+            while self.size > self.max_bytes and len(self.sounds) > 1:
+                _, (_, evicted) = self.sounds.popitem(last=False)
+                self.size -= evicted
+        return sound
+
+
+def benchmark_playback_start(runs=5, seconds=5):
+    """Playback-start latency per source format: music streaming at 44.1 kHz vs cached mixer-ready clips
+
+    Columns are measured from the call until the mixer reports the clip busy. Sound is
+    heard after up to one more output buffer, which can't be observed from pygame, so
+    that period is printed separately instead of being added to the measurements.
+    """
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    formats = [(22050, 1), (16000, 1), (24000, 1), (44100, 2)]
+    
+    def time_to_busy(start, is_busy):
+        start_time = time.perf_counter()
+        start()
+        while not is_busy():
+            time.sleep(0.0005)
+        return time.perf_counter() - start_time
+    
+    try:
+        paths = {}
+        for rate, channels in formats:
+            path = os.path.join(work_dir, f"clip_{rate}_{channels}.wav")
+            t = np.arange(rate * seconds) / rate
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(channels)
+                wav.setsampwidth(2)
+                wav.setframerate(rate)
+                wav.writeframes(float_to_pcm(np.repeat(0.3 * np.sin(2 * np.pi * 220 * t)[:, None], channels, 1), 2))
+            paths[(rate, channels)] = path
+        
+        try:
+            init_mixer(*LEGACY_MIXER)
+        except pygame.error as e:
+            print(f"Playback benchmark skipped: no audio device ({e})")
+            return
+        legacy = {}
+        for key, path in paths.items():
+            samples = []
+            for _ in range(runs):
+                samples.append(time_to_busy(lambda: (pygame.mixer.music.load(path), pygame.mixer.music.play()),
+                                            pygame.mixer.music.get_busy))
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+            legacy[key] = min(samples)
+        
+        init_mixer()
+        channel = pygame.mixer.Channel(0)
+        legacy_buffer = LEGACY_MIXER[2] / LEGACY_MIXER[0]
+        buffer = MIXER_BUFFER / MIXER_FREQUENCY
+        print(f"Playback-start benchmark ({seconds}s clips, best of {runs}), call until busy")
+        print(f"  {'source':>16}  {'music.load+play':>16}  {'cache miss':>12}  {'cache hit':>12}")
+        for key, path in paths.items():
+            cold = []
+            warm = []
+            for _ in range(runs):
+                cache = ClipSoundCache()
+                cold.append(time_to_busy(lambda: channel.play(cache.get(path)), channel.get_busy))
+                channel.stop()
+                warm.append(time_to_busy(lambda: channel.play(cache.get(path)), channel.get_busy))
+                channel.stop()
+            label = f"{key[0]} Hz {'mono' if key[1] == 1 else 'stereo'}"
+            print(f"  {label:>16}  {legacy[key] * 1000:13.1f} ms  "
+                  f"{min(cold) * 1000:9.1f} ms  {min(warm) * 1000:9.1f} ms")
+        print(f"  Then up to one output buffer until audible (computed, not measured): "
+              f"{legacy_buffer * 1000:.0f} ms at {LEGACY_MIXER[0]} Hz/{LEGACY_MIXER[2]} for music, "
+              f"{buffer * 1000:.0f} ms at {MIXER_FREQUENCY} Hz/{MIXER_BUFFER} for clips")
+        print("  MP3 (gTTS) clips keep the streaming music player")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 
 class AdvancedTextToSpeechConverter:
     def __init__(self, root):
@@ -19,11 +3134,12 @@ class AdvancedTextToSpeechConverter:
         self.root.title("🎵 Ultimate TTS Converter Pro")
         self.root.geometry("1100x750")
         
-        # Initialize pygame mixer with proper settings
+        # Initialize pygame mixer in the format most clips are rendered in
+        self.clip_sounds = ClipSoundCache()
+        self.playback_channel = None
         try:
-            pygame.mixer.quit()
-            time.sleep(0.5)
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
+            init_mixer()
+            self.playback_channel = pygame.mixer.Channel(0)
         except Exception as e:
             print(f"Pygame init warning: {e}")
 
@@ -37,6 +3153,12 @@ class AdvancedTextToSpeechConverter:
         # Load settings and history
         self.settings = self.load_settings()
         self.history = self.load_history()
+        self.history_index = HistorySearchIndex()
+        self.export_selection = set()
+        self.waveform_cache = OrderedDict()
+        self.waveform_executor = ThreadPoolExecutor(max_workers=1)
+        for entry in self.history:
+            self.history_index.add(entry["id"], entry.get("full_text", entry["text"]))
 
         # Current audio file and playback control
         self.current_audio_file = None
@@ -52,6 +3174,18 @@ class AdvancedTextToSpeechConverter:
         self.volume_var = tk.DoubleVar(value=self.settings.get("volume", 1.0))
         self.theme_var = tk.StringVar(value=self.settings.get("theme", "dark"))
         self.accent_color_var = tk.StringVar(value=self.settings.get("accent_color", "#00798c"))
+        self.postprocess_var = tk.BooleanVar(value=self.settings.get("post_process_audio", False))
+        self.speculative_var = tk.BooleanVar(value=self.settings.get("speculative_synthesis", False))
+        self.profile_var = tk.BooleanVar(value=self.settings.get("profile_generations", False))
+        self.profiler = ProfileCapture()
+        self.online_rate_var = tk.IntVar(value=self.settings.get("online_rate_per_minute", GTTS_RATE_PER_MINUTE))
+        self.online_burst_var = tk.IntVar(value=self.settings.get("online_burst", GTTS_BURST))
+        # Worker threads read render settings from this copy, never from the Tk variables
+        self.snapshot_render_settings()
+        for var in (self.engine_var, self.voice_var, self.voice_tone_var, self.rate_var, self.volume_var,
+                    self.postprocess_var, self.speculative_var):
+            var.trace_add("write", self.snapshot_render_settings)
+        self.online_limiter = TokenBucket(self.online_rate_var.get(), self.online_burst_var.get())
 
         # Theme colors with enhanced color schemes
         self.theme_colors = {
@@ -81,9 +3215,59 @@ class AdvancedTextToSpeechConverter:
             }
         }
 
+        # Background pre-rendering of voice tests and quick texts
+        self.synthesis_lock = Lock()
+        self.duration_model = DurationModel()
+        # Batch work (comparison renders) backs off while a clip is playing
+        self.governor = ConcurrencyGovernor(interactive=lambda: self.is_playing)
+        self.engines = {name: engine_class(self) for name, engine_class in ENGINE_REGISTRY.items()
+                        if engine_class.available()}
+        self.stream_player = None
+        # Cancelling kills a worker, so streamed renders, file renders and pre-renders
+        # each get their own pool and a cancel in one never kills the others
+        self.stream_pool = KillableProcessPool("Streaming synthesis", max_workers=2)
+        self.render_pool = KillableProcessPool("Synthesis", max_workers=1)
+        self.background_pool = KillableProcessPool("Pre-render", max_workers=1, initializer=_batch_worker_init)
+        self.active_rings = set()
+        self.current_job = None
+        self.cancel_latencies = deque(maxlen=50)
+        self.comparison_window = None
+        self.engine_router = EngineRouter(self.duration_model)
+        self.warmup_cache = ClipWarmupCache(os.path.join(tempfile.gettempdir(), "tts_warmup_cache"))
+        self.warmup_jobs = deque()
+        self.warmup_event = Event()
+        self.warmup_signature = None
+        self.warmup_after_id = None
+
+        # Speculative sentence rendering while typing (opt-in)
+        self.speculative_cache = SpeculativeCache(os.path.join(tempfile.gettempdir(), "tts_speculative_cache"))
+        self.speculative_jobs = deque()
+        self.speculative_event = Event()
+        self.speculative_after_id = None
+        self.speculative_signature = None
+
+        # Worker threads post UI changes here instead of touching Tk directly
+        self.ui = UIDispatcher(self.root)
+
+        # Pronunciation lexicon, recompiled whenever its file changes
+        self.lexicon = PronunciationLexicon()
+        self.lexicon.reload_if_changed()
+        self.lexicon.on_reload = self.on_lexicon_reload
+
         self.setup_ui()
         self.apply_theme()
 
+        if self.settings.get("prerender_clips", True):
+            for var in (self.engine_var, self.rate_var, self.volume_var, self.postprocess_var):
+                var.trace_add("write", lambda *args: self.request_warmup())
+            Thread(target=self._warmup_thread, daemon=True).start()
+            self.root.after(2000, self.schedule_warmup)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # <<Modified>> also fires for paste, quick texts and other programmatic edits
+        self.text_area.bind("<<Modified>>", self.on_text_modified, add="+")
+        Thread(target=self._speculative_thread, daemon=True).start()
+
     def initialize_offline_engine(self):
         """Initialize or reinitialize the offline TTS engine"""
         try:
@@ -123,7 +3307,18 @@ class AdvancedTextToSpeechConverter:
                     "tts_engine": "offline",
                     "accent_color": "#00798c",
                     "auto_save": False,
-                    "playback_speed": 1.0
+                    "playback_speed": 1.0,
+                    "post_process_audio": False,
+                    "target_loudness_dbfs": -20.0,
+                    "prerender_clips": True,
+                    "online_parallel_segments": 4,
+                    "speculative_synthesis": False,
+                    "export_gap_ms": 500,
+                    "export_sample_rate": 0,
+                    "export_channels": 0,
+                    "profile_generations": False,
+                    "online_rate_per_minute": GTTS_RATE_PER_MINUTE,
+                    "online_burst": GTTS_BURST
                 }
                 # Merge with defaults for any missing keys
                 for key, value in default_settings.items():
@@ -144,7 +3339,18 @@ class AdvancedTextToSpeechConverter:
                 "tts_engine": "offline",
                 "accent_color": "#00798c",
                 "auto_save": False,
-                "playback_speed": 1.0
+                "playback_speed": 1.0,
+                "post_process_audio": False,
+                "target_loudness_dbfs": -20.0,
+                "prerender_clips": True,
+                "online_parallel_segments": 4,
+                "speculative_synthesis": False,
+                "export_gap_ms": 500,
+                "export_sample_rate": 0,
+                "export_channels": 0,
+                "profile_generations": False,
+                "online_rate_per_minute": GTTS_RATE_PER_MINUTE,
+                "online_burst": GTTS_BURST
             }
 
     def save_settings(self):
@@ -157,8 +3363,18 @@ class AdvancedTextToSpeechConverter:
                 "volume": self.volume_var.get(),
                 "theme": self.theme_var.get(),
                 "tts_engine": self.engine_var.get(),
-                "accent_color": self.accent_color_var.get()
+                "accent_color": self.accent_color_var.get(),
+                "post_process_audio": self.postprocess_var.get(),
+                "speculative_synthesis": self.speculative_var.get(),
+                "profile_generations": self.profile_var.get()
             })
+            try:
+                self.settings["online_rate_per_minute"] = max(0, self.online_rate_var.get())
+                self.settings["online_burst"] = max(1, self.online_burst_var.get())
+            except tk.TclError:
+                pass  # Spinbox is mid-edit, keep the previous values
+            self.online_limiter.configure(self.settings["online_rate_per_minute"],
+                                          self.settings["online_burst"])
             
             with open('tts_settings.json', 'w') as f:
                 json.dump(self.settings, f, indent=4)
@@ -172,6 +3388,8 @@ class AdvancedTextToSpeechConverter:
         try:
             with open('tts_history.json', 'r') as f:
                 history = json.load(f)
+                # Running max, so backfilling missing ids stays linear
+                self.next_history_id = max([e.get('id', 0) for e in history] + [0]) + 1
                 # Ensure each history entry has required fields including timestamp
                 for entry in history:
                     if 'voice' not in entry:
@@ -180,24 +3398,46 @@ class AdvancedTextToSpeechConverter:
                         entry['tone'] = 'standard'
                     if 'timestamp' not in entry:
                         entry['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    if 'id' not in entry:
+                        entry['id'] = self.next_history_id
+                        self.next_history_id += 1
                 return history
         except:
+            self.next_history_id = 1
             return []
 
+    def add_history_entry(self, entry):
+        """Append a history entry, index its full text and persist"""
+        # Ids are never reused, even after deletes or a cleared history
+        entry["id"] = self.next_history_id
+        self.next_history_id += 1
+        self.history.append(entry)
+        self.history_index.add(entry["id"], entry.get("full_text", entry["text"]))
+        self.save_history()
+
     def save_history(self):
+        """Persist the whole history: the search index and waveform sidecars cover every entry"""
         try:
             with open('tts_history.json', 'w') as f:
-                json.dump(self.history[-50:], f, indent=4)
+                json.dump(self.history, f, indent=4)
         except Exception as e:
             print(f"Error saving history: {e}")
 
     def safe_stop_audio(self):
         """Safely stop any currently playing audio"""
         try:
+            was_playing = self.is_playing
             self.is_playing = False
+            if self.stream_player:
+                self.stream_player.stop()
+                self.stream_player = None
+            if self.playback_channel:
+                self.playback_channel.stop()
             pygame.mixer.music.stop()
             pygame.mixer.music.unload()
-            time.sleep(0.2)
+            if was_playing:
+                # Let the previous playback monitor see the stop before a new clip starts
+                time.sleep(0.2)
         except Exception as e:
             print(f"Error stopping audio: {e}")
 
@@ -215,9 +3455,17 @@ class AdvancedTextToSpeechConverter:
                 print(f"Audio file too small: {file_size} bytes")
                 return False
                 
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.set_volume(self.volume_var.get())
-            pygame.mixer.music.play()
+            sound = self.clip_sounds.get(audio_file) if self.playback_channel else None
+            if sound is not None:
+                # WAV clips play from cached PCM that already matches the mixer format
+                self.playback_channel.set_volume(self.render_settings["volume"])
+                self.playback_channel.play(sound)
+                is_busy = self.playback_channel.get_busy
+            else:
+                pygame.mixer.music.load(audio_file)
+                pygame.mixer.music.set_volume(self.render_settings["volume"])
+                pygame.mixer.music.play()
+                is_busy = pygame.mixer.music.get_busy
             
             self.is_playing = True
             print("Audio playback started")
@@ -226,7 +3474,7 @@ class AdvancedTextToSpeechConverter:
                 try:
                     start_time = time.time()
                     while self.is_playing and time.time() - start_time < 60:
-                        if not pygame.mixer.music.get_busy():
+                        if not is_busy():
                             break
                         time.sleep(0.1)
                     self.is_playing = False
@@ -243,6 +3491,267 @@ class AdvancedTextToSpeechConverter:
             self.is_playing = False
             return False
 
+    def snapshot_render_settings(self, *args):
+        """Copy the render settings into a plain dict that any thread may read (Tk thread only)"""
+        try:
+            volume = self.volume_var.get()
+        except tk.TclError:
+            volume = self.render_settings["volume"]  # Spinbox or slider mid-edit
+        self.render_settings = {
+            "engine": self.engine_var.get(),
+            "voice": self.voice_var.get(),
+            "tone": self.voice_tone_var.get(),
+            "rate": self.rate_var.get(),
+            "volume": volume,
+            "postprocess": self.postprocess_var.get(),
+            "speculative": self.speculative_var.get()
+        }
+
+    def get_warmup_signature(self):
+        """Render settings that pre-rendered clips depend on"""
+        return (self.engine_var.get(), self.rate_var.get(), round(self.volume_var.get(), 2),
+                self.postprocess_var.get(), self.lexicon.version)
+
+    def request_warmup(self):
+        """Debounce settings changes (e.g. volume slider drags) before re-rendering"""
+        if self.warmup_after_id:
+            self.root.after_cancel(self.warmup_after_id)
+        self.warmup_after_id = self.root.after(1000, self.schedule_warmup)
+
+    def schedule_warmup(self):
+        """Queue pre-rendering of the voice-test and quick-text phrases (Tk thread only)"""
+        self.warmup_after_id = None
+        signature = self.get_warmup_signature()
+        self.warmup_signature = signature
+        if not self.warmup_cache.invalidate(signature) and self.warmup_jobs:
+            return
+        
+        # Current voice first, then every other voice x tone combination
+        phrases = [content for _, content in QUICK_TEXTS if content]
+        combos = [(self.voice_var.get(), self.voice_tone_var.get())]
+        combos += [(v, t) for v in VOICE_TYPES for t in VOICE_TONES if (v, t) not in combos]
+        
+        jobs = []
+        seen = set()
+        for voice_type, voice_tone in combos:
+            for text in [TEST_TEXTS[voice_tone]] + phrases:
+                key = self.warmup_cache.clip_key(signature, voice_type, voice_tone, text)
+                if key not in seen:
+                    seen.add(key)
+                    jobs.append((signature, voice_type, voice_tone, text))
+        
+        self.warmup_jobs.clear()
+        self.warmup_jobs.extend(jobs)
+        self.warmup_event.set()
+        print(f"Scheduled {len(jobs)} pre-render jobs")
+
+    def _warmup_thread(self):
+        """Low-priority worker that renders queued phrases while the app is idle"""
+        while True:
+            self.warmup_event.wait()
+            try:
+                signature, voice_type, voice_tone, text = self.warmup_jobs.popleft()
+            except IndexError:
+                self.warmup_event.clear()
+                continue
+            
+            # Yield to interactive work and playback
+            while self.is_processing or self.is_playing:
+                time.sleep(0.5)
+            if signature != self.warmup_signature:
+                continue
+            if self.warmup_cache.get(signature, voice_type, voice_tone, text):
+                continue
+            
+            render_file = os.path.join(self.warmup_cache.cache_dir,
+                                       f"render_{voice_type}_{voice_tone}_{time.time_ns()}.wav")
+            try:
+                success = self.run_governed(signature, text, voice_tone, self.render_background_clip,
+                                            text, voice_type, voice_tone, render_file, signature)
+                if success and os.path.exists(render_file):
+                    self.postprocess_audio(render_file)
+                    if self.warmup_cache.put(signature, voice_type, voice_tone, text, render_file):
+                        continue
+            except Exception as e:
+                print(f"Pre-render error: {e}")
+            try:
+                if os.path.exists(render_file):
+                    os.remove(render_file)
+            except OSError:
+                pass
+            
+            # Leave room for the UI between renders
+            time.sleep(0.2)
+
+    def run_governed(self, signature, text, voice_tone, func, *args):
+        """Run a background render inside a governor slot, reporting its time against the prediction"""
+        estimate = self.duration_model.predict(signature[0], text, voice_tone, signature[1])
+        self.governor.acquire()
+        start_time = time.time()
+        seconds = None
+        try:
+            result = func(*args)
+            seconds = time.time() - start_time
+            return result
+        finally:
+            self.governor.release(seconds, estimate)
+
+    def render_background_clip(self, text, voice_type, voice_tone, output_file, signature):
+        """Render a pre-render clip without holding synthesis_lock; True on success
+
+        pyttsx3 renders go to the niced background worker so an interactive render
+        never waits behind them; other engines don't share state and run directly.
+        """
+        engine_name, rate_setting, volume = signature[:3]
+        pool = self.background_pool.get() if engine_name == "offline" else None
+        if pool is None:
+            return bool(self.synthesize(text, voice_type, voice_tone, output_file, engine_name,
+                                        rate_setting=rate_setting)[0])
+        future = pool.submit(_pyttsx3_render_worker, self.lexicon.apply(text), voice_type, voice_tone,
+                             volume, rate_setting, output_file)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self.background_pool.kill()
+            raise
+
+    def speculation_supported(self, engine_name):
+        """Sentence clips can only be joined for engines that produce WAV"""
+        engine = self.engines.get(engine_name)
+        return bool(self.render_settings["speculative"] and engine and engine.formats == ("wav",))
+
+    def request_speculation(self):
+        """Debounce text edits and speculate once typing pauses (Tk thread only)"""
+        if not self.speculative_var.get():
+            return
+        if self.speculative_after_id:
+            self.root.after_cancel(self.speculative_after_id)
+        self.speculative_after_id = self.root.after(SPECULATIVE_DEBOUNCE_MS, self.schedule_speculation)
+
+    def on_text_modified(self, event=None):
+        """Re-arm Tk's modified flag (it only fires once until reset) and speculate on the edit"""
+        if not self.text_area.edit_modified():
+            return
+        self.text_area.edit_modified(False)
+        self.request_speculation()
+
+    def schedule_speculation(self):
+        """Queue background renders for completed sentences not cached yet (Tk thread only)"""
+        self.speculative_after_id = None
+        engine = self.engine_var.get()
+        if not self.speculation_supported(engine):
+            return
+        signature = self.get_warmup_signature()
+        if signature != self.speculative_signature:
+            self.speculative_cache.invalidate()
+            self.speculative_signature = signature
+        
+        voice_type = self.voice_var.get()
+        voice_tone = self.voice_tone_var.get()
+        jobs = []
+        for sentence, complete in split_sentences(self.text_area.get(1.0, tk.END)):
+            key = self.speculative_cache.key(signature, voice_type, voice_tone, sentence)
+            if complete and not self.speculative_cache.contains(key):
+                jobs.append((signature, voice_type, voice_tone, sentence, key))
+        
+        # Sentences that were edited away are simply not queued again
+        self.speculative_jobs.clear()
+        self.speculative_jobs.extend(jobs)
+        if jobs:
+            self.speculative_event.set()
+
+    def _speculative_thread(self):
+        """Low-priority worker rendering queued sentences while the app is idle"""
+        while True:
+            self.speculative_event.wait()
+            try:
+                signature, voice_type, voice_tone, sentence, key = self.speculative_jobs.popleft()
+            except IndexError:
+                self.speculative_event.clear()
+                continue
+            
+            while self.is_processing:
+                time.sleep(0.2)
+            if signature != self.speculative_signature or self.speculative_cache.contains(key):
+                continue
+            
+            render_file = os.path.join(self.speculative_cache.cache_dir, f"render_{time.time_ns()}.wav")
+            cpu_start = process_tree_cpu_seconds()
+            try:
+                render = lambda: self.synthesize(sentence, voice_type, voice_tone, render_file, signature[0],
+                                                 rate_setting=signature[1])
+                if self.run_governed(signature, sentence, voice_tone, render)[0]:
+                    self.speculative_cache.put(key, render_file, process_tree_cpu_seconds() - cpu_start)
+                    continue
+            except Exception as e:
+                print(f"Speculative render error: {e}")
+            try:
+                if os.path.exists(render_file):
+                    os.remove(render_file)
+            except OSError:
+                pass
+
+    def render_with_speculation(self, text, voice_type, voice_tone, output_file, engine_name, signature, job=None):
+        """Render text sentence by sentence, reusing speculative clips; return (engine, error, hits, total)"""
+        if signature != self.speculative_signature:
+            self.speculative_cache.invalidate()
+            self.speculative_signature = signature
+        
+        # Consecutive misses are rendered together: one engine start-up per run instead of per sentence
+        runs = []
+        hits = 0
+        sentences = split_sentences(text)
+        for sentence, _ in sentences:
+            key = self.speculative_cache.key(signature, voice_type, voice_tone, sentence)
+            clip = self.speculative_cache.lookup(key)
+            if clip:
+                hits += 1
+                runs.append(clip)
+            elif runs and isinstance(runs[-1], list):
+                runs[-1].append(sentence)
+            else:
+                runs.append([sentence])
+        
+        parts = []
+        for run in runs:
+            if job:
+                # Runs are the chunks: finished clips stay cached, the rest is skipped
+                job.check()
+            if isinstance(run, list):
+                # Only what changed since the last stable point is rendered now
+                missing = " ".join(run)
+                key = self.speculative_cache.key(signature, voice_type, voice_tone, missing)
+                render_file = os.path.join(self.speculative_cache.cache_dir, f"render_{time.time_ns()}.wav")
+                cpu_start = process_tree_cpu_seconds()
+                rendered, error = self.synthesize(missing, voice_type, voice_tone, render_file, engine_name, job=job,
+                                                  rate_setting=signature[1])
+                if not rendered:
+                    return None, error, hits, len(sentences)
+                run = self.speculative_cache.put(key, render_file, process_tree_cpu_seconds() - cpu_start, used=True)
+            parts.append(run)
+        
+        concatenate_wavs(parts, output_file)
+        report = self.speculative_cache.report()
+        print(f"Speculative synthesis: {hits}/{len(sentences)} sentences ready, "
+              f"overall hit rate {report['hit_rate']:.0%}, wasted CPU {report['wasted_cpu']:.2f}s "
+              f"(+{report['unused_cpu']:.2f}s not used yet) of {report['rendered_cpu']:.2f}s rendered")
+        return engine_name, None, hits, len(sentences)
+
+    def postprocess_audio(self, audio_file):
+        """Trim silence and normalize loudness of a generated WAV if enabled"""
+        if not self.render_settings["postprocess"]:
+            return
+        try:
+            start_time = time.time()
+            stats = postprocess_wav(audio_file, target_dbfs=self.settings.get("target_loudness_dbfs", -20.0))
+            print(f"Post-processed audio in {time.time() - start_time:.3f}s: "
+                  f"trimmed {stats['trimmed_frames']} frames, gain {stats['gain_db']:+.1f} dB")
+        except (wave.Error, EOFError, ValueError) as e:
+            # gTTS output is MP3 data, which the WAV post-processor leaves untouched
+            print(f"Skipping post-processing: {e}")
+        except Exception as e:
+            print(f"Post-processing error: {e}")
+
     def get_voice_id(self, voice_type, voice_tone="standard"):
         """Get voice ID for the specified voice type and tone"""
         if not self.offline_engine:
@@ -252,47 +3761,7 @@ class AdvancedTextToSpeechConverter:
         try:
             voices = self.offline_engine.getProperty('voices')
             print(f"Available voices: {[voice.name for voice in voices]}")
-            
-            voice_preferences = {
-                "male": {
-                    "standard": ['david', 'mark', 'microsoft david desktop'],
-                    "deep": ['david', 'mark'],
-                    "warm": ['david'],
-                    "crystal": ['mark']
-                },
-                "female": {
-                    "standard": ['zira', 'eva', 'hazel'],
-                    "peach": ['hazel', 'eva', 'zira'],
-                    "soothing": ['hazel', 'eva'],
-                    "crystal": ['zira', 'hazel'],
-                    "soft": ['hazel', 'eva']
-                }
-            }
-            
-            preferred_voices = voice_preferences.get(voice_type, {}).get(voice_tone, [])
-            
-            # First try preferred voices for this tone
-            for preferred in preferred_voices:
-                for voice in voices:
-                    if preferred in voice.name.lower():
-                        print(f"Found preferred {voice_type} voice for {voice_tone} tone: {voice.name}")
-                        return voice.id
-            
-            # Fallback to any voice of the requested gender
-            for voice in voices:
-                if voice_type == "male" and any(indicator in voice.name.lower() for indicator in ['male', 'david', 'mark']):
-                    print(f"Found fallback male voice: {voice.name}")
-                    return voice.id
-                elif voice_type == "female" and any(indicator in voice.name.lower() for indicator in ['female', 'zira', 'hazel', 'eva']):
-                    print(f"Found fallback female voice: {voice.name}")
-                    return voice.id
-            
-            # Ultimate fallback
-            if len(voices) > 0:
-                print(f"Using ultimate fallback voice: {voices[0].name}")
-                return voices[0].id
-            
-            return None
+            return find_voice_id(voices, voice_type, voice_tone)
         except Exception as e:
             print(f"Error getting voice ID: {e}")
             return None
@@ -302,75 +3771,456 @@ class AdvancedTextToSpeechConverter:
         if not self.offline_engine:
             return
             
-        base_rate = 175
-        base_volume = self.volume_var.get()
-        
-        tone_settings = {
-            "standard": {"rate": base_rate, "volume": base_volume},
-            "peach": {"rate": base_rate - 25, "volume": base_volume},
-            "soothing": {"rate": base_rate - 40, "volume": base_volume - 0.1},
-            "crystal": {"rate": base_rate + 15, "volume": base_volume + 0.1},
-            "deep": {"rate": base_rate - 15, "volume": base_volume + 0.05},
-            "soft": {"rate": base_rate - 30, "volume": base_volume - 0.15},
-            "warm": {"rate": base_rate - 20, "volume": base_volume}
-        }
-        
-        settings = tone_settings.get(voice_tone, tone_settings["standard"])
-        self.offline_engine.setProperty('rate', settings["rate"])
-        self.offline_engine.setProperty('volume', max(0.1, min(1.0, settings["volume"])))
+        rate, volume = tone_voice_properties(voice_tone, self.render_settings["volume"])
+        self.offline_engine.setProperty('rate', rate)
+        self.offline_engine.setProperty('volume', volume)
 
-    def generate_with_offline_tts(self, text, voice_type, output_file, voice_tone="standard"):
+    def generate_with_offline_tts(self, text, voice_type, output_file, voice_tone="standard", job=None):
         """Use pyttsx3 for offline TTS with proper voice selection and tone settings"""
-        try:
-            # Get voice ID for the requested voice type and tone
-            voice_id = self.get_voice_id(voice_type, voice_tone)
-            if not voice_id:
-                print(f"No voice found for type: {voice_type}")
-                return False
+        if job is not None:
+            # runAndWait() can't be interrupted reliably, so cancellable renders run in a worker
+            pool = self.render_pool.get()
+            if pool is not None:
+                return self.render_offline_in_worker(pool, text, voice_type, output_file, voice_tone, job)
+        
+        # The pyttsx3 engine is shared with the warm-up renderer
+        with self.synthesis_lock:
+            start_time = time.time()
+            try:
+                # Get voice ID for the requested voice type and tone
+                voice_id = self.get_voice_id(voice_type, voice_tone)
+                if not voice_id:
+                    print(f"No voice found for type: {voice_type}")
+                    return False
             
-            # Reinitialize engine to ensure clean state
-            if not self.initialize_offline_engine():
-                return False
+                # Reinitialize engine to ensure clean state
+                if not self.initialize_offline_engine():
+                    return False
             
-            # Set voice properties
-            self.offline_engine.setProperty('voice', voice_id)
+                # Set voice properties
+                self.offline_engine.setProperty('voice', voice_id)
             
-            # Apply voice tone settings
-            self.apply_voice_tone_settings(voice_tone)
+                # Apply voice tone settings
+                self.apply_voice_tone_settings(voice_tone)
             
-            # Apply speech rate on top of tone settings
-            base_rate = self.offline_engine.getProperty('rate')
-            rate_setting = self.rate_var.get()
-            if rate_setting == "slow":
-                self.offline_engine.setProperty('rate', max(80, base_rate - 40))
-            elif rate_setting == "fast":
-                self.offline_engine.setProperty('rate', base_rate + 40)
+                # Apply speech rate on top of tone settings
+                base_rate = self.offline_engine.getProperty('rate')
+                rate_setting = self.render_settings["rate"]
+                if rate_setting == "slow":
+                    self.offline_engine.setProperty('rate', max(80, base_rate - 40))
+                elif rate_setting == "fast":
+                    self.offline_engine.setProperty('rate', base_rate + 40)
             
-            # Ensure WAV format
-            if not output_file.endswith('.wav'):
-                output_file = output_file.rsplit('.', 1)[0] + '.wav'
+                # Ensure WAV format
+                if not output_file.endswith('.wav'):
+                    output_file = output_file.rsplit('.', 1)[0] + '.wav'
             
-            print(f"Generating {voice_type} voice with {voice_tone} tone for text: {text[:50]}...")
+                print(f"Generating {voice_type} voice with {voice_tone} tone for text: {text[:50]}...")
             
-            # Generate audio
-            self.offline_engine.save_to_file(text, output_file)
-            self.offline_engine.runAndWait()
+                # Generate audio
+                self.offline_engine.save_to_file(text, output_file)
+                self.offline_engine.runAndWait()
             
-            # Wait for file to be written
-            time.sleep(1.0)
+                # Wait for file to be written
+                time.sleep(1.0)
             
-            # Verify file
-            if os.path.exists(output_file):
-                file_size = os.path.getsize(output_file)
-                print(f"Audio file created: {output_file} ({file_size} bytes)")
-                return file_size > 1000
-            else:
-                print("Audio file was not created")
-                return False
+                # Verify file
+                if os.path.exists(output_file):
+                    file_size = os.path.getsize(output_file)
+                    print(f"Audio file created: {output_file} ({file_size} bytes)")
+                    return file_size > 1000
+                else:
+                    print("Audio file was not created")
+                    return False
                 
+            except Exception as e:
+                print(f"Offline TTS error: {e}")
+                return False
+
+    def render_offline_in_worker(self, pool, text, voice_type, output_file, voice_tone, job):
+        """Render with pyttsx3 in the worker pool; a cancel kills the worker mid-render"""
+        if not output_file.endswith('.wav'):
+            output_file = output_file.rsplit('.', 1)[0] + '.wav'
+        print(f"Generating {voice_type} voice with {voice_tone} tone in worker for text: {text[:50]}...")
+        future = pool.submit(_pyttsx3_render_worker, text, voice_type, voice_tone,
+                             self.render_settings["volume"], self.render_settings["rate"], output_file)
+        while not future.done():
+            if job.cancelled:
+                self.render_pool.kill()
+                self.remove_partial_file(output_file)
+                job.check()
+            future_wait([future], timeout=CANCEL_POLL_SECONDS)
+        try:
+            success = future.result()
         except Exception as e:
-            print(f"Offline TTS error: {e}")
+            print(f"Offline TTS worker error: {e}")
+            success = False
+        if success:
+            print(f"Audio file created: {output_file} ({os.path.getsize(output_file)} bytes)")
+        return success
+
+    def remove_partial_file(self, path):
+        """Delete what a cancelled or failed render left behind"""
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+                print(f"Removed partial file: {os.path.basename(path)}")
+        except OSError as e:
+            print(f"Could not remove partial file {path}: {e}")
+
+    def generate_with_online_tts(self, text, output_file, job=None, play=False, volume=None):
+        """Use gTTS for online TTS; with play=True, play segments as they arrive"""
+        try:
+            tts = gtts.gTTS(text=text, lang='en')
+            if play:
+                if not self.play_gtts_stream(tts, output_file, job, volume):
+                    raise RuntimeError("gTTS returned no audio")
+            else:
+                try:
+                    segments = save_gtts_parallel(tts, output_file,
+                                                  self.settings.get("online_parallel_segments",
+                                                                    GTTS_PARALLEL_SEGMENTS),
+                                                  job=job, limiter=self.online_limiter)
+                    print(f"Fetched {segments} gTTS segments in parallel")
+                except AttributeError:
+                    # gTTS internals changed, fall back to the sequential library path
+                    self.online_limiter.acquire(job, cost=estimate_gtts_segments(text))
+                    tts.save(output_file)
+            stats = self.online_limiter.stats()
+            configured = f"{stats['configured_per_minute']:.0f}" if stats['configured_per_minute'] else "unpaced"
+            print(f"🚦 Online pacing: {stats['requests_last_minute']:.0f}/{configured} "
+                  f"req/min, {stats['throttle_waits']} waits (mean {stats['mean_wait']:.2f}s, "
+                  f"max {stats['max_wait']:.2f}s), {stats['retry_after_pauses']} Retry-After pauses")
+            return True
+        except SynthesisCancelled:
+            self.remove_partial_file(output_file)
+            raise
+        except Exception:
+            self.remove_partial_file(output_file)
+            raise
+
+    def iter_online_segments(self, tts, job=None):
+        """Yield the MP3 bytes of each gTTS segment in order, fetched in parallel when possible"""
+        if hasattr(tts, "_prepare_requests"):
+            return iter_gtts_segments(tts, self.settings.get("online_parallel_segments", GTTS_PARALLEL_SEGMENTS),
+                                      job=job, limiter=self.online_limiter)
+        # gTTS internals changed, use the library's sequential chunk stream
+        self.online_limiter.acquire(job, cost=estimate_gtts_segments(tts.text))
+        return tts.stream()
+
+    def stream_online_tts(self, text, job=None):
+        """Yield each gTTS segment decoded to PCM in the mixer's format as soon as it arrives"""
+        mixer_rate, _, mixer_channels = pygame.mixer.get_init()
+        segments = self.iter_online_segments(gtts.gTTS(text=text, lang='en'), job)
+        try:
+            for audio in segments:
+                pcm = decode_mp3_pcm(audio)
+                if pcm:
+                    yield mixer_rate, mixer_channels, pcm
+                if job:
+                    job.check()
+        finally:
+            segments.close()
+
+    def play_gtts_stream(self, tts, output_file, job=None, volume=None):
+        """Write gTTS segments to output_file as they arrive and queue each one for playback"""
+        segments = self.iter_online_segments(tts, job)
+        mixer_rate, _, mixer_channels = pygame.mixer.get_init()
+        decoded = queue.Queue()
+        player = None
+        start_time = time.perf_counter()
+        try:
+            with open(output_file, 'wb') as f:
+                for audio in segments:
+                    f.write(audio)
+                    if player is None:
+                        self.safe_stop_audio()
+                        player = StreamingPlayer(mixer_rate, mixer_channels,
+                                                 self.render_settings["volume"] if volume is None else volume)
+                        self.stream_player = player
+                        self.is_playing = True
+                        # Playback paces itself on the mixer, so the download never waits for it
+                        Thread(target=self._feed_stream_player, args=(player, decoded, start_time),
+                               daemon=True).start()
+                    decoded.put(decode_mp3_pcm(audio))
+                    if job:
+                        job.check()
+        except Exception:
+            if player:
+                player.stop()
+            raise
+        finally:
+            decoded.put(None)
+            segments.close()
+        return player is not None
+
+    def _feed_stream_player(self, player, decoded, start_time):
+        """Hand decoded segments to a streaming player, then wait for it to finish"""
+        while not player.stopped:
+            pcm = decoded.get()
+            if pcm is None:
+                player.flush()
+                break
+            player.feed(pcm)
+        if player.first_audio_time:
+            print(f"Streaming playback started after {(player.first_audio_time - start_time) * 1000:.0f} ms")
+        self._wait_stream_playback(player)
+
+    def generate_hedged(self, text, voice_type, output_file, voice_tone="standard", job=None, rate_setting="normal"):
+        """Start gTTS, add an offline render if it is slow, and keep whichever finishes first"""
+        deadline = self.duration_model.hedge_deadline("online", text, voice_tone, rate_setting)
+        results = queue.Queue()
+        cancelled = Event()
+        # Passing a job routes the backup through the killable worker process
+        backup_job = SynthesisJob("hedged backup")
+        online_file = output_file + ".online.part"
+        offline_file = output_file + ".offline.wav"
+        
+        def run_online():
+            start_time = time.time()
+            try:
+                success = self.generate_with_online_tts(text, online_file, job)
+            except SynthesisCancelled:
+                success = None
+            except Exception as e:
+                print(f"Hedged online attempt failed: {e}")
+                success = False
+            if success is not None:
+                # The online attempt's own timing is what the next deadline is based on
+                self.duration_model.observe("online", text, voice_tone, rate_setting, time.time() - start_time,
+                                            success)
+            results.put(("online", bool(success)))
+        
+        def run_offline():
+            success = False
+            try:
+                if not cancelled.is_set():
+                    success = self.generate_with_offline_tts(text, voice_type, offline_file, voice_tone, backup_job)
+            except SynthesisCancelled:
+                pass
+            except Exception as e:
+                print(f"Hedged offline attempt failed: {e}")
+            results.put(("offline", success))
+        
+        def next_result(timeout=None):
+            # Poll so a cancelled job stops waiting straight away
+            limit = None if timeout is None else time.time() + timeout
+            while True:
+                if job:
+                    job.check()
+                try:
+                    return results.get(timeout=CANCEL_POLL_SECONDS)
+                except queue.Empty:
+                    if limit is not None and time.time() >= limit:
+                        raise
+        
+        Thread(target=run_online, daemon=True).start()
+        pending = {"online"}
+        winner = None
+        try:
+            try:
+                first = next_result(deadline)
+                pending.discard(first[0])
+            except queue.Empty:
+                first = None
+            
+            if first is None or not first[1]:
+                reason = "failed" if first else f"exceeded {deadline:.2f}s deadline"
+                print(f"Online TTS {reason}, starting offline backup")
+                Thread(target=run_offline, daemon=True).start()
+                pending.add("offline")
+                while pending and winner is None:
+                    engine, success = next_result()
+                    pending.discard(engine)
+                    if success:
+                        winner = engine
+            else:
+                winner = first[0]
+        except SynthesisCancelled:
+            print("Hedged request cancelled, abandoning both attempts")
+        
+        # Cancel the loser: kill the offline worker, abandon the gTTS download
+        cancelled.set()
+        if "offline" in pending:
+            backup_job.cancel()
+        
+        def cleanup_losers(losers):
+            # Wait for the abandoned attempts so their partial files can be removed
+            waiting = pending & set(losers)
+            while waiting:
+                waiting.discard(results.get()[0])
+            for loser_file in losers.values():
+                self.remove_partial_file(loser_file)
+        
+        losers = {engine: loser_file for engine, loser_file in (("online", online_file), ("offline", offline_file))
+                  if engine != winner}
+        Thread(target=cleanup_losers, args=(losers,), daemon=True).start()
+        
+        if job:
+            job.check()
+        if winner is None:
             return False
+        os.replace(online_file if winner == "online" else offline_file, output_file)
+        print(f"Hedged request won by {winner} engine (deadline {deadline:.2f}s)")
+        return True
+
+    def reset_stream_pool(self):
+        """Kill the streaming workers mid-render and fail their rings so readers stop at once"""
+        self.stream_pool.kill()
+        for ring in list(self.active_rings):
+            ring.close(RING_FAILED)
+
+    def stream_offline_tts(self, text, voice_type, voice_tone, job=None, volume=None, rate_setting=None):
+        """Yield PCM from a pyttsx3 render in a worker process through the shared ring, as the driver writes it
+
+        Runs on a worker thread, so volume and rate_setting come from the caller, who
+        captured them on the Tk thread; None falls back to the render settings snapshot.
+        """
+        if volume is None:
+            volume = self.render_settings["volume"]
+        rate_setting = rate_setting or self.render_settings["rate"]
+        render_file = os.path.join(tempfile.gettempdir(), f"tts_ring_{time.time_ns()}.wav")
+        pool = self.stream_pool.get()
+        if pool is None:
+            # No worker processes: render in-process, then stream the finished file
+            try:
+                if not self.generate_with_offline_tts(text, voice_type, render_file, voice_tone, job):
+                    return
+                sample_rate, channels = probe_clip_format(render_file)
+                for block in iter_clip_blocks(render_file):
+                    if job:
+                        job.check()
+                    yield sample_rate, channels, float_to_pcm(block.ravel(), 2)
+            finally:
+                self.remove_partial_file(render_file)
+            return
+        
+        ring = SharedPCMRingBuffer.create()
+        self.active_rings.add(ring)
+        future = None
+        try:
+            future = pool.submit(_pyttsx3_ring_worker, ring, text, voice_type, voice_tone, volume, rate_setting,
+                                 render_file)
+            yield from ring.iter_blocks(alive=lambda: not future.done(), job=job)
+            future.result()
+        finally:
+            self.active_rings.discard(ring)
+            if future is not None and not future.done():
+                # Abandoned mid-render: runAndWait can't be interrupted, so the worker is killed
+                self.reset_stream_pool()
+                self.remove_partial_file(render_file)
+            ring.release()
+
+    def is_streamed(self, engine_name):
+        """Whether synthesize(play=True) with this engine already started playback"""
+        engine = self.engines.get(engine_name)
+        return bool(engine and engine.supports_streaming)
+
+    def play_pcm_stream(self, stream, output_file, play=True, job=None, volume=None):
+        """Write a PCM stream to a WAV file, playing each block as it arrives if requested"""
+        wav = None
+        player = None
+        start_time = time.perf_counter()
+        try:
+            if job:
+                job.check()
+            for sample_rate, channels, pcm in stream:
+                if job:
+                    job.check()
+                if wav is None:
+                    wav = wave.open(output_file, 'wb')
+                    wav.setnchannels(channels)
+                    wav.setsampwidth(2)
+                    wav.setframerate(sample_rate)
+                    if play:
+                        self.safe_stop_audio()
+                        player = StreamingPlayer(sample_rate, channels,
+                                                 self.render_settings["volume"] if volume is None else volume)
+                        self.stream_player = player
+                        self.is_playing = True
+                wav.writeframes(pcm)
+                if player and not player.stopped:
+                    player.feed(pcm)
+            if player:
+                player.flush()
+                if player.first_audio_time:
+                    print(f"Streaming playback started after "
+                          f"{(player.first_audio_time - start_time) * 1000:.0f} ms")
+                Thread(target=self._wait_stream_playback, args=(player,), daemon=True).start()
+        except SynthesisCancelled:
+            # Closing the generator stops the renderer (ring cancel / espeak kill); the
+            # renderers also check the job while they wait, so this can come from them
+            stream.close()
+            if player:
+                player.stop()
+            if wav is not None:
+                wav.close()
+                wav = None
+            self.remove_partial_file(output_file)
+            raise
+        finally:
+            if wav is not None:
+                wav.close()
+        return wav is not None and os.path.getsize(output_file) > 1000
+
+    def _wait_stream_playback(self, player):
+        """Clear the playing flag once a streamed clip has finished"""
+        player.wait()
+        if self.stream_player is player:
+            self.is_playing = False
+            print("Playback finished")
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, engine_name=None, play=False, job=None,
+                   rate_setting=None, volume=None):
+        """Render text with the selected (or routed) engine; return (engine used or None, error message)
+
+        The error travels with the result because renders run on several threads at
+        once. With play=True, streaming engines start playback while they render, so
+        the caller must not play the file again (see is_streamed). Raises
+        SynthesisCancelled if job is cancelled mid-render. Callers off the Tk thread
+        pass the rate_setting and volume they captured on it.
+        """
+        text = self.lexicon.apply(text)
+        engine_name = engine_name or self.render_settings["engine"]
+        if rate_setting is None:
+            rate_setting = self.render_settings["rate"]
+        if engine_name == "auto":
+            engine = self.engine_router.choose(self.engines, text, voice_type, voice_tone, rate_setting)
+        else:
+            engine = self.engines.get(engine_name)
+        if engine is None:
+            error = f"No engine available for '{engine_name}'"
+            print(error)
+            return None, error
+        
+        error = None
+        streamed = play and engine.supports_streaming
+        start_time = time.time()
+        try:
+            if streamed:
+                success = engine.synthesize_playing(text, voice_type, voice_tone, output_file, job=job, volume=volume,
+                                                    rate_setting=rate_setting)
+            else:
+                success = engine.synthesize(text, voice_type, voice_tone, output_file, job=job)
+        except SynthesisCancelled:
+            # A cancel says nothing about the engine's speed or reliability
+            print(f"⏹️ {engine.name} synthesis cancelled")
+            raise
+        except Exception as e:
+            print(f"❌ {engine.name} TTS error: {e}")
+            error = f"{engine.label} failed: {e}"
+            success = False
+        elapsed = time.time() - start_time
+        # A streamed play returns when the audio has been fed to the mixer, so its time is mostly playback
+        predicted = self.duration_model.observe(engine.name, text, voice_tone, rate_setting,
+                                                None if streamed else elapsed, bool(success))
+        self.duration_model.save()
+        
+        if success:
+            print(f"✅ {engine.name} TTS generation successful with {voice_tone} tone "
+                  f"({elapsed:.2f}s, estimated {predicted:.2f}s)")
+            return engine.name, None
+        return None, error
 
     def setup_ui(self):
         main_container = tk.Frame(self.root, bg=self.theme_colors[self.current_theme]["bg"])
@@ -479,14 +4329,7 @@ class AdvancedTextToSpeechConverter:
         tk.Label(quick_text_frame, text="Quick Text:", font=('Segoe UI', 10, 'bold'),
                 bg=colors["bg"], fg=colors["fg"]).pack(side=tk.LEFT, padx=(0, 10))
 
-        quick_texts = [
-            ("Hello World", "Hello, welcome to the ultimate text to speech converter!"),
-            ("Test Voice", "This is a test of the current voice settings and tone quality."),
-            ("Long Text", "This is a longer text to test how the text to speech converter handles extended content with proper pacing and natural sounding speech."),
-            ("Clear", "")
-        ]
-        
-        for text, content in quick_texts:
+        for text, content in QUICK_TEXTS:
             btn = self.create_hover_button(quick_text_frame, text, 
                                          lambda c=content: self.insert_quick_text(c),
                                          colors["button_bg"], colors["hover_bg"])
@@ -613,6 +4456,16 @@ class AdvancedTextToSpeechConverter:
                            selectcolor=colors["highlight"], font=('Segoe UI', 10))
         cb.pack(side=tk.LEFT)
 
+        # Post-processing setting
+        postprocess_frame = tk.Frame(audio_frame, bg=colors["card_bg"])
+        postprocess_frame.pack(fill=tk.X, pady=8)
+
+        cb = tk.Checkbutton(postprocess_frame, text="Trim silence and normalize loudness", 
+                           variable=self.postprocess_var, bg=colors["card_bg"], fg=colors["fg"],
+                           selectcolor=colors["highlight"], font=('Segoe UI', 10),
+                           command=self.save_settings)
+        cb.pack(side=tk.LEFT)
+
         # Application Settings Section
         app_frame = tk.LabelFrame(scrollable_frame, text="📱 Application Settings", font=('Segoe UI', 12, 'bold'),
                                 bg=colors["card_bg"], fg=colors["fg"], padx=15, pady=15,
@@ -645,6 +4498,39 @@ class AdvancedTextToSpeechConverter:
                            selectcolor=colors["highlight"], font=('Segoe UI', 10))
         cb.pack(side=tk.LEFT)
 
+        # Speculative synthesis setting
+        speculative_frame = tk.Frame(app_frame, bg=colors["card_bg"])
+        speculative_frame.pack(fill=tk.X, pady=8)
+
+        cb = tk.Checkbutton(speculative_frame, text="Pre-render sentences while typing (speculative)", 
+                           variable=self.speculative_var, bg=colors["card_bg"], fg=colors["fg"],
+                           selectcolor=colors["highlight"], font=('Segoe UI', 10),
+                           command=self.save_settings)
+        cb.pack(side=tk.LEFT)
+
+        # Profiling setting
+        profile_frame = tk.Frame(app_frame, bg=colors["card_bg"])
+        profile_frame.pack(fill=tk.X, pady=8)
+
+        cb = tk.Checkbutton(profile_frame, text=f"Profile generations (keeps the {PROFILE_KEEP_SLOWEST} slowest in {PROFILE_DIR}/)", 
+                           variable=self.profile_var, bg=colors["card_bg"], fg=colors["fg"],
+                           selectcolor=colors["highlight"], font=('Segoe UI', 10),
+                           command=self.save_settings)
+        cb.pack(side=tk.LEFT)
+
+        # Online request pacing setting
+        pacing_frame = tk.Frame(app_frame, bg=colors["card_bg"])
+        pacing_frame.pack(fill=tk.X, pady=8)
+
+        tk.Label(pacing_frame, text="Online requests/min (0 = off):", bg=colors["card_bg"], fg=colors["fg"],
+                font=('Segoe UI', 10)).pack(side=tk.LEFT)
+        tk.Spinbox(pacing_frame, from_=0, to=600, increment=5, textvariable=self.online_rate_var, width=6,
+                   command=self.save_settings).pack(side=tk.LEFT, padx=5)
+        tk.Label(pacing_frame, text="Burst:", bg=colors["card_bg"], fg=colors["fg"],
+                font=('Segoe UI', 10)).pack(side=tk.LEFT, padx=(10, 0))
+        tk.Spinbox(pacing_frame, from_=1, to=50, textvariable=self.online_burst_var, width=4,
+                   command=self.save_settings).pack(side=tk.LEFT, padx=5)
+
         # Reset Settings Section
         reset_frame = tk.LabelFrame(scrollable_frame, text="🔄 Reset & Actions", font=('Segoe UI', 12, 'bold'),
                                   bg=colors["card_bg"], fg=colors["fg"], padx=15, pady=15,
@@ -659,7 +4545,8 @@ class AdvancedTextToSpeechConverter:
             ("💾 Save Settings", self.save_settings, '#27ae60', '#229954'),
             ("🔄 Reset to Defaults", self.reset_settings, '#e74c3c', '#c0392b'),
             ("🗑️ Clear All History", self.clear_all_history, '#f39c12', '#e67e22'),
-            ("📊 Export Settings", self.export_settings, '#3498db', '#2980b9')
+            ("📊 Export Settings", self.export_settings, '#3498db', '#2980b9'),
+            ("📖 Edit Lexicon", self.open_lexicon, '#16a085', '#138d75')
         ]
 
         for i, (text, command, color, hover_color) in enumerate(actions):
@@ -794,6 +4681,12 @@ class AdvancedTextToSpeechConverter:
             self.theme_var.set("dark")
             self.engine_var.set("offline")
             self.accent_color_var.set("#00798c")
+            self.postprocess_var.set(False)
+            self.speculative_var.set(False)
+            self.profile_var.set(False)
+            self.online_rate_var.set(GTTS_RATE_PER_MINUTE)
+            self.online_burst_var.set(GTTS_BURST)
+            self.online_limiter.configure(GTTS_RATE_PER_MINUTE, GTTS_BURST)
             
             self.apply_theme()
             self.apply_accent_color()
@@ -804,7 +4697,11 @@ class AdvancedTextToSpeechConverter:
     def clear_all_history(self):
         """Clear all history"""
         if messagebox.askyesno("Clear History", "Are you sure you want to clear all history? This cannot be undone."):
+            for entry in self.history:
+                self.remove_waveform_sidecar(entry)
             self.history.clear()
+            self.history_index.clear()
+            self.export_selection.clear()
             self.save_history()
             self.refresh_history_display()
             self.settings_status.config(text="✓ All history cleared!")
@@ -824,6 +4721,26 @@ class AdvancedTextToSpeechConverter:
             except Exception as e:
                 messagebox.showerror("Export Error", f"Could not export settings: {e}")
 
+    def open_lexicon(self):
+        """Open the pronunciation lexicon in the system editor, creating an example first"""
+        path = os.path.abspath(self.lexicon.path)
+        try:
+            if not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({"nginx": "engine x", "SQL": "sequel", "Wi-Fi": "why fye"}, f, indent=4)
+            if sys.platform.startswith("win"):
+                os.startfile(path)
+            else:
+                subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", path])
+            self.settings_status.config(text=f"✓ Editing {os.path.basename(path)}, changes apply on save")
+        except Exception as e:
+            messagebox.showerror("Lexicon", f"Could not open {path}: {e}")
+
+    def on_lexicon_reload(self):
+        """Pre-rendered clips spoke the old pronunciations, so render them again"""
+        if self.settings.get("prerender_clips", True):
+            self.ui.post("warmup", self.request_warmup)
+
     def insert_quick_text(self, text):
         """Insert quick text into text area"""
         self.text_area.delete(1.0, tk.END)
@@ -918,10 +4835,8 @@ class AdvancedTextToSpeechConverter:
                                    relief=tk.RAISED, bd=2)
         engine_frame.pack(fill=tk.X, padx=20, pady=10)
 
-        engines = [
-            ("🌐 Online (gTTS)", "online", "High quality cloud-based voices"),
-            ("💻 Offline (System)", "offline", "Fast system voices with tone control")
-        ]
+        engines = [(engine.label, engine.name, engine.description) for engine in self.engines.values()]
+        engines.append(("🤖 Auto (Fastest)", "auto", "Routes each request by measured latency and errors"))
         
         for i, (text, engine, desc) in enumerate(engines):
             frame = tk.Frame(engine_frame, bg=colors["card_bg"])
@@ -981,7 +4896,8 @@ class AdvancedTextToSpeechConverter:
             ("🍑 Test Peach Tone", lambda: self.test_specific_tone("peach"), '#e74c3c', '#c0392b'),
             ("💆 Test Soothing", lambda: self.test_specific_tone("soothing"), '#9b59b6', '#8e44ad'),
             ("💎 Test Crystal", lambda: self.test_specific_tone("crystal"), '#1abc9c', '#16a085'),
-            ("🔄 Reset Engine", self.initialize_offline_engine, '#f39c12', '#e67e22')
+            ("🔄 Reset Engine", self.initialize_offline_engine, '#f39c12', '#e67e22'),
+            ("🧮 Compare All Voices", self.open_voice_comparison, '#27ae60', '#229954')
         ]
 
         test_btn_frame = tk.Frame(test_frame, bg=colors["card_bg"])
@@ -1033,6 +4949,27 @@ class AdvancedTextToSpeechConverter:
                                              colors["accent"], colors["highlight"])
         refresh_btn.pack(side=tk.RIGHT, padx=5)
         
+        # Search box filters as you type
+        self.history_search_var = tk.StringVar()
+        search_entry = tk.Entry(header_frame, textvariable=self.history_search_var, width=28,
+                                font=('Segoe UI', 10), bg=colors["text_bg"], fg=colors["fg"],
+                                insertbackground=colors["fg"], relief=tk.SUNKEN, bd=2)
+        search_entry.pack(side=tk.LEFT, padx=(20, 5))
+        tk.Label(header_frame, text="🔍", font=('Segoe UI', 11),
+                bg=colors["bg"], fg=colors["fg"]).pack(side=tk.LEFT)
+        self.history_search_after_id = None
+        self.history_search_var.trace_add("write", lambda *args: self.request_history_refresh())
+        
+        # Compilation export of the ticked clips
+        export_btn = self.create_hover_button(header_frame, "📦 Export Mix", self.export_history_compilation,
+                                            '#8e44ad', '#7d3c98')
+        export_btn.pack(side=tk.RIGHT, padx=5)
+        
+        # Transcription QA button
+        qa_btn = self.create_hover_button(header_frame, "🧪 QA Check", self.run_transcription_qa,
+                                        '#16a085', '#138d75')
+        qa_btn.pack(side=tk.RIGHT, padx=5)
+        
         # Clear button
         clear_btn = self.create_hover_button(header_frame, "🗑️ Clear", self.clear_history, 
                                            '#e74c3c', '#c0392b')
@@ -1068,8 +5005,15 @@ class AdvancedTextToSpeechConverter:
         """Handle mousewheel scrolling for history canvas"""
         self.history_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
 
+    def request_history_refresh(self):
+        """Debounce search keystrokes so the card list is rebuilt once typing pauses"""
+        if self.history_search_after_id:
+            self.root.after_cancel(self.history_search_after_id)
+        self.history_search_after_id = self.root.after(HISTORY_SEARCH_DEBOUNCE_MS, self.refresh_history_display)
+
     def refresh_history_display(self):
         """Refresh the history display with current data"""
+        self.history_search_after_id = None
         # Clear existing history cards
         for widget in self.history_scrollable_frame.winfo_children():
             widget.destroy()
@@ -1091,8 +5035,18 @@ class AdvancedTextToSpeechConverter:
             
             return
         
+        # Filter through the search index when a query is typed
+        entries = self.history
+        query = self.history_search_var.get()
+        matches = self.history_index.search(query)
+        if matches is not None:
+            entries = [entry for entry in self.history if entry["id"] in matches]
+            summary = f"🔍 {len(entries)} matching entries" if entries else f"🔍 No entries match \"{query.strip()}\""
+            tk.Label(self.history_scrollable_frame, text=summary, font=('Segoe UI', 10),
+                    bg=colors["bg"], fg='lightgray').pack(anchor='w', padx=5)
+        
         # Display history entries in reverse order (newest first)
-        for i, entry in enumerate(reversed(self.history)):
+        for i, entry in enumerate(reversed(entries[-HISTORY_DISPLAY_LIMIT:])):
             self.create_history_card(entry, i, colors)
 
     def create_history_card(self, entry, index, colors):
@@ -1150,10 +5104,25 @@ class AdvancedTextToSpeechConverter:
                                font=('Segoe UI', 9), bg=colors["card_bg"], fg='lightblue')
         details_label.pack(side=tk.LEFT)
         
+        # Waveform thumbnail, drawn once its peaks are loaded off the UI thread
+        waveform = tk.Canvas(bottom_frame, width=WAVEFORM_BUCKETS * 2, height=28, bg=colors["card_bg"],
+                             highlightthickness=0)
+        waveform.pack(side=tk.LEFT, padx=(15, 0))
+        self.request_waveform(entry.get("file", ""), waveform)
+        
         # Action buttons
         action_frame = tk.Frame(bottom_frame, bg=colors["card_bg"])
         action_frame.pack(side=tk.RIGHT)
         
+        # Export selection checkbox
+        export_var = tk.BooleanVar(value=entry.get("id") in self.export_selection)
+        export_check = tk.Checkbutton(action_frame, text="Mix", variable=export_var,
+                                      command=lambda e=entry, v=export_var: self.toggle_export_selection(e, v.get()),
+                                      bg=colors["card_bg"], fg=colors["fg"], selectcolor=colors["highlight"],
+                                      font=('Segoe UI', 8))
+        export_check.var = export_var
+        export_check.pack(side=tk.LEFT, padx=2)
+        
         # Play button
         play_btn = self.create_hover_button(action_frame, "▶️ Play", 
                                           lambda e=entry: self.play_history_audio(e),
@@ -1168,6 +5137,63 @@ class AdvancedTextToSpeechConverter:
         delete_btn.configure(font=('Segoe UI', 8))
         delete_btn.pack(side=tk.LEFT, padx=2)
 
+    def request_waveform(self, path, canvas):
+        """Draw a clip's waveform thumbnail now if cached, otherwise load it in the background"""
+        if path in self.waveform_cache:
+            self.waveform_cache.move_to_end(path)
+            self.draw_waveform(canvas, self.waveform_cache[path])
+            return
+        
+        def load():
+            # Every clip is named .wav, but gTTS clips hold MP3 data, which can't be memory-mapped
+            audio_format = sniff_audio_format(path)
+            if audio_format is None and not os.path.exists(path):
+                thumbnail = WAVEFORM_MISSING
+            elif audio_format != "wav":
+                thumbnail = WAVEFORM_NOT_WAV
+            else:
+                try:
+                    thumbnail = load_waveform_peaks(path)
+                except (OSError, ValueError) as e:
+                    print(f"Waveform thumbnail failed for {os.path.basename(path)}: {e}")
+                    thumbnail = WAVEFORM_NOT_WAV
+            self.ui.post(("waveform", str(canvas)), self._waveform_loaded, path, canvas, thumbnail)
+        self.waveform_executor.submit(load)
+
+    def _waveform_loaded(self, path, canvas, thumbnail):
+        self.waveform_cache[path] = thumbnail
+        while len(self.waveform_cache) > HISTORY_DISPLAY_LIMIT * 2:
+            self.waveform_cache.popitem(last=False)
+        if canvas.winfo_exists():
+            self.draw_waveform(canvas, thumbnail)
+
+    def draw_waveform(self, canvas, thumbnail):
+        """Render min/max peaks as vertical bars; flag missing, non-WAV, silent and truncated clips"""
+        canvas.delete("all")
+        height = int(canvas.cget("height"))
+        middle = height / 2
+        if thumbnail == WAVEFORM_MISSING:
+            canvas.create_text(4, middle, text="⚠️ file missing", anchor='w', fill='#e67e22',
+                               font=('Segoe UI', 8))
+            return
+        if thumbnail == WAVEFORM_NOT_WAV:
+            canvas.create_text(4, middle, text="🎵 MP3 clip, no preview", anchor='w', fill='lightgray',
+                               font=('Segoe UI', 8))
+            return
+        if thumbnail["level"] < WAVEFORM_SILENT_LEVEL:
+            color, note = '#e74c3c', "🔇 silent"
+        elif thumbnail["truncated"]:
+            color, note = '#e67e22', "⚠️ truncated"
+        else:
+            color, note = '#3498db', None
+        scale = (height - 4) / 2 / 127
+        for i, (low, high) in enumerate(thumbnail["peaks"]):
+            x = i * 2 + 1
+            canvas.create_line(x, middle - high * scale, x, middle - low * scale + 1, fill=color)
+        label = f"{thumbnail['duration']:.1f}s" + (f" {note}" if note else "")
+        canvas.create_text(int(canvas.cget("width")) - 2, 2, text=label, anchor='ne', fill='lightgray',
+                           font=('Segoe UI', 7))
+
     def play_history_audio(self, entry):
         """Play audio from history entry"""
         if os.path.exists(entry["file"]):
@@ -1177,23 +5203,245 @@ class AdvancedTextToSpeechConverter:
             messagebox.showwarning("File Not Found", 
                                  "The audio file for this entry no longer exists.")
 
+    def toggle_export_selection(self, entry, selected):
+        if selected:
+            self.export_selection.add(entry.get("id"))
+        else:
+            self.export_selection.discard(entry.get("id"))
+
+    def export_history_compilation(self):
+        """Ask for gap and output format, then join the ticked history clips into one WAV"""
+        entries = [e for e in self.history if e.get("id") in self.export_selection]
+        if not entries:
+            messagebox.showinfo("Export Mix", "Tick \"Mix\" on the history clips you want to combine.")
+            return
+        
+        colors = self.theme_colors[self.current_theme]
+        dialog = tk.Toplevel(self.root)
+        dialog.title("📦 Export Mix")
+        dialog.configure(bg=colors["bg"], padx=20, pady=15)
+        dialog.transient(self.root)
+        
+        tk.Label(dialog, text=f"{len(entries)} clips, oldest first", bg=colors["bg"], fg=colors["fg"],
+                 font=('Segoe UI', 11, 'bold')).grid(row=0, column=0, columnspan=2, sticky='w', pady=(0, 10))
+        
+        gap_var = tk.IntVar(value=self.settings.get("export_gap_ms", EXPORT_GAP_MS))
+        rate_choices = {"Match first clip" if rate == 0 else f"{rate} Hz": rate for rate in EXPORT_SAMPLE_RATES}
+        channel_choices = {"Match first clip": 0, "Mono": 1, "Stereo": 2}
+        rate_var = tk.StringVar(value=next((label for label, rate in rate_choices.items()
+                                            if rate == self.settings.get("export_sample_rate", 0)),
+                                           "Match first clip"))
+        channel_var = tk.StringVar(value=next((label for label, count in channel_choices.items()
+                                               if count == self.settings.get("export_channels", 0)),
+                                              "Match first clip"))
+        
+        fields = [
+            ("Silence gap (ms):", tk.Spinbox(dialog, from_=0, to=10000, increment=100, textvariable=gap_var, width=10)),
+            ("Sample rate:", ttk.Combobox(dialog, textvariable=rate_var, values=list(rate_choices), state="readonly")),
+            ("Channels:", ttk.Combobox(dialog, textvariable=channel_var, values=list(channel_choices), state="readonly"))
+        ]
+        for row, (label, widget) in enumerate(fields, 1):
+            tk.Label(dialog, text=label, bg=colors["bg"], fg=colors["fg"],
+                     font=('Segoe UI', 10)).grid(row=row, column=0, sticky='w', pady=4)
+            widget.grid(row=row, column=1, sticky='ew', pady=4, padx=(10, 0))
+        
+        def start_export():
+            try:
+                gap_ms = max(0, gap_var.get())
+            except tk.TclError:
+                messagebox.showwarning("Export Mix", "The silence gap must be a whole number of milliseconds.")
+                return
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".wav",
+                filetypes=[("WAV files", "*.wav")],
+                initialfile=f"mix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav",
+                title="Export Mix"
+            )
+            if not filename:
+                return
+            self.settings.update({
+                "export_gap_ms": gap_ms,
+                "export_sample_rate": rate_choices[rate_var.get()],
+                "export_channels": channel_choices[channel_var.get()]
+            })
+            self.save_settings()
+            dialog.destroy()
+            self.status_var.set(f"📦 Exporting {len(entries)} clips...")
+            Thread(target=self._export_compilation_thread,
+                   args=([e["file"] for e in entries], filename, gap_ms,
+                         self.settings["export_sample_rate"], self.settings["export_channels"]),
+                   daemon=True).start()
+        
+        export_btn = self.create_hover_button(dialog, "📦 Export", start_export, '#8e44ad', '#7d3c98')
+        export_btn.grid(row=len(fields) + 1, column=0, columnspan=2, sticky='ew', pady=(12, 0))
+
+    def _export_compilation_thread(self, paths, output_file, gap_ms, sample_rate, channels):
+        """Background thread for the compilation export"""
+        try:
+            start_time = time.time()
+            stats = export_compilation(paths, output_file, gap_ms, sample_rate, channels)
+            seconds = stats["frames"] / stats["sample_rate"] if stats["clips"] else 0
+            print(f"Exported {stats['clips']} clips ({seconds:.1f}s of audio, {stats['sample_rate']} Hz, "
+                  f"{stats['channels']} ch) in {time.time() - start_time:.2f}s")
+            if not stats["clips"]:
+                self.set_status("❌ Export failed: none of the clips could be read")
+                self.show_error_async("Export Mix", "None of the selected clips could be read.")
+                return
+            skipped = f", {len(stats['skipped'])} missing clips skipped" if stats["skipped"] else ""
+            self.set_status(f"📦 Exported {stats['clips']} clips ({seconds:.0f}s) to "
+                            f"{os.path.basename(output_file)}{skipped}")
+        except Exception as e:
+            self.set_status("❌ Export failed")
+            self.show_error_async("Export Mix", f"Could not export mix: {e}")
+
     def delete_history_entry(self, entry):
         """Delete a history entry"""
         if messagebox.askyesno("Delete Entry", "Are you sure you want to delete this history entry?"):
             self.history = [e for e in self.history if e != entry]
+            self.history_index.remove(entry.get("id"))
+            self.export_selection.discard(entry.get("id"))
+            self.remove_waveform_sidecar(entry)
             self.save_history()
             self.refresh_history_display()
             self.settings_status.config(text="✓ History entry deleted!")
 
+    def remove_waveform_sidecar(self, entry):
+        """Drop a history clip's cached thumbnail and its .peaks file"""
+        self.waveform_cache.pop(entry["file"], None)
+        try:
+            os.remove(entry["file"] + ".peaks")
+        except OSError:
+            pass
+
     def clear_history(self):
         """Clear all history with confirmation"""
         if messagebox.askyesno("Clear History", 
                              "Are you sure you want to clear all history? This cannot be undone."):
+            for entry in self.history:
+                self.remove_waveform_sidecar(entry)
             self.history.clear()
+            self.history_index.clear()
+            self.export_selection.clear()
             self.save_history()
             self.refresh_history_display()
             self.settings_status.config(text="✓ All history cleared!")
 
+    def run_transcription_qa(self):
+        """Transcribe history clips back to text and report word error rates"""
+        if self.is_processing:
+            messagebox.showwarning("Warning", "Please wait, processing previous request...")
+            return
+        
+        if not qa_recognizer_available():
+            messagebox.showinfo("QA Check", "Transcription QA needs the offline recognizer.\n\n"
+                                            "Install it with: pip install pocketsphinx")
+            return
+        entries = [e for e in self.history if os.path.exists(e.get("file", ""))]
+        if not entries:
+            messagebox.showinfo("QA Check", "No history clips available to check.")
+            return
+        
+        self.status_var.set(f"🧪 Transcribing {len(entries)} clips for QA...")
+        Thread(target=self._transcription_qa_thread, args=(entries,), daemon=True).start()
+
+    def _transcription_qa_thread(self, entries):
+        """Background thread running the QA transcription across a process pool"""
+        try:
+            self.is_processing = True
+            start_time = time.time()
+            results = []
+            
+            # Legacy entries only kept the first 100 characters, which can't be scored against a full clip
+            scorable = []
+            for entry in entries:
+                if "full_text" in entry or not entry["text"].endswith("..."):
+                    scorable.append(entry)
+                    continue
+                results.append({"file": entry["file"], "transcript": "", "wer": None, "duration": 0.0,
+                                "chunks": 0, "error": None, "skipped": "partial (no full text saved)",
+                                "elapsed": 0.0, "timestamp": entry.get("timestamp", "")})
+            
+            workers = max(1, min(len(scorable), os.cpu_count() or 1))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_qa_worker) as pool:
+                pending = deque(scorable)
+                futures = {}
+                
+                def submit():
+                    entry = pending.popleft()
+                    futures[pool.submit(transcribe_clip_for_qa, entry["file"],
+                                        entry.get("full_text", entry["text"]))] = entry
+                
+                done = 0
+                try:
+                    # Transcription is batch work: the governor decides how many clips run at once
+                    while pending or futures:
+                        while pending and len(futures) < workers and self.governor.try_acquire():
+                            submit()
+                        if not futures:
+                            if self.governor.acquire(timeout=self.governor.interval):
+                                submit()
+                            continue
+                        finished, _ = future_wait(list(futures), timeout=self.governor.interval,
+                                                  return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            entry = futures.pop(future)
+                            self.governor.release()
+                            result = future.result()
+                            result["timestamp"] = entry.get("timestamp", "")
+                            results.append(result)
+                            done += 1
+                            self.set_status(f"🧪 QA progress: {done}/{len(scorable)} clips")
+                finally:
+                    for _ in futures:
+                        self.governor.release()
+            
+            report = self.build_qa_report(results, time.time() - start_time, workers)
+            with open('tts_qa_report.json', 'w') as f:
+                json.dump(report, f, indent=4)
+            
+            summary = report["summary"]
+            self.set_status(f"🧪 QA done: {summary['flagged']} flagged, "
+                            f"{summary['failed']} failed of {summary['clips']} clips")
+            self.ui.call(messagebox.showinfo, "QA Report",
+                         f"Clips checked: {summary['clips']}\n"
+                         f"Skipped (MP3 or partial text): {summary['skipped']}\n"
+                         f"Failed to transcribe: {summary['failed']}\n"
+                         f"Flagged (WER > {QA_WER_THRESHOLD:.0%}): {summary['flagged']}\n"
+                         f"Mean WER: {summary['mean_wer']:.1%}\n\n"
+                         f"Audio processed: {summary['audio_seconds']:.1f}s "
+                         f"in {summary['wall_seconds']:.1f}s on {workers} workers\n"
+                         f"Throughput: {summary['clips_per_second']:.2f} clips/s, "
+                         f"{summary['realtime_factor']:.1f}x realtime\n\n"
+                         f"Full report saved to tts_qa_report.json")
+        except Exception as e:
+            self.show_error_async("QA Error", f"Transcription QA failed: {e}")
+            self.set_status("❌ QA check error")
+        finally:
+            self.is_processing = False
+
+    def build_qa_report(self, results, wall_seconds, workers):
+        """Summarize per-clip QA results with throughput numbers"""
+        skipped = [r for r in results if r["skipped"]]
+        scored = [r for r in results if r["error"] is None and not r["skipped"]]
+        audio_seconds = sum(r["duration"] for r in scored)
+        wall_seconds = max(wall_seconds, 1e-6)
+        summary = {
+            "clips": len(results),
+            "skipped": len(skipped),
+            "failed": len(results) - len(scored) - len(skipped),
+            "flagged": sum(1 for r in scored if r["wer"] > QA_WER_THRESHOLD),
+            "mean_wer": sum(r["wer"] for r in scored) / len(scored) if scored else 0.0,
+            "audio_seconds": audio_seconds,
+            "wall_seconds": wall_seconds,
+            "workers": workers,
+            "clips_per_second": (len(results) - len(skipped)) / wall_seconds,
+            "realtime_factor": audio_seconds / wall_seconds
+        }
+        results = sorted(results, key=lambda r: float("inf") if r["wer"] is None else r["wer"], reverse=True)
+        return {"generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "summary": summary, "clips": results}
+
     def show_quick_actions(self):
         """Show quick actions dialog"""
         messagebox.showinfo("Quick Actions", 
@@ -1211,8 +5459,25 @@ class AdvancedTextToSpeechConverter:
                               font=('Segoe UI', 10), relief=tk.SUNKEN, anchor='w', padx=10)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-    def get_tone_name(self):
-        """Get display name for current tone"""
+    def set_status(self, message):
+        """Update the status bar from any thread"""
+        self.ui.post("status", self.status_var.set, message)
+
+    def set_test_status(self, message):
+        """Update the voice test status label from any thread"""
+        self.ui.post("test_status", self.test_status.config, text=message)
+
+    def show_error_async(self, title, message):
+        """Show an error dialog from any thread"""
+        self.ui.call(messagebox.showerror, title, message)
+
+    def refresh_history_if_visible(self):
+        """Refresh history cards only when the History tab is showing (Tk thread only)"""
+        if self.notebook.index(self.notebook.select()) == 2:  # History tab index
+            self.refresh_history_display()
+
+    def get_tone_name(self, voice_tone=None):
+        """Get display name for a tone, by default the current one (Tk thread only)"""
         tone_names = {
             "standard": "Standard",
             "peach": "Peach Soft", 
@@ -1221,79 +5486,232 @@ class AdvancedTextToSpeechConverter:
             "deep": "Deep Voice",
             "soft": "Soft Whisper"
         }
-        return tone_names.get(self.voice_tone_var.get(), "Standard")
+        return tone_names.get(voice_tone or self.voice_tone_var.get(), "Standard")
 
     def test_specific_tone(self, tone):
         """Test a specific voice tone"""
         self.voice_tone_var.set(tone)
         self.test_current_voice()
 
+    def open_voice_comparison(self):
+        """Render one text across every voice, tone and speed and show the clips in a grid"""
+        if self.comparison_window and self.comparison_window.winfo_exists():
+            self.comparison_window.lift()
+            return
+        
+        text = self.text_area.get(1.0, tk.END).strip()
+        if not text or text == "Enter your text here and click Generate & Play. You can type anything you want to convert to speech.":
+            text = TEST_TEXTS["standard"]
+        
+        colors = self.theme_colors[self.current_theme]
+        window = tk.Toplevel(self.root)
+        window.title("🧮 Voice Comparison")
+        window.configure(bg=colors["bg"])
+        self.comparison_window = window
+        
+        tk.Label(window, text=f"“{text[:80]}{'...' if len(text) > 80 else ''}”", bg=colors["bg"],
+                 fg=colors["fg"], font=('Segoe UI', 10, 'italic'), wraplength=520).pack(padx=15, pady=(12, 6))
+        
+        grid = tk.Frame(window, bg=colors["card_bg"], padx=10, pady=10, relief=tk.RAISED, bd=2)
+        grid.pack(fill=tk.BOTH, expand=True, padx=15, pady=5)
+        
+        speed_labels = {"slow": "🐢 Slow", "normal": "🚶 Normal", "fast": "🐇 Fast"}
+        tk.Label(grid, text="Voice / Tone", bg=colors["card_bg"], fg=colors["fg"],
+                 font=('Segoe UI', 10, 'bold')).grid(row=0, column=0, sticky='w', padx=5, pady=4)
+        for column, rate_setting in enumerate(COMPARISON_RATES, 1):
+            tk.Label(grid, text=speed_labels[rate_setting], bg=colors["card_bg"], fg=colors["fg"],
+                     font=('Segoe UI', 10, 'bold')).grid(row=0, column=column, padx=5, pady=4)
+        
+        cells = {}
+        rows = {}
+        for voice_type, voice_tone, rate_setting in comparison_combinations():
+            if (voice_type, voice_tone) not in rows:
+                rows[(voice_type, voice_tone)] = len(rows) + 1
+                tk.Label(grid, text=f"{'👨' if voice_type == 'male' else '👩'} {voice_tone.capitalize()}",
+                         bg=colors["card_bg"], fg=colors["fg"], font=('Segoe UI', 10)
+                         ).grid(row=rows[(voice_type, voice_tone)], column=0, sticky='w', padx=5, pady=3)
+            cell = tk.Button(grid, text="⏳ Rendering...", state=tk.DISABLED, width=18,
+                             bg=colors["sidebar_bg"], fg=colors["fg"], font=('Segoe UI', 9), cursor='hand2')
+            cell.grid(row=rows[(voice_type, voice_tone)], column=COMPARISON_RATES.index(rate_setting) + 1,
+                      padx=4, pady=3, sticky='ew')
+            cells[(voice_type, voice_tone, rate_setting)] = cell
+        
+        summary = tk.Label(window, text=f"🔄 Rendering {len(cells)} clips on {COMPARISON_WORKERS} workers...",
+                           bg=colors["bg"], fg='#f1c40f', font=('Segoe UI', 10, 'bold'))
+        summary.pack(pady=(6, 12))
+        
+        pool = KillableProcessPool("Comparison", max_workers=COMPARISON_WORKERS, initializer=_batch_worker_init)
+        executor = pool.get()
+        if executor is None:
+            summary.config(text="❌ Worker processes are unavailable on this system", fg='#e74c3c')
+            return
+        cancelled = Event()
+        output_dir = os.path.join(tempfile.gettempdir(), "tts_comparison", datetime.now().strftime('%Y%m%d_%H%M%S'))
+        os.makedirs(output_dir, exist_ok=True)
+        
+        def on_close():
+            # Closing the window abandons the renders still running and drops the clips
+            cancelled.set()
+            pool.kill(restart=False)
+            window.destroy()
+            shutil.rmtree(output_dir, ignore_errors=True)
+        window.protocol("WM_DELETE_WINDOW", on_close)
+        
+        Thread(target=self._voice_comparison_thread, args=(executor, text, cells, summary, cancelled, output_dir),
+               daemon=True).start()
+
+    def _voice_comparison_thread(self, pool, text, cells, summary, cancelled, output_dir):
+        """Feed comparison cells to the worker pool shortest-first and fill the grid as clips finish"""
+        volume = self.render_settings["volume"]
+        start_time = time.time()
+        
+        pending = ShortestJobQueue()
+        for combo in cells:
+            pending.push(combo, self.duration_model.predict("offline", text, combo[1], combo[2]))
+        
+        futures = {}
+        
+        def fill():
+            # Only as many clips as the governor allows are in flight, so the queue order decides what runs next
+            while len(pending) and len(futures) < COMPARISON_WORKERS and self.governor.try_acquire():
+                combo, estimate, _ = pending.pop()
+                path = os.path.join(output_dir, "_".join(combo) + ".wav")
+                future = pool.submit(_render_comparison_clip, text, *combo, volume, path)
+                futures[future] = (combo, path, estimate, time.time())
+        
+        completed = 0
+        rendered = 0
+        render_seconds = 0.0
+        try:
+            fill()
+            while (futures or len(pending)) and not cancelled.is_set():
+                finished, _ = future_wait(list(futures), timeout=self.governor.interval, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    combo, path, estimate, submitted = futures.pop(future)
+                    completed += 1
+                    try:
+                        seconds, size = future.result()
+                        rendered += 1
+                        render_seconds += seconds
+                        self.duration_model.observe("offline", text, combo[1], combo[2], seconds)
+                    except Exception as e:
+                        print(f"Comparison render failed for {combo}: {e}")
+                        seconds = size = None
+                    self.governor.release(seconds, estimate)
+                    self.ui.post(("comparison", combo), self.update_comparison_cell, cells[combo], path, seconds, size)
+                fill()
+                now = time.time()
+                remaining = pending.remaining_estimate() + sum(max(0.0, estimate - (now - submitted))
+                                                               for _, _, estimate, submitted in futures.values())
+                self.ui.post("comparison-summary", self.update_comparison_summary, summary,
+                             f"🔄 {completed}/{len(cells)} clips finished on {len(futures)} workers · about "
+                             f"{remaining / max(1, len(futures)):.0f}s left")
+        finally:
+            for _ in futures:
+                self.governor.release()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.duration_model.save(force=True)
+        
+        if cancelled.is_set():
+            print("Voice comparison cancelled")
+            return
+        elapsed = time.time() - start_time
+        speedup = render_seconds / elapsed if elapsed else 0
+        print(f"Voice comparison: {rendered}/{len(cells)} clips in {elapsed:.1f}s, "
+              f"{render_seconds:.1f}s of rendering ({speedup:.1f}x parallel speed-up)")
+        self.ui.post("comparison-summary", self.update_comparison_summary, summary,
+                     f"✅ {rendered}/{len(cells)} clips in {elapsed:.1f}s ({speedup:.1f}x parallel) — click to play")
+
+    def update_comparison_cell(self, cell, path, seconds, size):
+        """Turn a finished grid cell into a play button with render time and file size"""
+        if not cell.winfo_exists():
+            return
+        if seconds is None:
+            cell.config(text="❌ Failed")
+            return
+        cell.config(text=f"▶ {seconds:.1f}s · {size / 1024:.0f} KB", state=tk.NORMAL,
+                    command=lambda: self.play_audio_safe(path))
+
+    def update_comparison_summary(self, summary, text):
+        if summary.winfo_exists():
+            summary.config(text=text)
+
     def test_current_voice(self):
         """Test the current voice settings with selected tone"""
         if self.is_processing:
             self.test_status.config(text="⏳ Please wait...")
             return
             
-        def test_thread():
+        def test_thread(signature):
+            job = self.start_job("voice test")
+            path = None
             try:
                 self.is_processing = True
-                voice_type = self.voice_var.get()
-                voice_tone = self.voice_tone_var.get()
-                tone_name = self.get_tone_name()
-                
-                self.test_status.config(text=f"🎵 Testing {voice_type} voice with {tone_name} tone...")
+                voice_type = self.render_settings["voice"]
+                voice_tone = self.render_settings["tone"]
+                tone_name = self.get_tone_name(voice_tone)
                 
-                self.safe_stop_audio()
-                time.sleep(0.5)
-                
-                # Different test texts for different tones
-                test_texts = {
-                    "standard": "Hello, this is the standard voice tone. Clear and natural sounding.",
-                    "peach": "Welcome to the peach soft tone. Warm and gentle like a summer breeze.",
-                    "soothing": "This is the soothing voice tone. Perfect for relaxation and calm moments.",
-                    "crystal": "Crystal clear voice tone. Sharp pronunciation for perfect understanding.",
-                    "deep": "This is the deep voice tone. Rich and powerful for professional use.",
-                    "soft": "Soft whisper tone. Gentle and intimate for personal content."
-                }
+                self.set_test_status(f"🎵 Testing {voice_type} voice with {tone_name} tone...")
                 
-                test_text = test_texts.get(voice_tone, test_texts["standard"])
+                test_text = TEST_TEXTS.get(voice_tone, TEST_TEXTS["standard"])
                 filename = f"test_{voice_type}_{voice_tone}_{datetime.now().strftime('%H%M%S')}.wav"
                 path = os.path.join(os.getcwd(), filename)
                 
-                success = False
-                if self.engine_var.get() == "online":
-                    try:
-                        tts = gtts.gTTS(text=test_text, lang='en')
-                        tts.save(path)
-                        success = True
-                    except Exception as e:
-                        self.test_status.config(text=f"❌ Online TTS failed: {e}")
-                else:
-                    success = self.generate_with_offline_tts(test_text, voice_type, path, voice_tone)
+                # Pre-rendered clips play straight away, from a private copy a re-render can't delete
+                if self.warmup_cache.copy_to(signature, voice_type, voice_tone, test_text, path):
+                    if self.play_audio_safe(path):
+                        self.set_test_status(f"✅ {tone_name} tone test successful!")
+                        self.set_status(f"🎉 {voice_type.capitalize()} voice with {tone_name} tone test completed")
+                        return
+                    self.remove_partial_file(path)
+                
+                self.safe_stop_audio()
+                time.sleep(0.5)
+                
+                success, error = self.synthesize(test_text, voice_type, voice_tone, path, play=True, job=job,
+                                                 rate_setting=signature[1], volume=signature[2])
+                job.check()
                 
                 if success and os.path.exists(path):
-                    self.test_status.config(text=f"🔊 Playing {tone_name} tone...")
-                    if self.play_audio_safe(path):
-                        self.test_status.config(text=f"✅ {tone_name} tone test successful!")
-                        self.status_var.set(f"🎉 {voice_type.capitalize()} voice with {tone_name} tone test completed")
+                    self.postprocess_audio(path)
+                    self.set_test_status(f"🔊 Playing {tone_name} tone...")
+                    if self.is_streamed(success) or self.play_audio_safe(path):
+                        self.set_test_status(f"✅ {tone_name} tone test successful!")
+                        self.set_status(f"🎉 {voice_type.capitalize()} voice with {tone_name} tone test completed")
                     else:
-                        self.test_status.config(text=f"⚠️ {tone_name} tone generated but playback failed")
+                        self.set_test_status(f"⚠️ {tone_name} tone generated but playback failed")
                 else:
-                    self.test_status.config(text=f"❌ {tone_name} tone generation failed")
-                
-                # Cleanup
-                try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                except:
-                    pass
+                    self.set_test_status(f"❌ {tone_name} tone generation failed"
+                                         + (f": {error}" if error else ""))
                     
+            except SynthesisCancelled:
+                pass
             except Exception as e:
-                self.test_status.config(text=f"❌ Error: {str(e)}")
+                self.set_test_status(f"❌ Error: {str(e)}")
             finally:
+                # Test clips are never kept, whether rendered, copied from the warm cache or cancelled
+                try:
+                    if path and os.path.exists(path):
+                        os.remove(path)
+                except OSError:
+                    pass
                 self.is_processing = False
+                latency = self.finish_job(job)
+                if latency is not None:
+                    self.set_test_status(f"⏹️ Test cancelled ({latency * 1000:.0f} ms to idle)")
                 
-        Thread(target=test_thread, daemon=True).start()
+        # Settings are read here on the Tk thread; the warm-up signature itself lags them by the debounce
+        Thread(target=self.run_profiled, args=("voice_test", self.profile_var.get(), test_thread,
+                                               self.get_warmup_signature()), daemon=True).start()
+
+    def run_profiled(self, label, enabled, func, *args):
+        """Run a generation under cProfile/tracemalloc when enabled in Settings or via TTS_PROFILE
+
+        enabled is the Settings checkbox, read by the caller on the Tk thread.
+        """
+        if enabled or os.environ.get(PROFILE_ENV_VAR, "0") not in ("", "0"):
+            return self.profiler.run(label, func, *args)
+        return func(*args)
 
     def generate_and_play(self):
         """Generate speech and play immediately"""
@@ -1307,74 +5725,100 @@ class AdvancedTextToSpeechConverter:
             return
         
         self.status_var.set("🔄 Generating speech...")
-        Thread(target=self._generate_and_play_thread, args=(text,), daemon=True).start()
+        Thread(target=self.run_profiled,
+               args=("generate", self.profile_var.get(), self._generate_and_play_thread, text,
+                     self.get_warmup_signature()), daemon=True).start()
 
-    def _generate_and_play_thread(self, text):
-        """Background thread for speech generation and playback"""
+    def _generate_and_play_thread(self, text, signature):
+        """Background thread for speech generation and playback, with the render settings read on the Tk thread"""
+        rate_setting = signature[1]
+        job = self.start_job("generation")
+        path = None
+        progress = None
         try:
             self.is_processing = True
             
-            self.safe_stop_audio()
-            time.sleep(0.5)
-            
-            voice_type = self.voice_var.get()
-            voice_tone = self.voice_tone_var.get()
-            engine = self.engine_var.get()
+            voice_type = self.render_settings["voice"]
+            voice_tone = self.render_settings["tone"]
+            engine = self.render_settings["engine"]
             
             filename = f"speech_{voice_type}_{voice_tone}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
             path = os.path.join(os.getcwd(), filename)
             
-            success = False
-            if engine == "online":
+            # Quick texts are usually pre-rendered already
+            warm_clip = self.warmup_cache.copy_to(signature, voice_type, voice_tone, text, path)
+            
+            self.safe_stop_audio()
+            
+            speculation = None
+            error = None
+            if not warm_clip:
+                progress = self.show_progress("🔄 Generating speech",
+                                              self.estimate_duration(text, engine, voice_tone))
+            if warm_clip:
+                success = True
+                print("✅ Using pre-rendered clip")
+            elif self.speculation_supported(engine):
                 try:
-                    tts = gtts.gTTS(text=text, lang='en')
-                    tts.save(path)
-                    success = True
-                    print("✅ Online TTS generation successful")
-                except Exception as e:
-                    print(f"❌ Online TTS error: {e}")
-                    messagebox.showerror("Error", f"Online TTS failed: {e}")
+                    success, error, hits, total = self.render_with_speculation(text, voice_type, voice_tone, path,
+                                                                               engine, signature, job)
+                    speculation = f" (⚡ {hits}/{total} sentences pre-rendered)"
+                except ValueError as e:
+                    print(f"Speculative clips could not be joined, rendering in one pass: {e}")
+                    success, error = self.synthesize(text, voice_type, voice_tone, path, engine, play=True, job=job,
+                                                     rate_setting=rate_setting, volume=signature[2])
             else:
-                success = self.generate_with_offline_tts(text, voice_type, path, voice_tone)
-                if success:
-                    print(f"✅ Offline TTS generation successful with {voice_tone} tone")
-                else:
-                    print("❌ Offline TTS generation failed")
+                success, error = self.synthesize(text, voice_type, voice_tone, path, engine, play=True, job=job,
+                                                 rate_setting=rate_setting, volume=signature[2])
+            
+            if progress:
+                progress.set()
+            
+            # Stop pressed after the render finished: don't start playback
+            job.check()
             
             if success and os.path.exists(path):
+                if not warm_clip:
+                    self.postprocess_audio(path)
                 self.current_audio_file = path
-                tone_name = self.get_tone_name()
+                tone_name = self.get_tone_name(voice_tone)
                 
                 # Add to history with all required fields including timestamp
                 history_entry = {
                     "text": text[:100] + "..." if len(text) > 100 else text,
+                    "full_text": text,
                     "voice": voice_type,
                     "tone": tone_name,
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     "file": path
                 }
-                self.history.append(history_entry)
-                self.save_history()
+                self.add_history_entry(history_entry)
                 
                 # Refresh history display if we're on the history tab
-                if self.notebook.index(self.notebook.select()) == 2:  # History tab index
-                    self.refresh_history_display()
+                self.ui.post("history", self.refresh_history_if_visible)
                 
-                self.status_var.set(f"🎵 {tone_name} tone speech generated! Playing now...")
+                self.set_status(f"🎵 {tone_name} tone speech generated! Playing now...")
                 
-                if self.play_audio_safe(path):
-                    self.status_var.set("✅ Audio playing successfully!")
+                if (not speculation and self.is_streamed(success)) or self.play_audio_safe(path):
+                    self.set_status("✅ Audio playing successfully!" + (speculation or ""))
                 else:
-                    self.status_var.set("⚠️ Generation successful but playback failed")
+                    self.set_status("⚠️ Generation successful but playback failed")
             else:
-                self.status_var.set("❌ Speech generation failed")
-                messagebox.showerror("Error", "Could not generate speech file")
+                self.set_status("❌ Speech generation failed")
+                self.show_error_async("Error", error or "Could not generate speech file")
                 
+        except SynthesisCancelled:
+            self.remove_partial_file(path)
         except Exception as e:
-            messagebox.showerror("Error", f"Speech generation failed: {str(e)}")
-            self.status_var.set("❌ Generation error")
+            self.show_error_async("Error", f"Speech generation failed: {str(e)}")
+            self.set_status("❌ Generation error")
         finally:
+            if progress:
+                progress.set()
             self.is_processing = False
+            latency = self.finish_job(job)
+            if latency is not None:
+                self.set_status(f"⏹️ Generation cancelled ({latency * 1000:.0f} ms to idle)")
 
     def play_audio(self):
         """Play the generated audio"""
@@ -1394,9 +5838,65 @@ class AdvancedTextToSpeechConverter:
             messagebox.showwarning("Warning", "No audio file available. Please generate speech first.")
 
     def stop_audio(self):
-        """Stop audio playback"""
+        """Stop audio playback and cancel any synthesis in flight"""
+        cancelling = self.cancel_current_job()
         self.safe_stop_audio()
-        self.status_var.set("⏹️ Audio stopped")
+        self.status_var.set("⏹️ Cancelling generation..." if cancelling else "⏹️ Audio stopped")
+
+    def start_job(self, label):
+        """Register a cancellable synthesis job as the one Stop applies to"""
+        job = SynthesisJob(label)
+        self.current_job = job
+        return job
+
+    def cancel_current_job(self):
+        """Cancel the synthesis in flight, if any; return whether there was one"""
+        job = self.current_job
+        if job is None or job.cancelled:
+            return False
+        job.cancel()
+        print(f"⏹️ Cancelling {job.label}...")
+        if self.active_rings:
+            # A pyttsx3 render can't be interrupted; kill it so its ring reader stops at once
+            self.reset_stream_pool()
+        return True
+
+    def estimate_duration(self, text, engine_name, voice_tone):
+        """Predicted synthesis seconds; for auto routing, the fastest engine the router could pick"""
+        names = list(self.engines) if engine_name == "auto" else [engine_name]
+        return min(self.duration_model.predict(name, text, voice_tone, self.render_settings["rate"]) for name in names)
+
+    def show_progress(self, label, estimate):
+        """Count the status bar down against a duration estimate; set the returned Event to stop"""
+        done = Event()
+        start_time = time.time()
+        
+        def tick():
+            if done.is_set():
+                return
+            elapsed = time.time() - start_time
+            if elapsed < estimate:
+                self.status_var.set(f"{label}... {elapsed / estimate:.0%} · about {estimate - elapsed:.1f}s left")
+            else:
+                self.status_var.set(f"{label}... {elapsed:.1f}s (estimated {estimate:.1f}s)")
+            self.root.after(250, tick)
+        
+        self.ui.call(tick)
+        return done
+
+    def finish_job(self, job):
+        """Clear the current job; return its cancel-to-idle latency if it was cancelled"""
+        if self.current_job is job:
+            self.current_job = None
+        if job.cancel_requested_at is None:
+            return None
+        latency = time.perf_counter() - job.cancel_requested_at
+        self.cancel_latencies.append(latency)
+        ordered = sorted(self.cancel_latencies)
+        print(f"Cancel-to-idle latency {latency * 1000:.0f} ms "
+              f"(p50 {ordered[len(ordered) // 2] * 1000:.0f} ms, max {ordered[-1] * 1000:.0f} ms "
+              f"over {len(ordered)} cancels)")
+        return latency
 
     def save_audio(self):
         """Save audio file to desired location"""
@@ -1426,7 +5926,1008 @@ class AdvancedTextToSpeechConverter:
     def show_settings_tab(self):
         self.notebook.select(3)
 
+    def on_close(self):
+        """Flush the throttled duration model before the window goes away"""
+        self.duration_model.save(force=True)
+        self.root.destroy()
+
+
+# Soak test settings
+SOAK_SAMPLE_EVERY = 50
+SOAK_HISTORY_SIZE = 50
+SOAK_WARMUP_FRACTION = 0.25
+# Small enough for the clip cache to fill during warm-up, so its growth isn't read as a leak
+SOAK_CLIP_CACHE_BYTES = 4 * 1024 * 1024
+# Largest growth tolerated across the measured part of the run
+SOAK_THRESHOLDS = {"rss_mb": 32.0, "threads": 3, "fds": 8, "widgets": 50}
+
+
+class SoakStubEngine(TTSEngine):
+    """Instant stand-in engine for the soak harness; not registered, never shown in the UI"""
+    name = "soak-stub"
+    label = "🧪 Soak stub"
+    routable = False
+
+    def synthesize(self, text, voice_type, voice_tone, output_file, job=None):
+        t = np.arange(4410) / 22050
+        with wave.open(output_file, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(float_to_pcm(0.3 * np.sin(2 * np.pi * (200 + len(text) % 200) * t), 2))
+        return True
+
+
+def process_resources():
+    """Resident memory (MB), thread count and open file descriptors; None where unavailable"""
+    rss_mb = fds = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss_mb = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+        fds = len(os.listdir('/proc/self/fd'))
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+            process = psutil.Process()
+            rss_mb = process.memory_info().rss / 1e6
+            fds = process.num_handles() if hasattr(process, "num_handles") else process.num_fds()
+        except ImportError:
+            pass
+    return {"rss_mb": rss_mb, "threads": active_count(), "fds": fds}
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def resource_trends(samples, thresholds=SOAK_THRESHOLDS):
+    """Least-squares growth of each metric across the samples; return (report lines, failed metrics)"""
+    lines = []
+    failed = []
+    for metric, limit in thresholds.items():
+        points = [(s["cycle"], s[metric]) for s in samples if s.get(metric) is not None]
+        if len(points) < 3:
+            lines.append(f"  {metric:8} not measured")
+            continue
+        cycles, values = np.array(points, dtype=np.float64).T
+        growth = np.polyfit(cycles, values, 1)[0] * (cycles[-1] - cycles[0])
+        if growth > limit:
+            failed.append(metric)
+        lines.append(f"  {metric:8} {values[0]:9.1f} -> {values[-1]:9.1f}   trend {growth:+8.1f} "
+                     f"(limit +{limit}) {'❌' if growth > limit else '✅'}")
+    return lines, failed
+
+
+def report_soak(samples, thresholds=SOAK_THRESHOLDS):
+    """Print the growth of each metric after warm-up; return True when none passes its threshold"""
+    lines, failed = resource_trends(samples[int(len(samples) * SOAK_WARMUP_FRACTION):], thresholds)
+    print("Soak results after warm-up:")
+    for line in lines:
+        print(line)
+    print(f"❌ Upward trend in: {', '.join(failed)}" if failed else "✅ No resource growth past the thresholds")
+    return not failed
+
+
+def run_headless_soak(cycles=2000, sample_every=SOAK_SAMPLE_EVERY, thresholds=SOAK_THRESHOLDS):
+    """The soak cycle without Tk: render, post-process, thumbnail, index and load each clip for playback
+
+    Covers the non-UI half of a generate/play/history cycle on machines without a
+    display; widget counts are not measured.
+    """
+    work_dir = tempfile.mkdtemp(prefix="tts_soak_")
+    samples = []
+    engine = SoakStubEngine(None)
+    sounds = ClipSoundCache(SOAK_CLIP_CACHE_BYTES)
+    index = HistorySearchIndex()
+    history = deque()
+    try:
+        if not pygame.mixer.get_init():
+            init_mixer()
+        print(f"Headless soak test: {cycles} cycles, sampling every {sample_every}")
+        start_time = time.time()
+        for cycle in range(1, cycles + 1):
+            text = f"Soak cycle {cycle}. {QUICK_TEXTS[cycle % 3][1]}"
+            path = os.path.join(work_dir, f"speech_{cycle}.wav")
+            engine.synthesize(text, "male", "standard", path)
+            postprocess_wav(path)
+            load_waveform_peaks(path)
+            sounds.get(path)
+            index.add(cycle, text)
+            index.search("soak cycle")
+            history.append((cycle, path))
+            # Keep the history a steady size so only leaks can grow
+            while len(history) > SOAK_HISTORY_SIZE:
+                entry_id, old_path = history.popleft()
+                index.remove(entry_id)
+                for old_file in (old_path, old_path + ".peaks"):
+                    try:
+                        os.remove(old_file)
+                    except OSError:
+                        pass
+            
+            if cycle % sample_every == 0:
+                sample = process_resources()
+                sample.update(cycle=cycle, widgets=None)
+                samples.append(sample)
+                print(f"  cycle {cycle:>6}: rss {sample['rss_mb'] or 0:7.1f} MB, threads {sample['threads']:>3}, "
+                      f"fds {sample['fds'] or 0:>4} ({cycle / (time.time() - start_time):.1f} cycles/s)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report_soak(samples, thresholds)
+
+
+def run_soak(cycles=2000, sample_every=SOAK_SAMPLE_EVERY, thresholds=SOAK_THRESHOLDS):
+    """Drive generate/play/history-refresh cycles against a stub engine and check for resource growth
+
+    Runs in a scratch directory so real settings and history are untouched. Returns True
+    when no metric grows past its threshold after the warm-up part of the run. Without a
+    display it falls back to run_headless_soak.
+    """
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display for the UI soak ({e}), running the headless cycle instead")
+        return run_headless_soak(cycles, sample_every, thresholds)
+    work_dir = tempfile.mkdtemp(prefix="tts_soak_")
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    samples = []
+    try:
+        with open('tts_settings.json', 'w') as f:
+            json.dump({"prerender_clips": False, "speculative_synthesis": False}, f)
+        root.withdraw()
+        app = AdvancedTextToSpeechConverter(root)
+        app.engines[SoakStubEngine.name] = SoakStubEngine(app)
+        app.engine_var.set(SoakStubEngine.name)
+        app.notebook.select(2)  # History tab, so refreshes rebuild the cards
+        
+        print(f"Soak test: {cycles} cycles, sampling every {sample_every}")
+        start_time = time.time()
+        for cycle in range(1, cycles + 1):
+            app._generate_and_play_thread(f"Soak cycle {cycle}. {QUICK_TEXTS[cycle % 3][1]}",
+                                          app.get_warmup_signature())
+            app.refresh_history_display()
+            # Keep the history a steady size so only leaks can grow
+            while len(app.history) > SOAK_HISTORY_SIZE:
+                entry = app.history.pop(0)
+                app.history_index.remove(entry["id"])
+                for path in (entry["file"], entry["file"] + ".peaks"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            root.update()
+            
+            if cycle % sample_every == 0:
+                sample = process_resources()
+                sample.update(cycle=cycle, widgets=count_widgets(root))
+                samples.append(sample)
+                print(f"  cycle {cycle:>6}: rss {sample['rss_mb'] or 0:7.1f} MB, threads {sample['threads']:>3}, "
+                      f"fds {sample['fds'] or 0:>4}, widgets {sample['widgets']:>5} "
+                      f"({cycle / (time.time() - start_time):.1f} cycles/s)")
+        app.safe_stop_audio()
+    finally:
+        os.chdir(previous_dir)
+        try:
+            root.destroy()
+        except tk.TclError:
+            pass
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report_soak(samples, thresholds)
+
+
+# Distributed worker settings
+BROKER_URL = "sqlite:///tts_broker.sqlite"
+BROKER_LEASE_SECONDS = 30.0
+BROKER_MAX_ATTEMPTS = 3
+BROKER_POLL_SECONDS = 1.0
+# PRAGMA user_version of the current broker schema (2 added estimate/priority for shortest-first leasing)
+BROKER_SCHEMA_VERSION = 2
+# A pyttsx3 render still running after this many lease periods is treated as wedged
+BROKER_RENDER_TIMEOUT_LEASES = 4
+# Output format each headless engine produces
+WORKER_FORMATS = {"offline": "wav", "espeak": "wav", "online": "mp3"}
+
+# Broker registry: URL scheme -> broker class
+BROKER_REGISTRY = {}
+
+
+def register_broker(broker_class):
+    """Class decorator that makes a broker backend available by URL scheme"""
+    BROKER_REGISTRY[broker_class.scheme] = broker_class
+    return broker_class
+
+
+def open_broker(url=BROKER_URL):
+    """Open a broker from a URL such as sqlite:///tts_broker.sqlite"""
+    scheme, _, location = url.partition("://")
+    if scheme not in BROKER_REGISTRY:
+        raise ValueError(f"Unknown broker '{scheme}' (available: {', '.join(BROKER_REGISTRY)})")
+    return BROKER_REGISTRY[scheme](location)
+
+
+def broker_job_spec(text, voice="male", tone="standard", rate="normal", engine="offline", audio_format=None,
+                    volume=1.0, postprocess=False, target_dbfs=-20.0):
+    """Validated job description that any worker can render"""
+    if engine not in WORKER_FORMATS:
+        raise ValueError(f"Engine '{engine}' can't run on a worker (available: {', '.join(WORKER_FORMATS)})")
+    audio_format = audio_format or WORKER_FORMATS[engine]
+    if audio_format != WORKER_FORMATS[engine]:
+        raise ValueError(f"Engine '{engine}' produces {WORKER_FORMATS[engine]}, not {audio_format}")
+    if tone not in TONE_SETTINGS:
+        raise ValueError(f"Unknown tone '{tone}'")
+    return {"text": text, "voice": voice, "tone": tone, "rate": rate, "engine": engine,
+            "format": audio_format, "volume": volume, "postprocess": postprocess, "target_dbfs": target_dbfs}
+
+
+class JobBroker(ABC):
+    """Shared queue that workers lease synthesis jobs from and settle them back to
+
+    A lease expires unless the worker renews it, so a job held by a dead worker
+    goes back to the queue until it has been attempted max_attempts times.
+    """
+    scheme = ""
+
+    @abstractmethod
+    def submit(self, spec, estimate=0.0):
+        """Queue a job from broker_job_spec() with its predicted seconds; return its id"""
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=BROKER_LEASE_SECONDS):
+        """Claim the next queued job as (job_id, spec), or None when the queue is empty
+
+        Jobs go shortest-predicted-first, aged by SJF_AGING_PER_SECOND so long ones don't starve.
+        """
+
+    @abstractmethod
+    def renew(self, job_id, worker_id, lease_seconds=BROKER_LEASE_SECONDS):
+        """Extend a lease; False means it expired and the job may be running elsewhere"""
+
+    @abstractmethod
+    def complete(self, job_id, worker_id, audio, audio_format, busy_seconds):
+        """Store a finished job's audio; False if the lease was lost and the result is discarded"""
+
+    @abstractmethod
+    def fail(self, job_id, worker_id, error, busy_seconds, retry=True):
+        """Record a failed attempt; return the job's new status ('queued' or 'failed')"""
+
+    @abstractmethod
+    def status(self, job_id):
+        """Dict of a job's status, attempts, worker, error and audio_format"""
+
+    @abstractmethod
+    def result(self, job_id):
+        """(audio_format, audio_bytes) for a finished job, else None"""
+
+    @abstractmethod
+    def list_jobs(self, status):
+        """Ids of the jobs with this status, oldest first"""
+
+    @abstractmethod
+    def queue_counts(self):
+        """Number of jobs in each status"""
+
+    @abstractmethod
+    def backlog_seconds(self):
+        """Predicted seconds of work still queued or leased"""
+
+    @abstractmethod
+    def worker_stats(self):
+        """Per-worker totals and throughput"""
+
+
+@register_broker
+class SQLiteBroker(JobBroker):
+    """Broker in one SQLite file: fine for tests, one host, or a shared filesystem with working locks"""
+    scheme = "sqlite"
+
+    def __init__(self, location, max_attempts=BROKER_MAX_ATTEMPTS, aging_per_second=SJF_AGING_PER_SECOND):
+        # sqlite:///relative.sqlite and sqlite:////absolute/path.sqlite, as in other database URLs
+        self.path = location[1:] if location.startswith("/") else location
+        self.max_attempts = max_attempts
+        self.aging_per_second = aging_per_second
+        with self.transaction() as db:
+            # Every job ages at the same rate, so estimate + aging * submitted orders by aged priority
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, spec TEXT NOT NULL, status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_expires REAL, error TEXT,
+                audio BLOB, audio_format TEXT, submitted REAL NOT NULL, finished REAL,
+                estimate REAL NOT NULL DEFAULT 0, priority REAL NOT NULL DEFAULT 0)""")
+            self._migrate(db)
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_schedule ON jobs (status, priority, id)")
+            db.execute("""CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY, jobs_done INTEGER NOT NULL DEFAULT 0,
+                jobs_failed INTEGER NOT NULL DEFAULT 0, leases_lost INTEGER NOT NULL DEFAULT 0,
+                chars INTEGER NOT NULL DEFAULT 0, busy_seconds REAL NOT NULL DEFAULT 0,
+                first_seen REAL NOT NULL, last_seen REAL NOT NULL)""")
+
+    def _migrate(self, db):
+        """Bring a queue file written by an older version up to BROKER_SCHEMA_VERSION"""
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version >= BROKER_SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+        if "estimate" not in columns:
+            db.execute("ALTER TABLE jobs ADD COLUMN estimate REAL NOT NULL DEFAULT 0")
+        if "priority" not in columns:
+            db.execute("ALTER TABLE jobs ADD COLUMN priority REAL NOT NULL DEFAULT 0")
+            # Jobs queued before estimates existed keep their first-come order
+            db.execute("UPDATE jobs SET priority = estimate + ? * submitted", (self.aging_per_second,))
+        # Version 1 indexed (status, id) under this name, which leasing by priority can't use
+        db.execute("DROP INDEX IF EXISTS jobs_status")
+        db.execute(f"PRAGMA user_version = {BROKER_SCHEMA_VERSION}")
+        if "priority" not in columns:
+            print(f"Broker queue {self.path} upgraded to schema version {BROKER_SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self):
+        """Connection inside BEGIN IMMEDIATE, so a read-then-claim can't race another worker"""
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def _touch_worker(self, db, worker_id, now):
+        db.execute("INSERT OR IGNORE INTO workers (worker_id, first_seen, last_seen) VALUES (?, ?, ?)",
+                   (worker_id, now, now))
+        db.execute("UPDATE workers SET last_seen = ? WHERE worker_id = ?", (now, worker_id))
+
+    def _expire_leases(self, db, now):
+        """Requeue (or give up on) jobs whose worker stopped renewing"""
+        expired = db.execute("SELECT id, worker, attempts FROM jobs WHERE status = 'leased' AND lease_expires < ?",
+                             (now,)).fetchall()
+        for job_id, worker_id, attempts in expired:
+            if attempts >= self.max_attempts:
+                db.execute("UPDATE jobs SET status = 'failed', worker = NULL, finished = ?, error = ? WHERE id = ?",
+                           (now, f"Lease expired on {attempts} attempts", job_id))
+            else:
+                db.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ?", (job_id,))
+            db.execute("UPDATE workers SET leases_lost = leases_lost + 1 WHERE worker_id = ?", (worker_id,))
+
+    def submit(self, spec, estimate=0.0):
+        with self.transaction() as db:
+            now = time.time()
+            cursor = db.execute("INSERT INTO jobs (spec, status, submitted, estimate, priority) "
+                                "VALUES (?, 'queued', ?, ?, ?)",
+                                (json.dumps(spec), now, estimate, estimate + self.aging_per_second * now))
+            return cursor.lastrowid
+
+    def lease(self, worker_id, lease_seconds=BROKER_LEASE_SECONDS):
+        with self.transaction() as db:
+            now = time.time()
+            self._expire_leases(db, now)
+            self._touch_worker(db, worker_id, now)
+            row = db.execute("SELECT id, spec FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1"
+                             ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                       "WHERE id = ?", (worker_id, now + lease_seconds, row[0]))
+            return row[0], json.loads(row[1])
+
+    def renew(self, job_id, worker_id, lease_seconds=BROKER_LEASE_SECONDS):
+        with self.transaction() as db:
+            now = time.time()
+            self._touch_worker(db, worker_id, now)
+            return db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased' "
+                              "AND lease_expires >= ?", (now + lease_seconds, job_id, worker_id, now)).rowcount > 0
+
+    def complete(self, job_id, worker_id, audio, audio_format, busy_seconds):
+        with self.transaction() as db:
+            now = time.time()
+            self._touch_worker(db, worker_id, now)
+            claimed = db.execute("UPDATE jobs SET status = 'done', audio = ?, audio_format = ?, finished = ?, "
+                                 "error = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+                                 (sqlite3.Binary(audio), audio_format, now, job_id, worker_id)).rowcount > 0
+            if claimed:
+                spec = json.loads(db.execute("SELECT spec FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+                db.execute("UPDATE workers SET jobs_done = jobs_done + 1, chars = chars + ?, "
+                           "busy_seconds = busy_seconds + ? WHERE worker_id = ?",
+                           (len(spec["text"]), busy_seconds, worker_id))
+            return claimed
+
+    def fail(self, job_id, worker_id, error, busy_seconds, retry=True):
+        with self.transaction() as db:
+            now = time.time()
+            self._touch_worker(db, worker_id, now)
+            db.execute("UPDATE workers SET jobs_failed = jobs_failed + 1, busy_seconds = busy_seconds + ? "
+                       "WHERE worker_id = ?", (busy_seconds, worker_id))
+            row = db.execute("SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'",
+                             (job_id, worker_id)).fetchone()
+            if row is None:
+                return self.status(job_id, db)["status"]
+            status = "queued" if retry and row[0] < self.max_attempts else "failed"
+            db.execute("UPDATE jobs SET status = ?, worker = NULL, error = ?, finished = ? WHERE id = ?",
+                       (status, str(error), now if status == "failed" else None, job_id))
+            return status
+
+    def status(self, job_id, db=None):
+        if db is None:
+            with self.transaction() as db:
+                return self.status(job_id, db)
+        row = db.execute("SELECT status, attempts, worker, error, audio_format FROM jobs WHERE id = ?",
+                         (job_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("status", "attempts", "worker", "error", "audio_format"), row), id=job_id)
+
+    def result(self, job_id):
+        with self.transaction() as db:
+            row = db.execute("SELECT audio_format, audio FROM jobs WHERE id = ? AND status = 'done'",
+                             (job_id,)).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def list_jobs(self, status):
+        with self.transaction() as db:
+            return [row[0] for row in db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id", (status,))]
+
+    def queue_counts(self):
+        with self.transaction() as db:
+            self._expire_leases(db, time.time())
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def backlog_seconds(self):
+        with self.transaction() as db:
+            return db.execute("SELECT COALESCE(SUM(estimate), 0) FROM jobs WHERE status IN ('queued', 'leased')"
+                              ).fetchone()[0]
+
+    def worker_stats(self):
+        with self.transaction() as db:
+            rows = db.execute("SELECT worker_id, jobs_done, jobs_failed, leases_lost, chars, busy_seconds, "
+                              "first_seen, last_seen FROM workers ORDER BY worker_id").fetchall()
+        stats = []
+        for worker_id, done, failed, lost, chars, busy, first_seen, last_seen in rows:
+            active_minutes = max(last_seen - first_seen, 1e-6) / 60
+            stats.append({"worker": worker_id, "jobs_done": done, "jobs_failed": failed, "leases_lost": lost,
+                          "jobs_per_minute": done / active_minutes,
+                          "chars_per_busy_second": chars / busy if busy else 0.0,
+                          "last_seen": last_seen})
+        return stats
+
+
+def render_job_spec(spec, output_file, limiter=None, process_pool=None, job=None, lexicon=None, timeout=None):
+    """Render one job spec to output_file without the app, using the headless path for its engine
+
+    process_pool is a KillableProcessPool: a pyttsx3 render that outlives timeout
+    seconds has its worker killed and raises TimeoutError.
+    """
+    engine = spec["engine"]
+    text = lexicon.apply(spec["text"]) if lexicon else spec["text"]
+    if engine == "online":
+        save_gtts_parallel(gtts.gTTS(text=text, lang='en'), output_file, job=job, limiter=limiter)
+        return True
+    if engine == "espeak":
+        wav = None
+        try:
+            for sample_rate, channels, pcm in stream_espeak_pcm(text, spec["voice"], spec["tone"],
+                                                                 spec["volume"], spec["rate"], job=job):
+                if wav is None:
+                    wav = wave.open(output_file, 'wb')
+                    wav.setnchannels(channels)
+                    wav.setsampwidth(2)
+                    wav.setframerate(sample_rate)
+                wav.writeframes(pcm)
+        finally:
+            if wav is not None:
+                wav.close()
+        success = wav is not None
+    else:
+        success = _render_pyttsx3_spec(spec, text, output_file, process_pool, job, timeout)
+    if success and spec.get("postprocess") and spec["format"] == "wav":
+        stats = postprocess_wav(output_file, target_dbfs=spec.get("target_dbfs", -20.0))
+        print(f"Post-processed job audio: trimmed {stats['trimmed_frames']} frames, gain {stats['gain_db']:+.1f} dB")
+    return success
+
+
+def _render_pyttsx3_spec(spec, text, output_file, process_pool=None, job=None, timeout=None):
+    """Render with pyttsx3 in a worker process, as in the app, so one bad render can't wedge the caller
+
+    Renders share process_pool, so one killed because another render timed out is
+    resubmitted within the same lease instead of being failed and losing an attempt.
+    """
+    render = (_pyttsx3_render_worker, text, spec["voice"], spec["tone"], spec["volume"], spec["rate"], output_file)
+    if not process_pool or process_pool.get() is None:
+        return render[0](*render[1:])
+    while True:
+        generation = process_pool.generation
+        executor = process_pool.get()
+        try:
+            future = executor.submit(*render) if executor else None
+        except (BrokenProcessPool, RuntimeError):
+            future = None  # Killed between get() and submit
+        if future is not None:
+            deadline = time.monotonic() + timeout if timeout else None
+            while not future.done():
+                if job:
+                    # A lost lease drops the result; the render finishes in its process
+                    job.check()
+                if deadline and time.monotonic() > deadline:
+                    process_pool.kill()
+                    raise TimeoutError(f"pyttsx3 render still running after {timeout:.0f}s, worker killed")
+                future_wait([future], timeout=CANCEL_POLL_SECONDS)
+            try:
+                return future.result()
+            except (BrokenProcessPool, CancelledError):
+                pass
+        if process_pool.closed:
+            raise RuntimeError("pyttsx3 worker pool was shut down mid-render")
+        if process_pool.generation == generation:
+            # Nobody killed the pool, so this render's own worker died
+            process_pool.kill()
+            raise RuntimeError("pyttsx3 render worker died")
+        print("♻️ pyttsx3 render lost its worker to another render's timeout, resubmitting")
+
+
+class SynthesisWorker:
+    """Leases jobs from a broker, renders them headless and pushes the audio and status back"""
+    
+    def __init__(self, broker, worker_id=None, lease_seconds=BROKER_LEASE_SECONDS,
+                 poll_seconds=BROKER_POLL_SECONDS, renderer=None, duration_model=None, governor=None):
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.renderer = renderer or self.render
+        self.stopped = Event()
+        self.limiter = TokenBucket()
+        self.lexicon = PronunciationLexicon()
+        self.duration_model = duration_model or DurationModel()
+        self.governor = governor or ConcurrencyGovernor()
+        self.pool = KillableProcessPool("Worker synthesis", self.governor.max_limit, _batch_worker_init)
+
+    def render(self, spec, output_file, job):
+        return render_job_spec(spec, output_file, self.limiter, self.pool, job, self.lexicon,
+                               timeout=self.lease_seconds * BROKER_RENDER_TIMEOUT_LEASES)
+
+    def _keep_lease(self, job_id, done, job):
+        """Renew the lease until the render finishes; cancel the render if the broker gave the job away"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.broker.renew(job_id, self.worker_id, self.lease_seconds):
+                    job.cancel()
+                    return
+            except Exception as e:
+                print(f"Lease renewal failed for job {job_id}: {e}")
+
+    def run_once(self):
+        """Process one job; return False when the queue was empty"""
+        leased = self.broker.lease(self.worker_id, self.lease_seconds)
+        if leased is None:
+            return False
+        self.process(*leased)
+        return True
+
+    def process(self, job_id, spec):
+        """Render a leased job and settle it with the broker"""
+        output_file = os.path.join(tempfile.gettempdir(),
+                                   f"tts_job_{job_id}_{self.worker_id}.{spec['format']}".replace(os.sep, "_"))
+        done = Event()
+        job = SynthesisJob(f"broker job {job_id}")
+        Thread(target=self._keep_lease, args=(job_id, done, job), daemon=True).start()
+        start_time = time.time()
+        try:
+            if not self.renderer(spec, output_file, job) or not os.path.exists(output_file):
+                raise RuntimeError("renderer produced no audio")
+            with open(output_file, 'rb') as f:
+                audio = f.read()
+            done.set()
+            elapsed = time.time() - start_time
+            predicted = self.duration_model.observe(spec["engine"], spec["text"], spec["tone"], spec["rate"], elapsed)
+            self.duration_model.save()
+            if self.broker.complete(job_id, self.worker_id, audio, spec["format"], elapsed):
+                print(f"✅ Job {job_id} done in {elapsed:.1f}s, estimated {predicted:.1f}s ({len(audio)} bytes)")
+            else:
+                print(f"⚠️ Lease on job {job_id} was lost, result discarded")
+        except SynthesisCancelled:
+            print(f"⚠️ Lease on job {job_id} was lost, render abandoned")
+        except Exception as e:
+            done.set()
+            status = self.broker.fail(job_id, self.worker_id, e, time.time() - start_time)
+            print(f"❌ Job {job_id} failed ({status}): {e}")
+        finally:
+            done.set()
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+
+    def _process_governed(self, job_id, spec):
+        estimate = self.duration_model.predict(spec["engine"], spec["text"], spec["tone"], spec["rate"])
+        start_time = time.time()
+        try:
+            self.process(job_id, spec)
+        finally:
+            self.governor.release(time.time() - start_time, estimate)
+
+    def run(self, max_jobs=None):
+        """Work until stopped (or max_jobs have been leased), running as many jobs as the governor allows"""
+        print(f"👷 Worker {self.worker_id} polling {self.broker.scheme} broker")
+        processed = 0
+        running = []
+        interrupted = False
+        try:
+            while not self.stopped.is_set() and (max_jobs is None or processed < max_jobs):
+                if not self.governor.acquire(timeout=self.poll_seconds):
+                    continue
+                leased = self.broker.lease(self.worker_id, self.lease_seconds)
+                if leased is None:
+                    self.governor.release()
+                    self.stopped.wait(self.poll_seconds)
+                    continue
+                processed += 1
+                thread = Thread(target=self._process_governed, args=leased, daemon=True)
+                thread.start()
+                running = [t for t in running if t.is_alive()] + [thread]
+        except KeyboardInterrupt:
+            # Don't wait for the renders: their leases expire and another worker retries them
+            interrupted = True
+            self.pool.kill(restart=False)
+            raise
+        finally:
+            if not interrupted:
+                for thread in running:
+                    thread.join()
+                self.pool.shutdown()
+            self.duration_model.save(force=True)
+        return processed
+
+
+def print_broker_status(broker, lease_seconds=BROKER_LEASE_SECONDS):
+    counts = broker.queue_counts()
+    workers = broker.worker_stats()
+    active = sum(1 for stats in workers if time.time() - stats["last_seen"] < 2 * lease_seconds)
+    print("Jobs: " + ", ".join(f"{status} {counts.get(status, 0)}"
+                               for status in ("queued", "leased", "done", "failed"))
+          + f" · ETA {broker.backlog_seconds() / max(1, active):.0f}s with {active} active workers")
+    for stats in workers:
+        print(f"  {stats['worker']}: {stats['jobs_done']} done, {stats['jobs_failed']} failed, "
+              f"{stats['leases_lost']} leases lost, {stats['jobs_per_minute']:.1f} jobs/min, "
+              f"{stats['chars_per_busy_second']:.0f} chars/s busy")
+
+
+def benchmark_broker(workers=4, jobs=60, render_seconds=0.05):
+    """Run stub workers against a scratch SQLite broker, with one worker dying mid-job"""
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        broker = open_broker("sqlite:///" + os.path.join(work_dir, "broker.sqlite"))
+        model = DurationModel(model_file=None)
+        for i in range(jobs):
+            text = f"Job number {i} " * (1 + i % 5)
+            broker.submit(broker_job_spec(text), model.predict("offline", text))
+        
+        # A worker that takes a job and dies without renewing or settling it
+        dead_job, _ = broker.lease("dead-worker", lease_seconds=0.5)
+        
+        def stub_renderer(spec, output_file, job):
+            time.sleep(render_seconds * (1 + len(spec["text"]) / 60))
+            with wave.open(output_file, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(22050)
+                wav.writeframes(b"\0\0" * 2205)
+            return True
+        
+        pool = [SynthesisWorker(broker, f"worker-{i}", lease_seconds=2.0, poll_seconds=0.1, renderer=stub_renderer,
+                                duration_model=model)
+                for i in range(workers)]
+        start_time = time.perf_counter()
+        threads = [Thread(target=worker.run, daemon=True) for worker in pool]
+        for thread in threads:
+            thread.start()
+        while broker.queue_counts().get("done", 0) + broker.queue_counts().get("failed", 0) < jobs:
+            time.sleep(0.1)
+        elapsed = time.perf_counter() - start_time
+        for worker in pool:
+            worker.stopped.set()
+        for thread in threads:
+            thread.join()
+        
+        print(f"Broker benchmark: {jobs} jobs, {workers} workers, {elapsed:.1f}s "
+              f"({jobs * 60 / elapsed:.0f} jobs/min)")
+        print(f"Job {dead_job} held by a dead worker: {broker.status(dead_job)}")
+        print_broker_status(broker)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Async facade settings: concurrent renders allowed per engine
+ASYNC_ENGINE_LIMITS = {"offline": 2, "espeak": 4, "online": 4}
+ASYNC_STREAM_BLOCK_FRAMES = 4096
+# Blocks a stream may run ahead of its consumer
+ASYNC_STREAM_QUEUE_BLOCKS = 8
+
+
+class AsyncSynthesizer:
+    """asyncio facade over the headless engines for embedding in async services
+
+    Blocking renders run in executors owned by the facade (threads, plus spawn
+    processes for pyttsx3) and a semaphore per engine bounds how many run at once,
+    so the event loop never blocks:
+
+        async with AsyncSynthesizer() as tts:
+            path = await tts.synthesize("Hello", engine="espeak")
+            paths = await asyncio.gather(*(tts.synthesize(t) for t in texts))
+            async for sample_rate, channels, pcm in tts.synthesize_stream("Hello", engine="espeak"):
+                ...
+    """
+    
+    def __init__(self, limits=None, limiter=None, output_dir=None, renderer=None):
+        self.limits = dict(ASYNC_ENGINE_LIMITS, **(limits or {}))
+        self.limiter = limiter or TokenBucket()
+        self.output_dir = output_dir or tempfile.gettempdir()
+        self.renderer = renderer or self.render
+        self.threads = ThreadPoolExecutor(max_workers=sum(self.limits.values()) + 1,
+                                          thread_name_prefix="tts-async")
+        self.processes = KillableProcessPool("Async synthesis", max_workers=self.limits["offline"])
+        self.lexicon = PronunciationLexicon()
+        self.semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        self.processes.kill(restart=False)
+
+    def render(self, spec, output_file, job):
+        return render_job_spec(spec, output_file, self.limiter, self.processes, job, self.lexicon,
+                               timeout=BROKER_LEASE_SECONDS * BROKER_RENDER_TIMEOUT_LEASES)
+
+    def semaphore(self, engine):
+        if engine not in self.semaphores:
+            self.semaphores[engine] = asyncio.Semaphore(self.limits.get(engine, 1))
+        return self.semaphores[engine]
+
+    async def synthesize(self, text, voice="male", tone="standard", rate="normal", engine="offline",
+                         output_file=None, volume=1.0):
+        """Render text and return the audio file path; raises RuntimeError if the engine produced nothing"""
+        spec = broker_job_spec(text, voice, tone, rate, engine, volume=volume)
+        if output_file is None:
+            handle, output_file = tempfile.mkstemp(prefix="tts_async_", suffix="." + spec["format"],
+                                                   dir=self.output_dir)
+            os.close(handle)
+        job = SynthesisJob(f"async {engine}")
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphore(engine)
+        await semaphore.acquire()
+        future = loop.run_in_executor(self.threads, self.renderer, spec, output_file, job)
+        # The render thread can't be interrupted, so its slot is only freed once it has really stopped
+        future.add_done_callback(lambda _: semaphore.release())
+        try:
+            success = await asyncio.shield(future)
+        except BaseException:
+            # Stops gTTS downloads and espeak; a pyttsx3 render finishes in its process and is dropped
+            job.cancel()
+            future.add_done_callback(lambda _: self._remove_file(output_file))
+            raise
+        if not success or not os.path.exists(output_file):
+            raise RuntimeError(f"{engine} produced no audio")
+        return output_file
+
+    async def synthesize_stream(self, text, voice="male", tone="standard", rate="normal", engine="espeak",
+                                volume=1.0):
+        """Yield audio as it is produced: (sample_rate, channels, pcm) blocks, or MP3 segments for online
+
+        espeak-ng and gTTS stream natively; pyttsx3 renders the whole clip first and
+        then yields it block by block.
+        """
+        broker_job_spec(text, voice, tone, rate, engine, volume=volume)  # Reject bad options before starting
+        loop = asyncio.get_running_loop()
+        job = SynthesisJob(f"async stream {engine}")
+        path = None
+        if engine == "espeak":
+            make_source = lambda: stream_espeak_pcm(text, voice, tone, volume, rate, job=job)
+        elif engine == "online":
+            make_source = lambda: iter_gtts_segments(gtts.gTTS(text=text, lang='en'), job=job, limiter=self.limiter)
+        else:
+            path = await self.synthesize(text, voice, tone, rate, engine, volume=volume)
+            make_source = lambda: self._wav_blocks(path)
+        chunks = asyncio.Queue(maxsize=ASYNC_STREAM_QUEUE_BLOCKS)
+        try:
+            async with self.semaphore(engine):
+                producer = loop.run_in_executor(self.threads, self._pump, make_source, chunks, loop, job)
+                try:
+                    while True:
+                        chunk = await chunks.get()
+                        if chunk is None:
+                            break
+                        if isinstance(chunk, BaseException):
+                            raise chunk
+                        yield chunk
+                finally:
+                    job.cancel()
+                    # The source is closed on its own thread; wait so nothing outlives the stream
+                    await asyncio.shield(producer)
+        finally:
+            if path:
+                self._remove_file(path)
+
+    @staticmethod
+    def _pump(make_source, chunks, loop, job):
+        """Run a blocking source on this one thread, handing its chunks to the event loop in order"""
+        
+        def put(item):
+            future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+            while not future.done():
+                if job.cancelled:
+                    future.cancel()
+                    return False
+                future_wait([future], timeout=CANCEL_POLL_SECONDS)
+            return True
+        
+        source = None
+        try:
+            source = make_source()
+            for chunk in source:
+                if not put(chunk):
+                    return
+            put(None)
+        except SynthesisCancelled:
+            pass
+        except Exception as e:
+            put(e)
+        finally:
+            if source is not None:
+                source.close()
+
+    @staticmethod
+    def _wav_blocks(path):
+        """Read a finished WAV back as PCM blocks"""
+        with wave.open(path, 'rb') as wav:
+            sample_rate, channels = wav.getframerate(), wav.getnchannels()
+            while True:
+                pcm = wav.readframes(ASYNC_STREAM_BLOCK_FRAMES)
+                if not pcm:
+                    break
+                yield sample_rate, channels, pcm
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def synthesize_many(self, texts, return_exceptions=False, **options):
+        """Render many texts concurrently (within the engine's bound); paths come back in input order"""
+        return await asyncio.gather(*(self.synthesize(text, **options) for text in texts),
+                                    return_exceptions=return_exceptions)
+
+
+def benchmark_async(jobs=40, render_seconds=0.1):
+    """Check that the event loop stays responsive and per-engine limits hold under asyncio.gather"""
+    active = {}
+    peaks = {}
+    lock = Lock()
+    
+    def stub_renderer(spec, output_file, job):
+        with lock:
+            active[spec["engine"]] = active.get(spec["engine"], 0) + 1
+            peaks[spec["engine"]] = max(peaks.get(spec["engine"], 0), active[spec["engine"]])
+        time.sleep(render_seconds)  # Blocking, like pyttsx3 or a gTTS download
+        with wave.open(output_file, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(b"\0\0" * 2205)
+        with lock:
+            active[spec["engine"]] -= 1
+        return True
+    
+    async def run():
+        ticks = []
+        
+        async def heartbeat():
+            while True:
+                start_time = time.perf_counter()
+                await asyncio.sleep(0.01)
+                ticks.append(time.perf_counter() - start_time - 0.01)
+        
+        async with AsyncSynthesizer(renderer=stub_renderer) as tts:
+            beat = asyncio.create_task(heartbeat())
+            start_time = time.perf_counter()
+            paths = await asyncio.gather(*(tts.synthesize(f"Job {i}", engine=("offline", "espeak")[i % 2])
+                                           for i in range(jobs)))
+            elapsed = time.perf_counter() - start_time
+            beat.cancel()
+        for path in paths:
+            os.remove(path)
+        ticks.sort()
+        print(f"Async facade: {jobs} blocking jobs of {render_seconds * 1000:.0f} ms in {elapsed:.2f}s")
+        print(f"  Peak concurrency per engine: {peaks} (limits {ASYNC_ENGINE_LIMITS})")
+        print(f"  Event loop lag while rendering: p50 {ticks[len(ticks) // 2] * 1000:.1f} ms, "
+              f"max {ticks[-1] * 1000:.1f} ms")
+    
+    asyncio.run(run())
+
+
+BENCHMARKS = {
+    "postprocess": benchmark_postprocessing,
+    "gtts-parallel": benchmark_gtts_parallel,
+    "rate-limit": benchmark_rate_limit,
+    "online-first-audio": benchmark_online_first_audio,
+    "ui-dispatcher": benchmark_ui_dispatcher,
+    "history-search": benchmark_history_search,
+    "export": benchmark_export,
+    "lexicon": benchmark_lexicon,
+    "playback-start": benchmark_playback_start,
+    "espeak-first-audio": benchmark_espeak_first_audio,
+    "broker": benchmark_broker,
+    "scheduler": benchmark_scheduler,
+    "governor": benchmark_governor,
+    "async": benchmark_async
+}
+
+
 def main():
+    # Benchmarks run headless: python "Text-to- speech-modle.py" --benchmark <name>
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        names = sys.argv[2:] or list(BENCHMARKS)
+        for name in names:
+            if name not in BENCHMARKS:
+                print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+                continue
+            BENCHMARKS[name]()
+        return
+    
+    # Leak soak test: python "Text-to- speech-modle.py" --soak [cycles]
+    if len(sys.argv) > 1 and sys.argv[1] == "--soak":
+        cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        sys.exit(0 if run_soak(cycles) else 1)
+    
+    # Distributed synthesis: python "Text-to- speech-modle.py" --worker [broker_url]
+    #                        python "Text-to- speech-modle.py" --submit <text file> [broker_url] [engine]
+    #                        python "Text-to- speech-modle.py" --collect <folder> [broker_url]
+    #                        python "Text-to- speech-modle.py" --broker-status [broker_url]
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        worker = SynthesisWorker(open_broker(sys.argv[2] if len(sys.argv) > 2 else BROKER_URL))
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            print(f"Worker {worker.worker_id} stopping; its current lease will expire and be retried")
+        return
+    if len(sys.argv) > 2 and sys.argv[1] == "--submit":
+        broker = open_broker(sys.argv[3] if len(sys.argv) > 3 else BROKER_URL)
+        engine = sys.argv[4] if len(sys.argv) > 4 else "offline"
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        model = DurationModel()
+        try:
+            with open('tts_settings.json', 'r') as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            settings = {}
+        # Jobs carry the submitter's post-processing choice, since workers may run elsewhere
+        options = {"postprocess": settings.get("post_process_audio", False),
+                   "target_dbfs": settings.get("target_loudness_dbfs", -20.0)}
+        ids = [broker.submit(broker_job_spec(line, engine=engine, **options), model.predict(engine, line))
+               for line in lines]
+        print(f"Queued {len(ids)} jobs" + (f" ({ids[0]}-{ids[-1]})" if ids else ""))
+        return
+    if len(sys.argv) > 2 and sys.argv[1] == "--collect":
+        broker = open_broker(sys.argv[3] if len(sys.argv) > 3 else BROKER_URL)
+        os.makedirs(sys.argv[2], exist_ok=True)
+        job_ids = broker.list_jobs("done")
+        for job_id in job_ids:
+            audio_format, audio = broker.result(job_id)
+            with open(os.path.join(sys.argv[2], f"job_{job_id}.{audio_format}"), 'wb') as f:
+                f.write(audio)
+        print(f"Collected {len(job_ids)} finished jobs into {sys.argv[2]}")
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--broker-status":
+        print_broker_status(open_broker(sys.argv[2] if len(sys.argv) > 2 else BROKER_URL))
+        return
+    
     try:
         root = tk.Tk()
         app = AdvancedTextToSpeechConverter(root)
@@ -0,0 +1,18 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Text-to- speech-modle.py")
+
+
+@pytest.fixture(scope="session")
+def tts():
+    """The application module, loaded from its file name (which isn't importable as written)"""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location("text_to_speech", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,98 @@
+import sqlite3
+import time
+
+import pytest
+
+
+@pytest.fixture
+def broker(tts, tmp_path):
+    return tts.open_broker("sqlite:///" + str(tmp_path / "broker.sqlite"))
+
+
+def test_leases_shortest_job_first(tts, broker):
+    long_job = broker.submit(tts.broker_job_spec("long text " * 50), estimate=20.0)
+    short_job = broker.submit(tts.broker_job_spec("short"), estimate=1.0)
+    job_id, spec = broker.lease("worker-a")
+    assert (job_id, spec["text"]) == (short_job, "short")
+    assert broker.lease("worker-b")[0] == long_job
+    assert broker.lease("worker-c") is None
+
+
+def test_complete_stores_audio(tts, broker):
+    job_id = broker.submit(tts.broker_job_spec("hello"))
+    broker.lease("worker-a")
+    assert broker.complete(job_id, "worker-a", b"RIFF", "wav", 0.5)
+    assert broker.result(job_id) == ("wav", b"RIFF")
+    assert broker.status(job_id)["status"] == "done"
+    assert broker.list_jobs("done") == [job_id]
+
+
+def test_expired_lease_is_requeued_then_failed(tts, tmp_path):
+    broker = tts.SQLiteBroker("/" + str(tmp_path / "broker.sqlite"), max_attempts=2)
+    job_id = broker.submit(tts.broker_job_spec("hello"))
+    assert broker.lease("dead-worker", lease_seconds=0.01)[0] == job_id
+    time.sleep(0.05)
+    assert not broker.renew(job_id, "dead-worker")
+    
+    # The next lease call notices the expiry and hands the job to a live worker
+    assert broker.lease("worker-b", lease_seconds=0.01)[0] == job_id
+    assert not broker.complete(job_id, "dead-worker", b"late", "wav", 1.0)
+    time.sleep(0.05)
+    assert broker.lease("worker-c") is None
+    status = broker.status(job_id)
+    assert (status["status"], status["attempts"]) == ("failed", 2)
+    lost = {stats["worker"]: stats["leases_lost"] for stats in broker.worker_stats()}
+    assert lost["dead-worker"] == 1 and lost["worker-b"] == 1
+
+
+def test_renew_keeps_lease(tts, broker):
+    job_id = broker.submit(tts.broker_job_spec("hello"))
+    broker.lease("worker-a", lease_seconds=0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        assert broker.renew(job_id, "worker-a", lease_seconds=0.2)
+    assert broker.status(job_id)["status"] == "leased"
+
+
+def test_fail_retries_until_max_attempts(tts, broker):
+    job_id = broker.submit(tts.broker_job_spec("hello"))
+    for attempt in range(1, broker.max_attempts + 1):
+        assert broker.lease("worker-a")[0] == job_id
+        expected = "queued" if attempt < broker.max_attempts else "failed"
+        assert broker.fail(job_id, "worker-a", "boom", 0.1) == expected
+    assert broker.status(job_id)["error"] == "boom"
+
+
+def test_migrates_version_1_queue(tts, tmp_path):
+    path = str(tmp_path / "broker.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("""CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, spec TEXT NOT NULL, status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_expires REAL, error TEXT,
+        audio BLOB, audio_format TEXT, submitted REAL NOT NULL, finished REAL)""")
+    db.execute("CREATE INDEX jobs_status ON jobs (status, id)")
+    for text, submitted in (("first", 100.0), ("second", 200.0)):
+        db.execute("INSERT INTO jobs (spec, status, submitted) VALUES (?, 'queued', ?)",
+                   (tts.json.dumps(tts.broker_job_spec(text)), submitted))
+    db.commit()
+    db.close()
+    
+    broker = tts.SQLiteBroker("/" + path)
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == tts.BROKER_SCHEMA_VERSION
+    columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+    indexes = {row[1] for row in db.execute("PRAGMA index_list(jobs)")}
+    db.close()
+    assert {"estimate", "priority"} <= columns
+    assert "jobs_status" not in indexes and "jobs_schedule" in indexes
+    # Old jobs keep their first-come order
+    assert broker.lease("worker-a")[1]["text"] == "first"
+    assert broker.lease("worker-a")[1]["text"] == "second"
+    
+    # Opening an up-to-date queue again is a no-op
+    tts.SQLiteBroker("/" + path)
+
+
+def test_job_broker_is_abstract(tts):
+    with pytest.raises(TypeError):
+        tts.JobBroker()
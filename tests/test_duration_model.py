@@ -0,0 +1,63 @@
+import pytest
+
+
+TEXTS = ["Hello there.", "A somewhat longer sentence with a few more words in it.",
+         "Short.", "This one goes on for quite a while, long enough to be read as a full paragraph " * 3]
+
+
+def render_seconds(tts, text):
+    # A linear cost the model should be able to learn exactly
+    return float(tts.duration_features(text) @ [0.5, 0.8, 0.4])
+
+
+def test_prior_prediction(tts):
+    model = tts.DurationModel(model_file=None)
+    expected = float(tts.duration_features("Hello there.") @ tts.DURATION_PRIOR)
+    assert model.predict("offline", "Hello there.") == pytest.approx(max(0.05, expected))
+
+
+def test_learns_linear_render_time(tts):
+    model = tts.DurationModel(model_file=None)
+    for _ in range(30):
+        for text in TEXTS:
+            model.observe("offline", text, "standard", "normal", render_seconds(tts, text))
+    for text in TEXTS:
+        assert model.predict("offline", text) == pytest.approx(render_seconds(tts, text), rel=0.05)
+    runs, error = model.accuracy("offline")
+    assert runs == 30 * len(TEXTS)
+    assert error < 0.05
+
+
+def test_observe_returns_prediction_before_update(tts):
+    model = tts.DurationModel(model_file=None)
+    before = model.predict("offline", TEXTS[1])
+    assert model.observe("offline", TEXTS[1], "standard", "normal", 20.0) == pytest.approx(before)
+    assert model.predict("offline", TEXTS[1]) > before
+
+
+def test_failures_update_reliability_only(tts):
+    model = tts.DurationModel(model_file=None)
+    before = model.predict("online", TEXTS[0])
+    for _ in range(5):
+        model.observe("online", TEXTS[0], "standard", "normal", 9.0, success=False)
+    model.observe("online", TEXTS[0], "standard", "normal", None)
+    assert model.predict("online", TEXTS[0]) == pytest.approx(before)
+    attempts, runs, failure_rate = model.reliability("online")
+    assert (attempts, runs) == (6, 0)
+    assert 0.5 < failure_rate < 1.0
+
+
+def test_engines_are_independent(tts):
+    model = tts.DurationModel(model_file=None)
+    model.observe("online", TEXTS[0], "standard", "normal", 30.0)
+    assert model.predict("offline", TEXTS[0]) < model.predict("online", TEXTS[0])
+
+
+def test_save_and_load(tts, tmp_path):
+    path = str(tmp_path / "model.json")
+    model = tts.DurationModel(model_file=path)
+    model.observe("espeak", TEXTS[1], "standard", "normal", 2.0)
+    model.save(force=True)
+    loaded = tts.DurationModel(model_file=path)
+    assert loaded.predict("espeak", TEXTS[1]) == pytest.approx(model.predict("espeak", TEXTS[1]))
+    assert loaded.reliability("espeak") == model.reliability("espeak")
@@ -0,0 +1,64 @@
+import wave
+
+import numpy as np
+import pytest
+
+
+def write_wav(path, samples, sample_rate=22050):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as wav:
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2") / 32768.0, wav.getframerate()
+
+
+def test_trims_silence_and_normalizes(tts, tmp_path):
+    sample_rate = 22050
+    tone = 0.05 * np.sin(2 * np.pi * 220 * np.arange(sample_rate) / sample_rate)
+    silence = np.zeros(sample_rate // 2)
+    path = str(tmp_path / "clip.wav")
+    write_wav(path, np.concatenate([silence, tone, silence]), sample_rate)
+    
+    stats = tts.postprocess_wav(path, target_dbfs=-20.0, block_frames=4096)
+    samples, rate = read_wav(path)
+    padding = int(rate * tts.POSTPROCESS_PADDING_MS / 1000)
+    assert not stats["silent"]
+    assert stats["frames"] == len(samples)
+    # The sine starts and ends at zero crossings, which count as silence
+    assert len(samples) == pytest.approx(sample_rate + 2 * padding, abs=sample_rate // 100)
+    assert stats["trimmed_frames"] == 2 * len(silence) + sample_rate - len(samples)
+    rms_dbfs = 20 * np.log10(np.sqrt(np.mean(samples ** 2)))
+    assert rms_dbfs == pytest.approx(-20.0, abs=0.5)
+    assert stats["gain_db"] > 0
+
+
+def test_gain_never_clips(tts, tmp_path):
+    # A spiky signal whose RMS target would need more gain than its peak allows
+    samples = np.zeros(22050)
+    samples[::2205] = 0.5
+    path = str(tmp_path / "spikes.wav")
+    write_wav(path, samples)
+    tts.postprocess_wav(path, target_dbfs=-3.0)
+    assert np.abs(read_wav(path)[0]).max() <= 0.99
+
+
+def test_silent_clip_is_left_alone(tts, tmp_path):
+    path = str(tmp_path / "silent.wav")
+    write_wav(path, np.zeros(4410))
+    stats = tts.postprocess_wav(path)
+    assert stats["silent"]
+    assert len(read_wav(path)[0]) == 4410
+
+
+def test_writes_to_separate_output(tts, tmp_path):
+    source = str(tmp_path / "in.wav")
+    target = str(tmp_path / "out.wav")
+    write_wav(source, 0.1 * np.ones(2205))
+    tts.postprocess_wav(source, target)
+    assert len(read_wav(source)[0]) == 2205
+    assert len(read_wav(target)[0]) > 0
@@ -0,0 +1,144 @@
+from threading import Thread
+
+import pytest
+
+
+def test_token_bucket_allows_burst_then_paces(tts):
+    bucket = tts.TokenBucket(rate_per_minute=60, burst=2)
+    bucket.tokens, bucket.updated = 2.0, 0.0
+    assert bucket._take(0.0) == 0.0
+    assert bucket._take(0.0) == 0.0
+    assert bucket._take(0.0) == pytest.approx(1.0)
+    assert bucket._take(0.5) == pytest.approx(0.5)
+    assert bucket._take(1.0) == 0.0
+
+
+def test_token_bucket_cost_is_capped_at_burst(tts):
+    bucket = tts.TokenBucket(rate_per_minute=60, burst=3)
+    bucket.tokens, bucket.updated = 3.0, 0.0
+    # A request costing more than the burst could otherwise never be granted
+    assert bucket._take(0.0, cost=10) == 0.0
+    assert bucket._take(0.0, cost=2) == pytest.approx(2.0)
+
+
+def test_token_bucket_rate_zero_turns_pacing_off(tts):
+    bucket = tts.TokenBucket(rate_per_minute=0, burst=1)
+    assert all(bucket._take(0.0) == 0.0 for _ in range(100))
+    assert bucket.acquire(cost=5) < 0.1
+    assert bucket.stats()["requests"] == 5
+
+
+def test_token_bucket_retry_after_pauses_everyone(tts):
+    bucket = tts.TokenBucket(rate_per_minute=0, burst=1)
+    bucket.throttled(0.2)
+    assert bucket.acquire() >= 0.15
+    assert bucket.stats()["retry_after_pauses"] == 1
+
+
+def test_shortest_job_first(tts):
+    clock = [0.0]
+    jobs = tts.ShortestJobQueue(aging_per_second=0.2, clock=lambda: clock[0])
+    jobs.push("long", 10.0)
+    jobs.push("short", 1.0)
+    jobs.push("medium", 5.0)
+    assert [jobs.pop()[0] for _ in range(3)] == ["short", "medium", "long"]
+    assert jobs.pop() is None
+
+
+def test_shortest_job_queue_ages_waiting_jobs(tts):
+    clock = [0.0]
+    jobs = tts.ShortestJobQueue(aging_per_second=0.2, clock=lambda: clock[0])
+    jobs.push("long", 10.0)
+    clock[0] = 100.0
+    jobs.push("short", 1.0)
+    # The long job has waited 100s, worth 20s of estimate, so it now goes first
+    item, estimate, waited = jobs.pop()
+    assert (item, estimate, waited) == ("long", 10.0, 100.0)
+    assert jobs.pop()[0] == "short"
+
+
+class FakeLoad:
+    """Cumulative (busy, total) CPU times and a free-memory fraction the test can set"""
+
+    def __init__(self):
+        self.busy = 0.0
+        self.total = 0.0
+        self.memory = 0.5
+
+    def run(self, utilization, seconds=1.0):
+        self.busy += utilization * seconds
+        self.total += seconds
+
+    def cpu(self):
+        return self.busy, self.total
+
+
+def make_governor(tts, load, max_limit=8):
+    return tts.ConcurrencyGovernor(max_limit=max_limit, interval=3600, cpu_sampler=load.cpu,
+                                   memory_sampler=lambda: load.memory)
+
+
+def adjust(governor):
+    with governor.condition:
+        return governor.adjust()
+
+
+def test_governor_increases_additively_while_saturated(tts):
+    load = FakeLoad()
+    governor = make_governor(tts, load)
+    assert governor.limit == 4
+    while governor.try_acquire():
+        pass
+    assert governor.in_flight == 4
+    for expected in (5, 6, 7, 8, 8):
+        load.run(0.5)
+        assert adjust(governor) is None
+        assert governor.limit == expected
+        # Growth needs the new slot to be in use too
+        governor.try_acquire()
+
+
+def test_governor_holds_when_idle(tts):
+    load = FakeLoad()
+    governor = make_governor(tts, load)
+    load.run(0.1)
+    adjust(governor)
+    assert governor.limit == 4
+
+
+@pytest.mark.parametrize("cpu, memory, reason", [(0.95, 0.5, "cpu"), (0.2, 0.05, "memory")])
+def test_governor_halves_on_overload(tts, cpu, memory, reason):
+    load = FakeLoad()
+    governor = make_governor(tts, load)
+    load.memory = memory
+    load.run(cpu)
+    assert adjust(governor) == reason
+    assert governor.limit == 2
+    load.run(cpu)
+    adjust(governor)
+    load.run(cpu)
+    adjust(governor)
+    assert governor.limit == governor.min_limit
+    assert governor.stats()["decreases"] == {reason: 3}
+
+
+def test_governor_lowers_cpu_target_during_playback(tts):
+    load = FakeLoad()
+    governor = tts.ConcurrencyGovernor(max_limit=8, interval=3600, cpu_sampler=load.cpu,
+                                       memory_sampler=lambda: load.memory, interactive=lambda: True)
+    load.run(0.7)
+    assert adjust(governor) == "playback"
+
+
+def test_governor_acquire_blocks_until_release(tts):
+    load = FakeLoad()
+    governor = make_governor(tts, load, max_limit=2)
+    assert governor.try_acquire()
+    assert not governor.try_acquire()
+    assert not governor.acquire(timeout=0.05)
+    acquired = []
+    waiter = Thread(target=lambda: acquired.append(governor.acquire(timeout=5)))
+    waiter.start()
+    governor.release()
+    waiter.join()
+    assert acquired == [True]
@@ -0,0 +1,84 @@
+import json
+import os
+
+
+def make_index(tts, texts):
+    index = tts.HistorySearchIndex()
+    for entry_id, text in enumerate(texts):
+        index.add(entry_id, text)
+    return index
+
+
+def test_history_search_exact_words(tts):
+    index = make_index(tts, ["The quick brown fox", "A quick test", "Brown bread"])
+    assert index.search("quick ") == {0, 1}
+    assert index.search("brown quick ") == {0}
+    assert index.search("missing ") == set()
+    assert index.search("  ") is None
+
+
+def test_history_search_last_word_is_a_prefix(tts):
+    index = make_index(tts, ["The quick brown fox", "A quick test", "Brown bread"])
+    assert index.search("bro") == {0, 2}
+    assert index.search("quick te") == {1}
+    assert index.search("Quick, brown f") == {0}
+
+
+def test_history_search_remove(tts):
+    index = make_index(tts, ["The quick brown fox", "A quick test"])
+    index.remove(0)
+    assert index.search("quick") == {1}
+    assert index.search("fox ") == set()
+    assert "fox" not in index.vocabulary
+    index.clear()
+    assert index.search("quick") == set()
+
+
+def test_lexicon_whole_tokens_longest_match(tts):
+    trie = tts.PronunciationTrie({"SQL": "sequel", "New York": "new york city", "New": "brand new",
+                                  "C++": "see plus plus"})
+    assert trie.apply("MySQL and SQL") == ("MySQL and sequel", 1)
+    assert trie.apply("New  York is New") == ("new york city is brand new", 2)
+    assert trie.apply("Written in C++.") == ("Written in see plus plus.", 1)
+
+
+def test_lexicon_acronyms_keep_their_case(tts):
+    trie = tts.PronunciationTrie({"US": "you ess", "nginx": "engine x"})
+    assert trie.apply("Tell us about the US") == ("Tell us about the you ess", 1)
+    assert trie.apply("NGINX, nginx") == ("engine x, engine x", 2)
+
+
+def test_lexicon_reloads_when_file_changes(tts, tmp_path):
+    path = str(tmp_path / "lexicon.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"GUI": "gooey"}, f)
+    reloads = []
+    lexicon = tts.PronunciationLexicon(path, on_reload=lambda: reloads.append(True))
+    assert lexicon.apply("A GUI") == "A gooey"
+    
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"GUI": "graphical interface"}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    lexicon.last_check = 0.0
+    assert lexicon.apply("A GUI") == "A graphical interface"
+    assert len(reloads) == 2
+
+
+def test_lexicon_keeps_previous_entries_on_bad_file(tts, tmp_path):
+    path = str(tmp_path / "lexicon.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"GUI": "gooey"}, f)
+    lexicon = tts.PronunciationLexicon(path)
+    lexicon.apply("")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    lexicon.last_check = 0.0
+    assert lexicon.apply("A GUI") == "A gooey"
+
+
+def test_missing_lexicon_file_is_empty(tts, tmp_path):
+    lexicon = tts.PronunciationLexicon(str(tmp_path / "none.json"))
+    assert lexicon.apply("Nothing to change") == "Nothing to change"